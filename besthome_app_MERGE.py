@@ -31,17 +31,28 @@ from PIL import Image, ImageOps, ImageDraw
 from besthome_core import (
     init_db,
     ensure_tables,
-    add_listing_row,
+    add_listings_bulk,
     get_distinct_values,
+    get_listing_stats,
+    enable_profiling,
+    disable_profiling,
+    profile_stats,
+    warm_distinct_cache,
+    DISTINCT_COLUMNS,
+    start_maintenance,
+    maintenance_status,
+    MAINT_STEPS,
+    MAINT_IDLE_SECONDS,
     query_phones_summary,
+    page_cursor,
     get_listings_by_phone,
+    get_summary_text,
     set_favorite_phone,
     get_favorites_phones_map,
     add_sold,
     remove_sold,
     get_sold_set,
     phone_stats,
-    normalize_phone,
 )
 
 # ---------------- Tema ----------------
@@ -220,6 +231,7 @@ class App(ctk.CTk):
         # DB
         init_db()
         ensure_tables()
+        warm_distinct_cache()
 
         # State
         self.keyword_var = ctk.StringVar()
@@ -245,6 +257,8 @@ class App(ctk.CTk):
         # Favoritlər və satılanlar
         self.fav_colors = {}
         self.sold_set = set()
+        # Cədvəl sətri (iid) → summary_id (tam mətn detallarda açılır)
+        self._summary_ids = {}
 
         # UI
         self._build_tabs()
@@ -255,6 +269,7 @@ class App(ctk.CTk):
         self.after(700, self._reload_cache)
         self._bind_tab_change()
         self._bind_realtime()
+        self._bind_idle_maintenance()
 
         # --- Hadisələr və görünüş ---
         self.bind("<Configure>", lambda e: self._apply_col_widths())
@@ -366,6 +381,15 @@ class App(ctk.CTk):
         self.entry_limit = ctk.CTkEntry(limf, width=90)
         self.entry_limit.insert(0, self.limit_default)
         self.entry_limit.pack(side="left")
+        # Arxiv (köhnə elanlar) yalnız açıq istəniləndə axtarılır — daha yavaşdır
+        self.include_archive_var = ctk.BooleanVar(value=False)
+        ctk.CTkCheckBox(
+            limf,
+            text="Arxiv daxil",
+            variable=self.include_archive_var,
+            text_color=TEXT,
+            command=self.run_search,
+        ).pack(side="left", padx=(10, 0))
 
         # Düymələr
         btns = ctk.CTkFrame(header, fg_color=BG)
@@ -413,7 +437,6 @@ class App(ctk.CTk):
         # ---------- PARAMETRLƏR TABI — Analitika Dashboard (modern UI) ----------
         try:
             import estatebase_sync
-            import sqlite3
             from tkcalendar import DateEntry
             import datetime
             import threading
@@ -483,6 +506,22 @@ class App(ctk.CTk):
             day_entry.insert(0, "-1")
             day_entry.grid(row=0, column=5, padx=(0, 10))
 
+            # İnkremental: tarixlər nəzərə alınmır, son sinxron nöqtəsindən davam edir
+            incremental_var = ctk.BooleanVar(value=True)
+            ctk.CTkCheckBox(
+                control_frame, text="⚡ Yalnız yenilər", variable=incremental_var, text_color="#333"
+            ).grid(row=0, column=6, padx=(10, 10))
+            watermark_label = ctk.CTkLabel(control_frame, text="", text_color="#666", font=("Segoe UI", 11))
+            watermark_label.grid(row=1, column=0, columnspan=7, sticky="w", padx=10, pady=(0, 8))
+
+            def refresh_watermark():
+                try:
+                    watermark_label.configure(text=estatebase_sync.watermark_text())
+                except Exception as err:
+                    watermark_label.configure(text=f"⚠️ Sinxron nöqtəsi oxunmadı: {err}")
+
+            refresh_watermark()
+
             # Progress göstəricisi
             progress_bar = ctk.CTkProgressBar(main_frame, height=14, progress_color="#0078D4")
             progress_bar.pack(fill="x", padx=20, pady=(12, 4))
@@ -505,21 +544,12 @@ class App(ctk.CTk):
             # 🔹 Statistikanı yeniləyən funksiya
             def update_statistics():
                 try:
-                    conn = sqlite3.connect("besthome.db")
-                    c = conn.cursor()
-
-                    c.execute("SELECT COUNT(*) FROM listings")
-                    total = c.fetchone()[0] or 0
-                    c.execute("SELECT COUNT(*) FROM listings WHERE operation LIKE '%Sat%'")
-                    sales = c.fetchone()[0] or 0
-                    c.execute("SELECT COUNT(*) FROM listings WHERE operation LIKE '%Kiray%'")
-                    rent = c.fetchone()[0] or 0
-                    c.execute("""
-                        SELECT prop_type, COUNT(*) FROM listings
-                        WHERE prop_type IS NOT NULL AND TRIM(prop_type) != ''
-                        GROUP BY prop_type ORDER BY COUNT(*) DESC LIMIT 5
-                    """)
-                    categories = c.fetchall()
+                    stats = get_listing_stats()
+                    total = stats["total"]
+                    sales = stats["sales"]
+                    rent = stats["rent"]
+                    dupes = stats["dupes"]
+                    categories = stats["top_prop_types"]
 
                     # Əlavə statistik mətn
                     top_text = "🏆 Ən çox elan olan kateqoriyalar:\n"
@@ -535,49 +565,55 @@ class App(ctk.CTk):
                     stat_labels["Ümumi"].configure(text=f"{total:,}")
                     stat_labels["Satış"].configure(text=f"{sales:,}")
                     stat_labels["Kirayə"].configure(text=f"{rent:,}")
-
-                    # Dublikat sayı
-                    c.execute("""
-                        SELECT COUNT(*) FROM (
-                            SELECT phone FROM listings
-                            WHERE phone IS NOT NULL
-                            GROUP BY phone, price, rooms, area_kvm
-                            HAVING COUNT(*) > 1
-                        )
-                    """)
-                    dupes = c.fetchone()[0] or 0
                     stat_labels["Dublikat"].configure(text=f"{dupes:,}")
 
-                    conn.close()
-
                 except Exception as err:
                     detail_label.configure(text=f"⚠️ Statistika xətası: {err}", text_color="#E74C3C")
 
             # 🔹 Serverdən məlumat sinxron funksiyası
+            # (işçi axın vidjetlərə toxunmur — gedişat növbə ilə gəlir, after() ilə oxunur)
             def run_sync():
-                def worker():
-                    try:
-                        progress_label.configure(text="📡 Serverdən məlumat yüklənir...", text_color="#E67E22")
-                        progress_bar.set(0.05)
+                progress_label.configure(text="📡 Serverdən məlumat yüklənir...", text_color="#E67E22")
+                progress_bar.set(0.05)
 
-                        date_from = from_cal.get_date().strftime("%Y-%m-%d")
-                        date_to = to_cal.get_date().strftime("%Y-%m-%d")
-                        days = day_entry.get().strip()
+                date_from = from_cal.get_date().strftime("%Y-%m-%d")
+                date_to = to_cal.get_date().strftime("%Y-%m-%d")
+                days = day_entry.get().strip()
+                incremental = incremental_var.get()
+                events = queue.Queue()
+                result = {}
 
-                        added_total = estatebase_sync.sync_with_progress(date_from, date_to, days, progress_bar, progress_label)
-                        update_statistics()
-
-                        progress_bar.set(1.0)
-                        progress_label.configure(
-                            text=f"✅ Serverdən {added_total} yeni elan yükləndi.",
-                            text_color="#27AE60",
+                def worker():
+                    try:
+                        result["added"] = estatebase_sync.sync_with_progress(
+                            date_from, date_to, days, events, incremental=incremental
                         )
+                        warm_distinct_cache(background=False)
+                        # İstifadəçi aktivdirsə dayanır və növbəti boş anda davam edir
+                        start_maintenance("sync", should_pause=self._user_returned(), force=True)
+                    except Exception as err:
+                        events.put({"type": "error", "message": str(err)})
+
+                def poll():
+                    ev = estatebase_sync.drain_events(events)
+                    if ev:
+                        result["last"] = ev
+                        text, color, pct = estatebase_sync.event_text(ev)
+                        progress_label.configure(text=text, text_color=color)
+                        if pct is not None:
+                            progress_bar.set(pct)
+                    if thread.is_alive():
+                        progress_label.after(estatebase_sync.PROGRESS_REFRESH_MS, poll)
+                        return
+                    refresh_watermark()
+                    update_statistics()
+                    if "added" in result and result.get("last", {}).get("type") != "error":
                         self._reload_cache()
                         self.run_search()
-                    except Exception as err:
-                        progress_label.configure(text=f"❌ Xəta: {err}", text_color="#E74C3C")
 
-                threading.Thread(target=worker, daemon=True).start()
+                thread = threading.Thread(target=worker, daemon=True)
+                thread.start()
+                progress_label.after(estatebase_sync.PROGRESS_REFRESH_MS, poll)
 
             # 🔹 Sinxron düyməsi
             ctk.CTkButton(
@@ -590,6 +626,100 @@ class App(ctk.CTk):
                 command=run_sync,
             ).pack(pady=(5, 15))
 
+            # -------------- Sorğu profilləşdirməsi --------------
+            profile_frame = ctk.CTkFrame(main_frame, fg_color="#FFFFFF", corner_radius=10)
+            profile_frame.pack(fill="x", padx=10, pady=(0, 10))
+            profile_label = ctk.CTkLabel(
+                profile_frame,
+                text="⏱️ Profilləşdirmə söndürülüb.",
+                font=("Consolas", 12),
+                text_color="#444",
+                justify="left",
+            )
+
+            def refresh_profile():
+                stats = profile_stats()
+                if not stats:
+                    profile_label.configure(text="⏱️ Hələ ölçü yoxdur.")
+                    return
+                lines = [f"{'Funksiya':<24}{'say':>7}{'p50 ms':>10}{'p95 ms':>10}{'max ms':>10}"]
+                for name, st in sorted(stats.items(), key=lambda kv: -kv[1]["total_ms"]):
+                    lines.append(
+                        f"{name:<24}{st['calls']:>7}{st['p50_ms']:>10.1f}{st['p95_ms']:>10.1f}{st['max_ms']:>10.1f}"
+                    )
+                profile_label.configure(text="\n".join(lines))
+
+            def toggle_profile():
+                if profile_switch.get():
+                    enable_profiling()
+                    refresh_profile()
+                else:
+                    disable_profiling()
+                    profile_label.configure(text="⏱️ Profilləşdirmə söndürülüb.")
+
+            profile_switch = ctk.CTkSwitch(
+                profile_frame,
+                text="⏱️ Sorğu profilləşdirməsi (yavaş sorğular besthome_slow.log-a yazılır)",
+                command=toggle_profile,
+            )
+            profile_switch.pack(anchor="w", padx=15, pady=(10, 4))
+            ctk.CTkButton(
+                profile_frame, text="Yenilə", width=90, command=refresh_profile
+            ).pack(anchor="w", padx=15, pady=(0, 4))
+            profile_label.pack(anchor="w", padx=15, pady=(0, 10))
+
+            # -------------- Texniki xidmət --------------
+            maint_frame = ctk.CTkFrame(main_frame, fg_color="#FFFFFF", corner_radius=10)
+            maint_frame.pack(fill="x", padx=10, pady=(0, 10))
+            maint_label = ctk.CTkLabel(
+                maint_frame,
+                text="🧰 Texniki xidmət hələ işləməyib.",
+                font=("Consolas", 12),
+                text_color="#444",
+                justify="left",
+            )
+
+            def refresh_maintenance():
+                try:
+                    status = maintenance_status()
+                except Exception as err:
+                    maint_label.configure(text=f"⚠️ Texniki xidmət: {err}")
+                    return
+                running = status.pop("running")
+                lines = [f"{'Addım':<13}{'Son icra':<21}{'ms':>8}  Nəticə"]
+                for step in MAINT_STEPS:
+                    st = status.get(step)
+                    if not st:
+                        lines.append(f"{step:<13}{'—':<21}")
+                        continue
+                    mark = "✅" if st["status"] == "ok" else "❌"
+                    lines.append(
+                        f"{step:<13}{st['started_at']:<21}{st['duration_ms']:>8.0f}  {mark} {st['result']}"
+                    )
+                if running:
+                    lines.append(f"⏳ İcra olunur: {running}")
+                maint_label.configure(text="\n".join(lines))
+
+            def poll_maintenance():
+                refresh_maintenance()
+                maint_label.after(5000, poll_maintenance)
+
+            def run_maintenance_now():
+                start_maintenance("manual", force=True)
+                refresh_maintenance()
+
+            ctk.CTkLabel(
+                maint_frame,
+                text=f"🧰 Texniki xidmət (App {MAINT_IDLE_SECONDS} san boş qalanda və sinxrondan sonra)",
+                font=("Segoe UI Semibold", 13),
+                text_color="#333",
+            ).pack(anchor="w", padx=15, pady=(10, 4))
+            ctk.CTkButton(
+                maint_frame, text="İndi işə sal", width=110, command=run_maintenance_now
+            ).pack(anchor="w", padx=15, pady=(0, 4))
+            maint_label.pack(anchor="w", padx=15, pady=(0, 10))
+            poll_maintenance()
+
             # İlk açılışda statistik məlumatları göstər
             update_statistics()
 
@@ -599,6 +729,30 @@ class App(ctk.CTk):
 
 
 
+    # ---------- Boş vaxtda texniki xidmət ----------
+    def _bind_idle_maintenance(self):
+        """Klaviatura/siçan aktivliyini izləyir; App boş qalanda baza xidmətini başladır."""
+        self._last_activity = time.monotonic()
+        for seq in ("<Key>", "<Button>", "<MouseWheel>"):
+            self.bind_all(seq, self._touch_activity, add="+")
+        self.after(30_000, self._maintenance_tick)
+
+    def _touch_activity(self, _event=None):
+        self._last_activity = time.monotonic()
+
+    def _user_returned(self):
+        """start_maintenance üçün should_pause: indidən sonra aktivlik olubmu."""
+        started = time.monotonic()
+        return lambda: self._last_activity > started
+
+    def _maintenance_tick(self):
+        try:
+            if time.monotonic() - self._last_activity >= MAINT_IDLE_SECONDS:
+                start_maintenance("idle", should_pause=self._user_returned())
+        except Exception as e:
+            print(f"[⚠️ Texniki xidmət] {e}")
+        self.after(30_000, self._maintenance_tick)
+
     # ---------- Tab dəyişimi (sabit versiya) ----------
     def _bind_tab_change(self):
         """Tab dəyişimini izləyir və aktiv tabı yeniləyir."""
@@ -685,7 +839,12 @@ class App(ctk.CTk):
 
         vsb = ttk.Scrollbar(container, orient="vertical", command=self.tree.yview)
         hsb = ttk.Scrollbar(container, orient="horizontal", command=self.tree.xview)
-        self.tree.configure(yscrollcommand=vsb.set, xscrollcommand=hsb.set)
+
+        def on_yscroll(first, last):
+            vsb.set(first, last)
+            self._on_tree_scroll(first, last)
+
+        self.tree.configure(yscrollcommand=on_yscroll, xscrollcommand=hsb.set)
         self.tree.grid(row=0, column=0, sticky="nsew")
         vsb.grid(row=0, column=1, sticky="ns")
         hsb.grid(row=1, column=0, sticky="ew")
@@ -753,7 +912,7 @@ class App(ctk.CTk):
         if not vals or len(vals) < len(self.cols):
             return
 
-        self._open_property_details(vals)
+        self._open_property_details(vals, self._summary_ids.get(item_id))
 
 
     def _apply_col_widths(self):
@@ -922,10 +1081,8 @@ class App(ctk.CTk):
         if not sel:
             return
         vals = self.tree.item(sel[0], "values")
-        phone = normalize_phone(vals[self.cols.index("phone")])
-        if not phone:
+        if not set_favorite_phone(vals[self.cols.index("phone")], color):
             return
-        set_favorite_phone(phone, color)
         self._reload_cache()
         self.run_search()
 
@@ -934,10 +1091,8 @@ class App(ctk.CTk):
         if not sel:
             return
         vals = self.tree.item(sel[0], "values")
-        phone = normalize_phone(vals[self.cols.index("phone")])
-        if not phone:
+        if not add_sold(vals[self.cols.index("phone")]):
             return
-        add_sold(phone)
         self._reload_cache()
         self.run_search()
 
@@ -946,10 +1101,8 @@ class App(ctk.CTk):
         if not sel:
             return
         vals = self.tree.item(sel[0], "values")
-        phone = normalize_phone(vals[self.cols.index("phone")])
-        if not phone:
+        if not remove_sold(vals[self.cols.index("phone")]):
             return
-        remove_sold(phone)
         self._reload_cache()
         self.run_search()
 
@@ -973,7 +1126,7 @@ class App(ctk.CTk):
         try:
             iv = int(val)
             if iv > 10000:
-                self._toast("🔔 Elan sayının çox olması bazanı yavaşlada bilər.")
+                self._toast("🔔 Böyük səhifə ölçüsü cədvəli yavaşlada bilər.")
             return max(1, iv)
         except:
             return 500
@@ -993,125 +1146,15 @@ class App(ctk.CTk):
         self.filter_floor_min = self.filter_floor_max = None
         self.entry_limit.delete(0, "end")
         self.entry_limit.insert(0, self.limit_default)
+        self.include_archive_var.set(False)
         self.run_search()
 
     def run_search(self):
         """Axtarış bütün tablarda keçərlidir və nəticələri yeniləyir."""
         kw = (self.keyword_var.get() or "").strip()
-        limit = self._get_limit() if hasattr(self, "_get_limit") else int(self.limit_default)
-
-        # Aktiv taba uyğun hansı cədvəli yeniləyəcəyik?
-        if self.active_tab == "sold":
-            only_sold = True
-            only_favorites = False
-        elif self.active_tab == "fav":
-            only_sold = False
-            only_favorites = True
-        else:
-            only_sold = False
-            only_favorites = False
-
-        # 🔍 Məlumatları DB-dən çək
-        rows = query_phones_summary(
-            keyword=(kw if kw else None),
-            limit=limit,
-            only_sold=only_sold,
-            only_favorites=only_favorites,
-        )
-
-        # Əsas cədvəl valideyni müəyyən et
-        if self.active_tab == "sold":
-            parent = self.tab_sold
-        elif self.active_tab == "fav":
-            parent = self.tab_fav
-        else:
-            parent = self.tab_all
-
-        # Cədvəl varsa, təmizləyib doldur
-        if hasattr(self, "tree"):
-            try:
-                self.tree.delete(*self.tree.get_children())
-            except Exception:
-                pass
-        else:
-            # Əgər treeview hələ qurulmayıbsa — yaradırıq
-            self._create_tree(parent)
-
-        # 🔹 Boş nəticə üçün logo göstər
-        if not rows:
-            for w in parent.winfo_children():
-                if isinstance(w, ctk.CTkFrame) and getattr(w, "is_placeholder", False):
-                    try:
-                        w.destroy()
-                    except:
-                        pass
-            placeholder = ctk.CTkFrame(parent, fg_color="white")
-            placeholder.is_placeholder = True
-            placeholder.place(relx=0.5, rely=0.5, anchor="center")
-
-            try:
-                from PIL import Image
-                img = Image.open("besthomelogo.png")
-                logo = CTkImage(img, size=(120, 120))
-                lbl = ctk.CTkLabel(placeholder, image=logo, text="")
-                lbl.image = logo
-                lbl.pack()
-            except:
-                ctk.CTkLabel(
-                    placeholder,
-                    text="📭 Nəticə tapılmadı",
-                    font=("Segoe UI", 15),
-                    text_color="#555",
-                ).pack()
-            return
-
-        # 🔹 Əgər nəticə varsa — logo varsa sil və nəticələri əlavə et
-        for w in parent.winfo_children():
-            if isinstance(w, ctk.CTkFrame) and getattr(w, "is_placeholder", False):
-                try:
-                    w.destroy()
-                except:
-                    pass
-
-        # Nəticələri TreeView-ə əlavə et
-        for r in rows:
-            vals = [
-                r["date_read"] or "",
-                r["prop_type"] or "",
-                r["operation"] or "",
-                r["metro"] or "",
-                r["rooms"] or "",
-                r["building"] or "",
-                r["floor"] or "",
-                r["area_kvm"] or "",
-                r["price"] or "",
-                r["currency"] or "",
-                r["phone"] or "",
-                r["contact_name"] or "",
-                r["address"] or "",
-                r["document"] or "",
-                r["summary"] or "",
-                r["source_link"] or "",
-            ]
-            self.tree.insert("", "end", values=vals)
-
-
-            # Əməliyyat overlay (başlıqdan)
-            ops = list(self.filter_operation)
-            op_param = ops[0] if len(ops) == 1 else None
-
-            date_from = (self.e_from.get() or "").strip() or None
-            date_to = (self.e_to.get() or "").strip() or None
-            limit = self._get_limit()
-
-        def _on_heading_click(self, event):
-            region = self.tree.identify("region", event.x, event.y)
-            if region != "heading":
-                return
-            idx = int(self.tree.identify_column(event.x).replace("#", "")) - 1
-            if 0 <= idx < len(self.cols):
-                col_name = self.cols[idx]
-                print(f"📊 Sütuna klik: {col_name}")
+        limit = self._get_limit()
+        date_from = (self.e_from.get() or "").strip() or None
+        date_to = (self.e_to.get() or "").strip() or None
 
         # --- Tab konteksti ---
         tab_title = self.tabs.get() if hasattr(self, "tabs") else "Bütün Elanlar"
@@ -1133,114 +1176,116 @@ class App(ctk.CTk):
             f"🟢 run_search() tab: {self.active_tab} | exclude_sold={exclude_sold} | only_sold={only_sold} | only_fav={only_fav}"
         )
 
-        # --- Sorğu ---
-        rows = query_phones_summary(
+        # --- Sorğu: bütün overlay filtrləri SQL-də tətbiq olunur ---
+        # Mərtəbə: yalnız Min verilibsə, dəqiq həmin mərtəbə axtarılır
+        floor_min = self.filter_floor_min
+        floor_max = self.filter_floor_max
+        if floor_min is not None and floor_max is None:
+            floor_max = floor_min
+
+        # Limit səhifə ölçüsüdür — qalanı cədvəl aşağı sürüşdürüləndə yüklənir
+        self._page_size = limit
+        self._search_kwargs = dict(
             keyword=(kw if kw else None),
-            limit=limit,
             date_from=date_from,
             date_to=date_to,
             exclude_sold=exclude_sold,
             only_sold=only_sold,
             only_favorites=only_fav,
+            operations=self.filter_operation,
+            prop_types=self.filter_prop_type,
+            buildings=self.filter_building,
+            metros=self.filter_metro,
+            rooms=self.filter_rooms,
+            price_min=self.filter_price_min,
+            price_max=self.filter_price_max,
+            area_min=self.filter_area_min,
+            area_max=self.filter_area_max,
+            floor_min=floor_min,
+            floor_max=floor_max,
+            include_archive=self.include_archive_var.get(),
         )
 
-        # ---------- Lokal overlay filterlər ----------
-        out = []
-        for r in rows:
-            try:
-                # Əməliyyat (Satılır / Kirayə verilir)
-                if self.filter_operation and (
-                    rget(r, "operation", "") not in self.filter_operation
-                ):
-                    continue
-                if self.filter_prop_type and (
-                    rget(r, "prop_type", "") not in self.filter_prop_type
-                ):
-                    continue
-                if self.filter_building and (
-                    rget(r, "building", "") not in self.filter_building
-                ):
-                    continue
-                if self.filter_city and (
-                    rget(r, "city_district", "") not in self.filter_city
-                ):
-                    continue
-                if self.filter_metro and (
-                    rget(r, "metro", "") not in self.filter_metro
-                ):
-                    continue
-                if self.filter_rooms and (
-                    rget(r, "rooms", "") not in self.filter_rooms
-                ):
-                    continue
-
-                # Qiymət filteri
+        out = query_phones_summary(limit=limit, **self._search_kwargs)
+        self._page_cursor = page_cursor(out, limit)
+
+        # ---------- Render ----------
+        self.tree.delete(*self.tree.get_children())
+        self._summary_ids = {}
+        self._shown = self._kir = self._sat = 0
+        self._render_rows(out)
+        self.tree.update_idletasks()
+        self.update_idletasks()
+        self.after(
+            100,
+            lambda: (
+                self.tree.see(self.tree.get_children()[0])
+                if self.tree.get_children()
+                else None
+            ),
+        )
+
+        # =====================================
+        # 📭 Boş nəticə üçün loqo + yazı (tam işlək versiya — bütün tablar üçün)
+        # =====================================
+        # Aktiv taba uyğun parent seç
+        current_parent = {
+            "all": self.tab_all,
+            "sold": self.tab_sold,
+            "fav": self.tab_fav,
+        }.get(self.active_tab, self.tab_all)
+
+        # Əvvəlki placeholder varsa sil
+        for w in current_parent.winfo_children():
+            if isinstance(w, ctk.CTkFrame) and getattr(w, "is_placeholder", False):
                 try:
-                    p = rget(r, "price")
-                    p_val = float(p) if p not in (None, "", "-") else None
-                except Exception:
-                    p_val = None
-
-                if self.filter_price_min is not None and (
-                    p_val is None or p_val < self.filter_price_min
-                ):
-                    continue
-                if self.filter_price_max is not None and (
-                    p_val is None or p_val > self.filter_price_max
-                ):
-                    continue
-
-                # Sahə filteri
+                    w.destroy()
+                except:
+                    pass
+
+        # Əgər nəticə boşdursa, loqo + yazı göstər
+        if not out:
+            placeholder = ctk.CTkFrame(current_parent, fg_color=BG)
+            placeholder.is_placeholder = True
+            placeholder.place(relx=0.5, rely=0.5, anchor="center")
+
+            try:
+                img = Image.open("besthomelogo.png")
+                logo = CTkImage(img, size=(130, 130))
+                lbl_logo = ctk.CTkLabel(placeholder, image=logo, text="")
+                lbl_logo.image = logo
+                lbl_logo.pack(pady=(12, 8))
+            except Exception:
+                ctk.CTkLabel(
+                    placeholder,
+                    text="BESTHOME",
+                    font=("Segoe UI Semibold", 28),
+                    text_color=PRIMARY,
+                ).pack(pady=(12, 8))
+
+            ctk.CTkLabel(
+                placeholder,
+                text="📭 Bu bölmədə məlumat yoxdur.\n\nYeni elanları görmək üçün 'Təmizlə' düyməsinə toxunun.",
+                font=("Segoe UI", 15),
+                text_color="#666",
+                justify="center",
+            ).pack(pady=(8, 12))
+
+            # Əgər məlumat gəlirsə — placeholder silinsin
+            def clear_placeholder():
                 try:
-                    ak = rget(r, "area_kvm")
-                    akv = float(ak) if ak not in (None, "", "-") else None
-                except Exception:
-                    akv = None
-                if self.filter_area_min is not None and (
-                    akv is None or akv < self.filter_area_min
-                ):
-                    continue
-                if self.filter_area_max is not None and (
-                    akv is None or akv > self.filter_area_max
-                ):
-                    continue
-
-                # Mərtəbə filteri
-                cur, _ = parse_floor_current_total(rget(r, "floor"))
-                if (
-                    self.filter_floor_min is not None
-                    or self.filter_floor_max is not None
-                ):
-                    if cur is None:
-                        continue
-                    if (
-                        self.filter_floor_min is not None
-                        and self.filter_floor_max is None
-                    ):
-                        if cur != int(self.filter_floor_min):
-                            continue
-                    else:
-                        if self.filter_floor_min is not None and cur < int(
-                            self.filter_floor_min
-                        ):
-                            continue
-                        if self.filter_floor_max is not None and cur > int(
-                            self.filter_floor_max
-                        ):
-                            continue
-
-                out.append(r)
-            except Exception as e:
-                print(f"[⚠️ Filter skip] xəta: {e}")
-                continue
+                    placeholder.destroy()
+                except:
+                    pass
 
-                # ---------- Render ----------
-        self.tree.delete(*self.tree.get_children())
-        kir = 0
-        sat = 0
+            # Tree hər dəfə yenilənəndə bu silinsin
+            self.after(1000, clear_placeholder)
+
+    def _render_rows(self, rows):
+        """Sətirləri cədvəlin sonuna əlavə edir, status sayğaclarını yeniləyir."""
         favmap = self.fav_colors
 
-        for r in out:
+        for r in rows:
             try:
                 date_txt = rget(r, "date_read") or rget(r, "created_at", "-")
                 if date_txt and len(date_txt) >= 10:
@@ -1274,7 +1319,8 @@ class App(ctk.CTk):
                 except Exception:
                     price_txt = str(rget(r, "price", "-"))
 
-                phone = normalize_phone(rget(r, "phone", "-"))
+                # Bazada telefon artıq normal formadadır (phones cədvəli)
+                phone = rget(r, "phone", "-")
                 vals = [
                     rget(r, "date_read", "-"),
                     rget(r, "prop_type", "-"),
@@ -1286,19 +1332,19 @@ class App(ctk.CTk):
                     rget(r, "area_kvm", "-"),
                     rget(r, "price", "-"),
                     "-",  # Valyuta çıxarılıb
-                    rget(r, "phone", "-"),
+                    phone,
                     rget(r, "contact_name", "-"),
                     rget(r, "address", "-"),
                     rget(r, "document", "-"),
-                    rget(r, "summary", "-"),
+                    rget(r, "summary_preview", "-"),
                     rget(r, "source_link", "-"),
                 ]
 
                 op = (rget(r, "operation", "") or "").lower()
                 if "kiray" in op:
-                    kir += 1
+                    self._kir += 1
                 if "sat" in op:
-                    sat += 1
+                    self._sat += 1
 
                 color = favmap.get(phone)
                 if color:
@@ -1307,82 +1353,43 @@ class App(ctk.CTk):
                         self.tree.tag_configure(tag, background=color)
                     except Exception:
                         pass
-                    self.tree.insert("", "end", values=vals, tags=(tag,))
+                    iid = self.tree.insert("", "end", values=vals, tags=(tag,))
                 else:
-                    self.tree.insert("", "end", values=vals)
+                    iid = self.tree.insert("", "end", values=vals)
+                # Tam mətn yalnız detallar açılanda summary_id ilə oxunur
+                self._summary_ids[iid] = rget(r, "summary_id")
             except Exception as e:
                 print(f"[⚠️ Render skip] xəta: {e}")
                 continue
 
+        self._shown += len(rows)
+        more = " | ⬇️ daha çox var" if self._page_cursor else ""
         self.lbl_status.configure(
-            text=f"Tapıldı: {len(out)} | Kirayə: {kir} | Satılır: {sat}"
-        )
-        self.tree.update_idletasks()
-        self.update_idletasks()
-        self.after(
-            100,
-            lambda: (
-                self.tree.see(self.tree.get_children()[0])
-                if self.tree.get_children()
-                else None
-            ),
+            text=f"Tapıldı: {self._shown} | Kirayə: {self._kir} | Satılır: {self._sat}{more}"
         )
 
-        # =====================================
-        # 📭 Boş nəticə üçün loqo + yazı (tam işlək versiya — bütün tablar üçün)
-        # =====================================
-        # Aktiv taba uyğun parent seç
-        current_parent = {
-            "all": self.tab_all,
-            "sold": self.tab_sold,
-            "fav": self.tab_fav,
-        }.get(self.active_tab, self.tab_all)
-
-        # Əvvəlki placeholder varsa sil
-        for w in current_parent.winfo_children():
-            if isinstance(w, ctk.CTkFrame) and getattr(w, "is_placeholder", False):
-                try:
-                    w.destroy()
-                except:
-                    pass
+    # ---------- Səhifələmə (keyset) ----------
+    def _on_tree_scroll(self, first, last):
+        """Cədvəl sonuna yaxınlaşanda növbəti səhifəni yükləyir."""
+        if getattr(self, "_page_cursor", None) and float(last) >= 0.9:
+            if not getattr(self, "_page_loading", False):
+                self._page_loading = True
+                self.after_idle(self._load_next_page)
 
-        # Əgər nəticə boşdursa, loqo + yazı göstər
-        if not out:
-            placeholder = ctk.CTkFrame(current_parent, fg_color=BG)
-            placeholder.is_placeholder = True
-            placeholder.place(relx=0.5, rely=0.5, anchor="center")
-
-            try:
-                img = Image.open("besthomelogo.png")
-                logo = CTkImage(img, size=(130, 130))
-                lbl_logo = ctk.CTkLabel(placeholder, image=logo, text="")
-                lbl_logo.image = logo
-                lbl_logo.pack(pady=(12, 8))
-            except Exception:
-                ctk.CTkLabel(
-                    placeholder,
-                    text="BESTHOME",
-                    font=("Segoe UI Semibold", 28),
-                    text_color=PRIMARY,
-                ).pack(pady=(12, 8))
-
-            ctk.CTkLabel(
-                placeholder,
-                text="📭 Bu bölmədə məlumat yoxdur.\n\nYeni elanları görmək üçün 'Təmizlə' düyməsinə toxunun.",
-                font=("Segoe UI", 15),
-                text_color="#666",
-                justify="center",
-            ).pack(pady=(8, 12))
-
-            # Əgər məlumat gəlirsə — placeholder silinsin
-            def clear_placeholder():
-                try:
-                    placeholder.destroy()
-                except:
-                    pass
-
-            # Tree hər dəfə yenilənəndə bu silinsin
-            self.after(1000, clear_placeholder)
+    def _load_next_page(self):
+        try:
+            cursor = self._page_cursor
+            if not cursor:
+                return
+            rows = query_phones_summary(
+                limit=self._page_size, cursor=cursor, **self._search_kwargs
+            )
+            self._page_cursor = page_cursor(rows, self._page_size)
+            self._render_rows(rows)
+        except Exception as e:
+            print(f"[⚠️ Səhifə yüklənmədi] {e}")
+        finally:
+            self._page_loading = False
 
     # ---------- Heading overlay filterləri ----------
     def _on_heading_click(self, event):
@@ -1461,7 +1468,7 @@ class App(ctk.CTk):
                 anchor="w", padx=10, pady=(8, 6)
             )
 
-            values = get_distinct_values(key)
+            values = get_distinct_values(key) if key in DISTINCT_COLUMNS else []
             if key == "operation" and not values:
                 values = ["Satılır", "Kirayə verilir"]
             if key == "rooms":
@@ -1541,7 +1548,7 @@ class App(ctk.CTk):
                 command=lambda: apply_and_close(apply_price),
             ).pack(padx=10, pady=8)
 
-        elif key == "area":
+        elif key in ("area", "area_kvm"):
             ctk.CTkLabel(frame, text="Sahə (kvm) Min/Max", text_color=TEXT).pack(
                 anchor="w", padx=10, pady=(8, 6)
             )
@@ -1603,13 +1610,13 @@ class App(ctk.CTk):
             return
 
         try:
-            self._open_property_details(vals)
+            self._open_property_details(vals, self._summary_ids.get(item_id))
         except Exception as e:
             from tkinter import messagebox
             messagebox.showerror("Xəta", f"Detalları açmaq mümkün olmadı:\n{e}", parent=self)
 
 
-    def _open_property_details(self, vals):
+    def _open_property_details(self, vals, summary_id=None):
         """Elan haqqında ətraflı məlumat (modern, tablı, loqolu versiya)"""
         import webbrowser
         from tkinter import ttk
@@ -1712,7 +1719,7 @@ class App(ctk.CTk):
             summary_frame, height=200, font=("Segoe UI", 12), wrap="word"
         )
         txt_summary.pack(fill="both", expand=True, padx=12, pady=(0, 10))
-        txt_summary.insert("1.0", str(val("summary")))
+        txt_summary.insert("1.0", str(get_summary_text(summary_id) or val("summary")))
         txt_summary.configure(state="disabled")
 
         # =========================
@@ -1735,7 +1742,7 @@ class App(ctk.CTk):
 
         try:
             phone = val("phone")
-            rows = get_listings_by_phone(normalize_phone(phone))
+            rows = get_listings_by_phone(phone)
 
             if not rows:
                 # 🩵 Boş nəticə — logo göstərin
@@ -1796,11 +1803,11 @@ class App(ctk.CTk):
                             r["contact_name"],
                             r["address"],
                             r["document"],
-                            r["summary"],
+                            r["summary_preview"],
                             r["source_link"],
                         ]
                         # 🔄 yeni pəncərə kimi özünü çağır
-                        self._open_property_details(vals_)
+                        self._open_property_details(vals_, r["summary_id"])
 
             tree.bind("<Double-1>", on_double_click_other)
         except Exception as e:
@@ -1964,7 +1971,7 @@ class App(ctk.CTk):
                         rget(r, "contact_name", "-"),
                         rget(r, "address", "-"),
                         rget(r, "document", "-"),
-                        rget(r, "summary", "-"),
+                        rget(r, "summary_preview", "-"),
                         rget(r, "source_link", "-"),
                     ),
                 )
@@ -2027,6 +2034,21 @@ class App(ctk.CTk):
         added = 0
         dupes = 0
         areas = {}
+        batch = []
+
+        def flush():
+            # Ərazi üzrə ayrıca yazılır — yalnız həqiqətən əlavə olunanlar sayılsın
+            nonlocal added, dupes
+            groups = {}
+            for rec in batch:
+                groups.setdefault(rec.get("city_district") or "-", []).append(rec)
+            for cd, recs in groups.items():
+                a, d = add_listings_bulk(recs)
+                added += a
+                dupes += d
+                if a:
+                    areas[cd] = areas.get(cd, 0) + a
+            batch.clear()
 
         for _, row in df.iterrows():
             rec = {}
@@ -2034,8 +2056,6 @@ class App(ctk.CTk):
                 val = row.get(df_cols.get(k_az, k_az), None)
                 if k_std in ("price", "area_kvm", "area_sot"):
                     rec[k_std] = _to_float(val)
-                elif k_std == "phone":
-                    rec[k_std] = normalize_phone(val)
                 else:
                     rec[k_std] = (
                         None
@@ -2043,21 +2063,19 @@ class App(ctk.CTk):
                         else str(val).strip()
                     )
 
-            ok = False
             if rec.get("phone"):
-                ok = add_listing_row(rec)
-                if ok:
-                    added += 1
-                    cd = rec.get("city_district") or "-"
-                    areas[cd] = areas.get(cd, 0) + 1
-                else:
-                    dupes += 1
+                batch.append(rec)
 
             done += 1
-            pct = 0 if total == 0 else (done / max(1, total))
-            bar.set(pct)
-            info.configure(text=f"{done} / {total}")
-            pop.update_idletasks()
+            if len(batch) >= 1000 or done == total:
+                flush()
+                pct = 0 if total == 0 else (done / max(1, total))
+                bar.set(pct)
+                info.configure(text=f"{done} / {total}")
+                pop.update_idletasks()
+
+        if batch:
+            flush()
 
         try:
             pop.destroy()
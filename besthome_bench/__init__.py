@@ -0,0 +1,25 @@
+"""besthome_core üçün sintetik baza generatoru və benchmark (Tk tələb etmir).
+
+    python -m besthome_bench generate --rows 1000000 --out bench_1m.db
+    python -m besthome_bench run --db bench_1m.db --out result.json
+    python -m besthome_bench compare old.json result.json
+
+EstateBase sinxronu SQL Server-siz (dbo.property sxemli SQLite mənbə ilə):
+
+    python -m besthome_bench source --rows 100k --out estatebase_100k.db
+    python -m besthome_bench sync --source estatebase_100k.db --db sync_100k.db --out sync.json
+"""
+
+from .dataset import generate_db, generate_records
+from .estatebase import generate_source_db, run_sync_bench
+from .suite import compare, run_suite, write_result
+
+__all__ = [
+    "generate_db",
+    "generate_records",
+    "generate_source_db",
+    "run_sync_bench",
+    "run_suite",
+    "write_result",
+    "compare",
+]
@@ -0,0 +1,64 @@
+import argparse
+
+from .dataset import generate_db
+from .estatebase import generate_source_db, run_sync_bench
+from .suite import compare, run_suite, write_result
+
+SIZES = {"100k": 100_000, "1m": 1_000_000, "5m": 5_000_000}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="besthome_bench", description="BestHome benchmark")
+    sub = parser.add_subparsers(dest="cmd", required=True)
+
+    p_gen = sub.add_parser("generate", help="sintetik besthome.db yarat")
+    p_gen.add_argument("--rows", default="100k", help="100k | 1m | 5m və ya ədəd")
+    p_gen.add_argument("--out", required=True, help="yeni baza faylı")
+    p_gen.add_argument("--seed", type=int, default=42)
+    p_gen.add_argument("--days", type=int, default=365, help="elanların yayıldığı gün sayı")
+
+    p_run = sub.add_parser("run", help="sorğuları ölç və JSON yaz")
+    p_run.add_argument("--db", required=True)
+    p_run.add_argument("--out", help="JSON nəticə faylı")
+    p_run.add_argument("--repeat", type=int, default=20)
+    p_run.add_argument("--inserts", type=int, default=200, help="add_listing_row sayı (0 — ölçmə)")
+    p_run.add_argument("--only", nargs="*", help="yalnız bu prefikslə başlayan hallar")
+
+    p_src = sub.add_parser("source", help="EstateBase (dbo.property) sxemli SQLite mənbə yarat")
+    p_src.add_argument("--rows", default="100k", help="100k | 1m | 5m və ya ədəd")
+    p_src.add_argument("--out", required=True, help="yeni mənbə faylı")
+    p_src.add_argument("--seed", type=int, default=42)
+    p_src.add_argument("--days", type=int, default=365)
+
+    p_sync = sub.add_parser("sync", help="SQLite mənbədən boş bazaya tam + inkremental sinxronu ölç")
+    p_sync.add_argument("--source", required=True, help="source əmrinin yaratdığı fayl")
+    p_sync.add_argument("--db", required=True, help="yeni (boş) besthome.db")
+    p_sync.add_argument("--out", help="JSON nəticə faylı")
+
+    p_cmp = sub.add_parser("compare", help="iki JSON nəticəni müqayisə et")
+    p_cmp.add_argument("base")
+    p_cmp.add_argument("new")
+    p_cmp.add_argument("--threshold", type=float, default=0.10)
+
+    args = parser.parse_args(argv)
+    if args.cmd == "generate":
+        rows = SIZES.get(str(args.rows).lower()) or int(args.rows)
+        generate_db(args.out, rows, seed=args.seed, days=args.days)
+    elif args.cmd == "run":
+        result = run_suite(args.db, repeat=args.repeat, inserts=args.inserts, only=args.only)
+        if args.out:
+            write_result(result, args.out)
+    elif args.cmd == "source":
+        rows = SIZES.get(str(args.rows).lower()) or int(args.rows)
+        generate_source_db(args.out, rows, seed=args.seed, days=args.days)
+    elif args.cmd == "sync":
+        result = run_sync_bench(args.source, args.db)
+        if args.out:
+            write_result(result, args.out)
+    elif args.cmd == "compare":
+        return 1 if compare(args.base, args.new, args.threshold) else 0
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,168 @@
+# ============================================
+# besthome_bench/dataset.py — Sintetik besthome.db generatoru
+# ============================================
+
+import random
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+
+import besthome_core as core
+
+METROS = (
+    "İçərişəhər", "Sahil", "28 May", "Gənclik", "Nəriman Nərimanov", "Bakmil",
+    "Ulduz", "Koroğlu", "Qara Qarayev", "Neftçilər", "Xalqlar Dostluğu",
+    "Əhmədli", "Həzi Aslanov", "Nizami", "Elmlər Akademiyası", "İnşaatçılar",
+    "20 Yanvar", "Memar Əcəmi", "Nəsimi", "Azadlıq prospekti", "Dərnəgül",
+    "Cəfər Cabbarlı", "Xətai", "Avtovağzal", "8 Noyabr",
+)
+DISTRICTS = (
+    "Nəsimi", "Yasamal", "Nərimanov", "Xətai", "Binəqədi", "Sabunçu",
+    "Suraxanı", "Nizami", "Xəzər", "Səbail", "Qaradağ", "Abşeron",
+)
+STREETS = (
+    "Həsən bəy Zərdabi", "Nizami", "Füzuli", "Azadlıq", "Ataturk", "Şərifzadə",
+    "Mirzə İbrahimov", "Cavadxan", "Qara Qarayev", "Babək", "Tbilisi", "Hüseyn Cavid",
+    "Zərifə Əliyeva", "Bakıxanov", "Səməd Vurğun", "Rəşid Behbudov",
+)
+PROP_TYPES = (
+    ("Yeni tikili", 45), ("Köhnə tikili", 25), ("Həyət evi", 12),
+    ("Ofis", 6), ("Obyekt", 6), ("Torpaq", 4), ("Qaraj", 2),
+)
+BUILDINGS = ("Monolit", "Kərpic", "Panel", "Daş", "Blok")
+DOCUMENTS = ("Kupça var", "Kupça yoxdur", "Müqavilə", "İpoteka mümkündür")
+NAMES = (
+    "Elvin", "Rəşad", "Aygün", "Nigar", "Tural", "Səbinə", "Orxan", "Günel",
+    "Kamran", "Leyla", "Fərid", "Ülviyyə", "Emin", "Aynur", "Vüsal", "Zəhra",
+)
+PHRASES = (
+    "Təmirli", "əşyalı", "metroya yaxın", "kupçalı", "ipoteka mümkündür",
+    "yeni təmir", "mərkəzi istilik", "kombi var", "dəniz mənzərəli",
+    "məktəb və bağça yaxınlığında", "tam əşyalı", "park yaxınlığında",
+    "təcili satılır", "sənədləri qaydasındadır", "qaz, su, işıq daimi",
+)
+PHONE_PREFIXES = ("050", "051", "055", "070", "077", "099", "010")
+
+# Rieltorlar: telefonların kiçik hissəsi elanların böyük hissəsini verir
+REALTOR_SHARE = 0.02
+REALTOR_ADS = 0.35
+
+
+def _weighted(rnd, items):
+    values, weights = zip(*items)
+    return rnd.choices(values, weights)[0]
+
+
+def _phone(rnd):
+    return f"{rnd.choice(PHONE_PREFIXES)}{rnd.randrange(10**7):07d}"
+
+
+def _price(rnd, operation, prop_type, rooms):
+    """Satış ~ log-normal (AZN), kirayə aylıq; otaq sayı və növə görə miqyaslanır."""
+    scale = {"Ofis": 1.4, "Obyekt": 1.8, "Torpaq": 0.8, "Qaraj": 0.15}.get(prop_type, 1.0)
+    if operation == "Satılır":
+        base = rnd.lognormvariate(11.3, 0.45) * (0.6 + 0.25 * rooms)
+    else:
+        base = rnd.lognormvariate(6.4, 0.4) * (0.7 + 0.2 * rooms)
+    return float(round(base * scale, -1 if base < 10_000 else -3))
+
+
+def generate_records(n, seed=42, days=365, start=None):
+    """n sintetik elan (LISTING_COLUMNS açarlı dict-lər) yaradan generator."""
+    rnd = random.Random(seed)
+    start = start or datetime(2025, 1, 1)
+    n_phones = max(10, n // 3)
+    n_realtors = max(1, int(n_phones * REALTOR_SHARE))
+    phones = list(dict.fromkeys(_phone(rnd) for _ in range(n_phones)))  # set sırası prosesdən asılıdır
+    realtors, owners = phones[:n_realtors], phones[n_realtors:]
+    names = {p: rnd.choice(NAMES) for p in realtors}
+    step = days * 86400 / max(n, 1)
+
+    for i in range(n):
+        if rnd.random() < REALTOR_ADS:
+            phone = rnd.choice(realtors)
+            contact = names[phone] + " (Rieltor)"
+        else:
+            phone = rnd.choice(owners)
+            contact = rnd.choice(NAMES)
+        prop_type = _weighted(rnd, PROP_TYPES)
+        operation = "Satılır" if rnd.random() < 0.7 else "Kirayə verilir"
+        rooms = min(6, max(1, int(rnd.gauss(2.6, 1.0))))
+        floor_total = rnd.choice((5, 9, 12, 16, 17, 20, 25))
+        floor_current = rnd.randint(1, floor_total)
+        area = round(max(20.0, rnd.gauss(30 + 25 * rooms, 12)))
+        created = start + timedelta(seconds=int(i * step + rnd.random() * step))
+        district = rnd.choice(DISTRICTS)
+        phrases = rnd.sample(PHRASES, rnd.randint(2, 4))
+        yield {
+            "date_read": created.strftime("%Y-%m-%d"),
+            "prop_type": prop_type,
+            "operation": operation,
+            "metro": rnd.choice(METROS) if rnd.random() < 0.85 else None,
+            "rooms": str(rooms),
+            "building": rnd.choice(BUILDINGS),
+            "floor": f"{floor_current}/{floor_total}",
+            "area_kvm": str(area),
+            "price": _price(rnd, operation, prop_type, rooms),
+            "currency": "AZN",
+            "phone": phone,
+            "contact_name": contact,
+            "address": f"{district} r., {rnd.choice(STREETS)} küç., {rnd.randint(1, 220)}",
+            "document": rnd.choice(DOCUMENTS),
+            "summary": f"{rooms} otaqlı {prop_type.lower()}, {area} kv.m. " + ", ".join(phrases) + ".",
+            "source_link": f"https://bench.besthome.az/elan/{seed}/{i}",
+            "created_at": created.strftime("%Y-%m-%d %H:%M:%S"),
+        }
+
+
+def generate_db(path, rows, seed=42, days=365, sold_share=0.01, fav_share=0.005):
+    """Yeni besthome.db yaradır: sxem, rows elan, satılan/fərqləndirilən telefonlar.
+
+    Sürət üçün trigger-lər yazı zamanı söndürülür və törəmə strukturlar
+    (phone_summary, FTS, statistika) sonda bir dəfə qurulur.
+    """
+    path = Path(path)
+    if path.exists():
+        raise FileExistsError(f"{path} artıq var")
+    t0 = time.perf_counter()
+    core.DB_PATH = path
+    core.migrate()
+    db = core.get_db()
+    rnd = random.Random(seed + 1)
+    with db.write() as conn:
+        triggers = [r[0] for r in conn.execute("SELECT name FROM sqlite_master WHERE type = 'trigger'")]
+        for trg in triggers:
+            conn.execute(f"DROP TRIGGER {trg}")
+        chunk = []
+        phones = {}  # dict — ilk görünmə sırası (set sırası prosesdən asılıdır)
+        new_ids = {}
+        for rec in generate_records(rows, seed=seed, days=days):
+            chunk.append(core._encode_params(conn, core._listing_params(rec), db.lookup_ids, new_ids))
+            phones[rec["phone"]] = None
+            if len(chunk) >= core.BULK_CHUNK:
+                conn.executemany(core._INSERT_LISTING_SQL, chunk)
+                chunk.clear()
+        if chunk:
+            conn.executemany(core._INSERT_LISTING_SQL, chunk)
+        t_ins = time.perf_counter() - t0
+        print(f"✍️ {rows} elan yazıldı ({t_ins:.1f} san)")
+
+        for name, build in core._DERIVED.items():
+            t1 = time.perf_counter()
+            build(conn)
+            print(f"🛠️ {name} quruldu ({time.perf_counter() - t1:.1f} san)")
+
+        phones = list(phones)
+        conn.executemany(
+            "INSERT OR IGNORE INTO sold (phone_id) SELECT id FROM phones WHERE phone = ?",
+            [(p,) for p in rnd.sample(phones, int(len(phones) * sold_share))],
+        )
+        conn.executemany(
+            "INSERT OR IGNORE INTO favorites (phone_id, color) SELECT id, ? FROM phones WHERE phone = ?",
+            [("#e8f2ff", p) for p in rnd.sample(phones, int(len(phones) * fav_share))],
+        )
+    with db.write() as conn:
+        conn.execute("ANALYZE")
+    core.close_db()
+    print(f"✅ {path} hazırdır ({time.perf_counter() - t0:.1f} san)")
+    return path
@@ -0,0 +1,194 @@
+# ============================================
+# besthome_bench/estatebase.py — EstateBase (dbo.property) SQLite stand-in və sinxron ölçüsü
+# ============================================
+
+import platform
+import queue
+import random
+import sqlite3
+import time
+from datetime import datetime
+from pathlib import Path
+
+import besthome_core as core
+import estatebase_sync
+
+from .dataset import BUILDINGS, DOCUMENTS, METROS, PHRASES, PROP_TYPES, generate_records
+
+# SQL Server sxeminin sinxronun oxuduğu hissəsi (tiplər SQLite yaxınlığı ilə)
+SOURCE_SCHEMA = """
+CREATE TABLE property_type (id_property_type INTEGER PRIMARY KEY, property_type_name TEXT);
+CREATE TABLE building_type (id_building_type INTEGER PRIMARY KEY, building_type_name TEXT);
+CREATE TABLE operation_type (id_operation_type INTEGER PRIMARY KEY, operation_type_name TEXT);
+CREATE TABLE currency (id_currency INTEGER PRIMARY KEY, currency_name TEXT);
+CREATE TABLE document (id_document INTEGER PRIMARY KEY, document_name TEXT);
+CREATE TABLE metro (id_metro INTEGER PRIMARY KEY, metro_name TEXT);
+CREATE TABLE room_count (id_room_count INTEGER PRIMARY KEY, room_count_name TEXT);
+CREATE TABLE property (
+    id_property INTEGER PRIMARY KEY,
+    insert_date_time TEXT NOT NULL,
+    fk_id_property_type INTEGER,
+    fk_id_building_type INTEGER,
+    fk_id_operation_type INTEGER,
+    fk_id_currency INTEGER,
+    fk_id_document INTEGER,
+    fk_id_metro INTEGER,
+    fk_id_room INTEGER,
+    floor INTEGER,
+    floor_of INTEGER,
+    area REAL,
+    general_area REAL,
+    price NUMERIC,
+    owner_phone_number_01 TEXT,
+    owner_phone_number_02 TEXT,
+    owner_full_name TEXT,
+    address TEXT,
+    data TEXT,
+    source_note TEXT
+);
+CREATE INDEX ix_property_insert_date_time ON property(insert_date_time, id_property);
+"""
+
+LOOKUPS = {
+    "property_type": [name for name, _ in PROP_TYPES],
+    "building_type": list(BUILDINGS),
+    "operation_type": ["Satılır", "Kirayə verilir"],
+    "currency": ["AZN", "USD"],
+    "document": list(DOCUMENTS),
+    "metro": list(METROS),
+    "room_count": [str(i) for i in range(1, 7)],
+}
+
+# Eyni elanın təkrar yerləşdirilməsi (sinxronun dublikat yolunu işlədir)
+REPOST_SHARE = 0.05
+# Telefonsuz sətirlər (sinxron atlayır)
+NO_PHONE_SHARE = 0.01
+
+
+def generate_source_db(path, rows, seed=42, days=365):
+    """dbo.property sxemli SQLite faylı yaradır — SqliteSource üçün.
+
+    Elanlar dataset.generate_records-dan gəlir (eyni paylanmalar); p.data
+    real mənbədəki kimi uzun mətndir, bir hissə təkrar və telefonsuzdur.
+    """
+    path = Path(path)
+    if path.exists():
+        raise FileExistsError(f"{path} artıq var")
+    t0 = time.perf_counter()
+    rnd = random.Random(seed + 2)
+    conn = sqlite3.connect(path)
+    conn.executescript(SOURCE_SCHEMA)
+    ids = {}
+    for table, names in LOOKUPS.items():
+        conn.executemany(f"INSERT INTO {table} VALUES (?, ?)", list(enumerate(names, start=1)))
+        ids[table] = {name: i for i, name in enumerate(names, start=1)}
+
+    def ref(table, value):
+        return ids[table].get(value)
+
+    chunk = []
+    recent = []
+    for i, rec in enumerate(generate_records(rows, seed=seed, days=days), start=1):
+        if recent and rnd.random() < REPOST_SHARE:
+            # Əvvəlki elan yeni vaxtla: telefon + qiymət + link eyni
+            prev = rnd.choice(recent)
+            chunk.append((i, rec["created_at"]) + prev[2:])
+        else:
+            floor_current, floor_total = (int(x) for x in rec["floor"].split("/"))
+            land = rec["prop_type"] in ("Həyət evi", "Torpaq")
+            phone = None if rnd.random() < NO_PHONE_SHARE else rec["phone"]
+            text = f"{rec['summary']} {' '.join(rnd.sample(PHRASES, 6)).capitalize()}. " * rnd.randint(1, 4)
+            row = (
+                i,
+                rec["created_at"],
+                ref("property_type", rec["prop_type"]),
+                ref("building_type", rec["building"]),
+                ref("operation_type", rec["operation"]),
+                ref("currency", rec["currency"]),
+                ref("document", rec["document"]),
+                ref("metro", rec["metro"]),
+                ref("room_count", rec["rooms"]),
+                floor_current,
+                floor_total,
+                round(rnd.uniform(1, 12), 1) if land else None,
+                float(rec["area_kvm"]),
+                rec["price"],
+                phone,
+                f"0{rnd.choice((50, 51, 55, 70, 77))}{rnd.randrange(10**7):07d}" if rnd.random() < 0.1 else None,
+                rec["contact_name"],
+                rec["address"],
+                text.strip(),
+                rec["source_link"],
+            )
+            chunk.append(row)
+            recent.append(row)
+            if len(recent) > 500:
+                recent.pop(0)
+        if len(chunk) >= 10_000:
+            conn.executemany(f"INSERT INTO property VALUES ({', '.join('?' * 20)})", chunk)
+            chunk.clear()
+    if chunk:
+        conn.executemany(f"INSERT INTO property VALUES ({', '.join('?' * 20)})", chunk)
+    conn.commit()
+    conn.execute("ANALYZE")
+    conn.close()
+    print(f"✅ {path} hazırdır: {rows} sətir ({time.perf_counter() - t0:.1f} san)")
+    return path
+
+
+def _sync_case(source_path, **kwargs):
+    """Bir sinxron; nəticə suite._timed formasında (tək ölçü)."""
+    events = queue.Queue()
+    t0 = time.perf_counter()
+    estatebase_sync.sync_with_progress(
+        None, None, None, events, source=estatebase_sync.SqliteSource(source_path), **kwargs
+    )
+    ms = (time.perf_counter() - t0) * 1000
+    ev = estatebase_sync.drain_events(events)
+    if ev["type"] == "error":
+        raise RuntimeError(ev["message"])
+    return {
+        "repeat": 1,
+        "rows": ev.get("fetched", 0),
+        "added": ev.get("added", 0),
+        "skipped": ev.get("skipped", 0),
+        "rows_per_s": ev.get("rate", 0.0),
+        "min_ms": ms,
+        "median_ms": ms,
+        "p95_ms": ms,
+        "max_ms": ms,
+    }
+
+
+def run_sync_bench(source_path, db_path):
+    """Boş besthome.db-yə tam sinxron, sonra dəyişiklik olmadan inkremental sinxron.
+
+    Nəticə run_suite ilə eyni JSON formasındadır (compare ilə müqayisə olunur).
+    """
+    db_path = Path(db_path)
+    if db_path.exists():
+        raise FileExistsError(f"{db_path} artıq var — tam sinxron boş baza tələb edir")
+    core.DB_PATH = db_path
+    core.migrate()
+    result = {
+        "meta": {
+            "db": str(db_path),
+            "source": str(source_path),
+            "schema_version": core.SCHEMA_VERSION,
+            "sqlite": sqlite3.sqlite_version,
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "started_at": datetime.now().isoformat(timespec="seconds"),
+            "write_batch": estatebase_sync.WRITE_BATCH,
+            "fetch_batch": estatebase_sync.FETCH_BATCH,
+        },
+        "cases": {},
+    }
+    for name, kwargs in (("sync/full", {}), ("sync/incremental_noop", {"incremental": True})):
+        res = result["cases"][name] = _sync_case(source_path, **kwargs)
+        print(
+            f"⏱️ {name:<28} {res['median_ms'] / 1000:8.2f} san   {res['rows_per_s']:8.0f} sətir/san"
+            f"   +{res['added']} ♻️ {res['skipped']}"
+        )
+    core.close_db()
+    return result
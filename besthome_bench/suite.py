@@ -0,0 +1,191 @@
+# ============================================
+# besthome_bench/suite.py — besthome_core sorğularının ölçülməsi
+# ============================================
+
+import json
+import platform
+import random
+import sqlite3
+import statistics
+import time
+from datetime import datetime
+from pathlib import Path
+
+import besthome_core as core
+
+
+def _clear_caches():
+    with core._distinct_lock:
+        core._distinct_cache.clear()
+    with core._phone_cache_lock:
+        core._phone_cache.clear()
+
+
+def _timed(fn, repeat, cold=True):
+    """fn-i repeat dəfə icra edir; cold=True — hər dəfə keşlər təmizlənir."""
+    times = []
+    rows = None
+    for _ in range(repeat):
+        if cold:
+            _clear_caches()
+        t0 = time.perf_counter()
+        result = fn()
+        times.append(time.perf_counter() - t0)
+        if rows is None and hasattr(result, "__len__"):
+            rows = len(result)
+    times.sort()
+    return {
+        "repeat": repeat,
+        "rows": rows,
+        "min_ms": times[0] * 1000,
+        "median_ms": statistics.median(times) * 1000,
+        "p95_ms": times[min(len(times) - 1, int(len(times) * 0.95))] * 1000,
+        "max_ms": times[-1] * 1000,
+    }
+
+
+def _cases(conn, rnd):
+    """(ad, funksiya, cold) siyahısı — bazadakı real dəyərlərdən qurulur."""
+    phones = [r[0] for r in conn.execute("SELECT phone FROM phone_summary ORDER BY random() LIMIT 50")]
+    realtor = conn.execute("SELECT phone FROM phone_summary ORDER BY ad_count DESC LIMIT 1").fetchone()[0]
+    day = conn.execute("SELECT MAX(created_at) FROM listings").fetchone()[0][:10]
+    week_ago = (datetime.strptime(day, "%Y-%m-%d").date().toordinal() - 6)
+    week_ago = datetime.fromordinal(week_ago).strftime("%Y-%m-%d")
+    q = core.query_phones_summary
+
+    cases = [
+        ("query/default", lambda: q(limit=500), True),
+        ("query/page2", lambda: q(limit=500, cursor=core.page_cursor(q(limit=500), 500)), True),
+        ("query/keyword_common", lambda: q(keyword="təmirli", limit=500), True),
+        ("query/keyword_metro", lambda: q(keyword="Gənclik", limit=500), True),
+        ("query/keyword_phone", lambda: q(keyword=rnd.choice(phones)[1:7], limit=500), True),
+        ("query/date_day", lambda: q(date_from=day, date_to=day, limit=500), True),
+        ("query/date_week", lambda: q(date_from=week_ago, date_to=day, limit=500), True),
+        ("query/exclude_sold", lambda: q(exclude_sold=True, limit=500), True),
+        ("query/only_sold", lambda: q(only_sold=True, limit=500), True),
+        ("query/only_favorites", lambda: q(only_favorites=True, limit=500), True),
+        (
+            "query/filters_combined",
+            lambda: q(
+                operations={"Satılır"},
+                rooms={"2", "3"},
+                price_min=80_000,
+                price_max=200_000,
+                metros={"Nizami", "28 May", "Gənclik"},
+                limit=500,
+            ),
+            True,
+        ),
+        (
+            "query/keyword_date_sold",
+            lambda: q(keyword="metro", date_from=week_ago, date_to=day, exclude_sold=True, limit=500),
+            True,
+        ),
+    ]
+    for col in core.DISTINCT_COLUMNS:
+        cases.append((f"distinct/{col}", lambda col=col: core.get_distinct_values(col), True))
+    cases.append(("distinct/metro_cached", lambda: core.get_distinct_values("metro"), False))
+    cases += [
+        ("phone_stats", lambda: core.phone_stats(rnd.choice(phones)), True),
+        ("phone_stats/realtor", lambda: core.phone_stats(realtor), True),
+        ("listings_by_phone", lambda: core.get_listings_by_phone(rnd.choice(phones)), True),
+        ("listings_by_phone/realtor", lambda: core.get_listings_by_phone(realtor), True),
+        ("phone_stats_many/50", lambda: core.phone_stats_many(phones), True),
+        ("listing_stats", lambda: core.get_listing_stats(), True),
+    ]
+    return cases
+
+
+def _bench_inserts(n, seed):
+    """add_listing_row n dəfə; sonda əlavə olunan sətirlər silinir (baza dəyişmir)."""
+    rnd = random.Random(seed)
+    tag = f"https://bench.besthome.az/insert/{time.time_ns()}/"
+    times = []
+    for i in range(n):
+        rec = {
+            "date_read": datetime.now().strftime("%Y-%m-%d"),
+            "prop_type": "Yeni tikili",
+            "operation": "Satılır",
+            "metro": "Nizami",
+            "rooms": "2",
+            "floor": "5/12",
+            "area_kvm": "70",
+            "price": float(rnd.randrange(50_000, 300_000)),
+            "phone": f"0559{rnd.randrange(10**6):06d}",
+            "summary": "Bench elanı, təmirli",
+            "source_link": f"{tag}{i}",
+        }
+        t0 = time.perf_counter()
+        core.add_listing_row(rec)
+        times.append(time.perf_counter() - t0)
+    with core.get_db().write() as conn:
+        conn.execute(f"DELETE FROM {core.LISTINGS_TABLE} WHERE source_link LIKE ?", (tag + "%",))
+    times.sort()
+    return {
+        "repeat": n,
+        "rows": 1,
+        "min_ms": times[0] * 1000,
+        "median_ms": statistics.median(times) * 1000,
+        "p95_ms": times[min(n - 1, int(n * 0.95))] * 1000,
+        "max_ms": times[-1] * 1000,
+    }
+
+
+def run_suite(db_path, repeat=20, inserts=200, seed=7, only=None):
+    """Bütün halları ölçür və nəticəni dict kimi qaytarır (JSON-a yazmaq üçün)."""
+    core.DB_PATH = Path(db_path)
+    core.migrate()
+    conn = core.get_db().read()
+    rnd = random.Random(seed)
+    result = {
+        "meta": {
+            "db": str(db_path),
+            "listings": conn.execute("SELECT value FROM listing_stats WHERE name = 'total'").fetchone()[0],
+            "phones": conn.execute("SELECT COUNT(*) FROM phone_summary").fetchone()[0],
+            "schema_version": core.SCHEMA_VERSION,
+            "sqlite": sqlite3.sqlite_version,
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "started_at": datetime.now().isoformat(timespec="seconds"),
+            "repeat": repeat,
+            "seed": seed,
+        },
+        "cases": {},
+    }
+    for name, fn, cold in _cases(conn, rnd):
+        if only and not any(name.startswith(o) for o in only):
+            continue
+        fn()  # isinmə: səhifə keşi və hazırlanmış ifadələr
+        res = result["cases"][name] = _timed(fn, repeat, cold)
+        print(f"⏱️ {name:<28} median {res['median_ms']:8.2f} ms   p95 {res['p95_ms']:8.2f} ms")
+    if inserts and (not only or any("add_listing_row".startswith(o) for o in only)):
+        res = result["cases"]["add_listing_row"] = _bench_inserts(inserts, seed)
+        print(f"⏱️ {'add_listing_row':<28} median {res['median_ms']:8.2f} ms   p95 {res['p95_ms']:8.2f} ms")
+    core.close_db()
+    return result
+
+
+def write_result(result, out):
+    Path(out).write_text(json.dumps(result, ensure_ascii=False, indent=2), encoding="utf-8")
+    print(f"💾 Nəticə yazıldı: {out}")
+
+
+def compare(base_path, new_path, threshold=0.10):
+    """İki JSON nəticəsini median üzrə müqayisə edir; pisləşən halların sayını qaytarır."""
+    base = json.loads(Path(base_path).read_text(encoding="utf-8"))["cases"]
+    new = json.loads(Path(new_path).read_text(encoding="utf-8"))["cases"]
+    worse = 0
+    print(f"{'hal':<28}{'əvvəl ms':>12}{'indi ms':>12}{'fərq':>9}")
+    for name in sorted(set(base) | set(new)):
+        if name not in base or name not in new:
+            a = f"{base[name]['median_ms']:.2f}" if name in base else "—"
+            b = f"{new[name]['median_ms']:.2f}" if name in new else "—"
+            print(f"{name:<28}{a:>12}{b:>12}")
+            continue
+        a = base[name]["median_ms"]
+        b = new[name]["median_ms"]
+        change = (b - a) / a if a else 0.0
+        mark = "⚠️" if change > threshold else ("✅" if change < -threshold else "")
+        worse += change > threshold
+        print(f"{name:<28}{a:>12.2f}{b:>12.2f}{change:>+9.0%} {mark}")
+    return worse
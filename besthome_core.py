@@ -1,294 +1,2924 @@
-# ============================================
-# besthome_core.py — Database və Query modulu (Stable Final)
-# ============================================
-
-import sqlite3
-from pathlib import Path
-from datetime import datetime, date
-
-DB_PATH = Path("besthome.db")
-
-# ---------- DB Setup ----------
-def init_db():
-    conn = sqlite3.connect(DB_PATH)
-    c = conn.cursor()
-    c.execute("""
-        CREATE TABLE IF NOT EXISTS listings (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            date_read TEXT,
-            prop_type TEXT,
-            operation TEXT,
-            metro TEXT,
-            rooms TEXT,
-            building TEXT,
-            floor TEXT,
-            area_kvm TEXT,
-            price REAL,
-            currency TEXT,
-            phone TEXT,
-            contact_name TEXT,
-            address TEXT,
-            document TEXT,
-            summary TEXT,
-            source_link TEXT,
-            created_at TEXT DEFAULT CURRENT_TIMESTAMP
-        )
-    """)
-    c.execute("""
-        CREATE TABLE IF NOT EXISTS sold (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            phone TEXT UNIQUE
-        )
-    """)
-    c.execute("""
-        CREATE TABLE IF NOT EXISTS favorites (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            phone TEXT UNIQUE,
-            color TEXT
-        )
-    """)
-    conn.commit()
-    conn.close()
-
-
-def ensure_tables():
-    """Baza yoxdursa yaradır, varsa toxunmur"""
-    conn = sqlite3.connect(DB_PATH)
-    cur = conn.cursor()
-
-    required_cols = {
-        "listings": {
-            "sql_id": "INTEGER",
-            "source_link": "TEXT",
-        },
-    }
-
-    for table, cols in required_cols.items():
-        for col, col_type in cols.items():
-            try:
-                cur.execute(f"ALTER TABLE {table} ADD COLUMN {col} {col_type};")
-                print(f"✅ '{col}' sütunu əlavə edildi ({table})")
-            except Exception as e:
-                if "duplicate column name" in str(e).lower():
-                    pass  # artıq var
-                else:
-                    print(f"⚠️ '{col}' əlavə edilə bilmədi: {e}")
-
-    conn.commit()
-    conn.close()
-
-
-# ---------- Əlavə və təmizlik ----------
-def clear_search_history():
-    conn = sqlite3.connect(DB_PATH)
-    conn.execute("DELETE FROM search_history")
-    conn.commit()
-    conn.close()
-
-
-def add_listing_row(rec):
-    """Yeni elan əlavə et (təkrarlanmaya qarşı yoxlama ilə)"""
-    if not rec.get("phone"):
-        return False
-
-    conn = sqlite3.connect(DB_PATH)
-    c = conn.cursor()
-
+# ============================================
+# besthome_core.py — Database və Query modulu (Stable Final)
+# ============================================
+
+import base64
+import functools
+import hashlib
+import json
+import logging
+import logging.handlers
+import re
+import sqlite3
+import threading
+import time
+import zlib
+from collections import OrderedDict, deque
+from contextlib import contextmanager
+from pathlib import Path
+from datetime import datetime, date, timedelta
+
+DB_PATH = Path("besthome.db")
+
+# SQLite kilidini gözləmə müddəti (saniyə)
+BUSY_TIMEOUT = 30.0
+
+# Oxuyucular default olaraq read-only (mode=ro, query_only) bağlantıdır;
+# read(readonly=False) ilə çağırış yerində dəyişmək olar
+READ_ONLY_READERS = True
+
+
+# ---------- Bağlantı meneceri ----------
+class ConnectionManager:
+    """Bir uzunömürlü yazıcı bağlantı + hər axın (thread) üçün ayrıca oxuyucu.
+
+    WAL rejimində oxuyucular yazıcını bloklamır, yazıcı da oxuyucuları.
+    Yazılar bir kilid altında ardıcıl gedir, ona görə sinxron axını və
+    Tk əsas axını eyni anda işləyə bilər ("database is locked" olmadan).
+    Read-only oxuyucu heç vaxt yazı kilidi istəmir və yalnız commit
+    olunmuş tranzaksiyaları görür (WAL snapshot).
+    """
+
+    def __init__(self, path, busy_timeout=BUSY_TIMEOUT):
+        self.path = Path(path)
+        self.busy_timeout = busy_timeout
+        self._write_lock = threading.RLock()
+        self._writer = None
+        self._local = threading.local()
+        self._readers = {}  # (thread ident, readonly) -> connection
+        self._readers_lock = threading.Lock()
+        # Uğurlu yazı tranzaksiyalarının sayğacı — keşlər bununla köhnəlir
+        self.generation = 0
+        # Başqa bağlantı/proses yazılarının sayğacı (PRAGMA data_version ilə, bax version())
+        self._external = 0
+        self._data_versions = {}  # oxuyucu bağlantı -> son görülən data_version
+        # (sütun, dəyər) -> lookup_values.id (yalnız commit olunmuş id-lər)
+        self.lookup_ids = {}
+
+    def _connect(self, readonly=False):
+        target = self.path
+        if readonly:
+            target = f"{self.path.resolve().as_uri()}?mode=ro"
+        conn = sqlite3.connect(
+            target,
+            timeout=self.busy_timeout,
+            isolation_level=None,  # tranzaksiyaları özümüz idarə edirik
+            check_same_thread=False,
+            uri=readonly,
+        )
+        conn.execute(f"PRAGMA busy_timeout={int(self.busy_timeout * 1000)}")
+        if readonly:
+            conn.execute("PRAGMA query_only=1")
+        else:
+            # Yalnız yeni (boş) bazada təsir edir; köhnələr üçün bir dəfə vacuum_database()
+            conn.execute("PRAGMA auto_vacuum=INCREMENTAL")
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+        # summary_texts.body üçün (trigger-lər və FTS rebuild istifadə edir)
+        conn.create_function("unzip_text", 1, _unzip_text, deterministic=True)
+        # Köhnə mətn telefonlarının phones-a köçürülməsi (v13, arxiv)
+        conn.create_function("normalize_phone", 1, normalize_phone, deterministic=True)
+        if PROFILE_ENABLED:
+            conn.set_trace_callback(_trace_sql)
+        return conn
+
+    def connections(self):
+        """Hazırda açıq bütün bağlantılar (yazıcı + oxuyucular)."""
+        with self._readers_lock:
+            conns = list(self._readers.values())
+        if self._writer is not None:
+            conns.append(self._writer)
+        return conns
+
+    @contextmanager
+    def write(self):
+        """Yazıcı bağlantını tranzaksiya daxilində verir (iç-içə çağırış olar)."""
+        with self._write_lock:
+            if self._writer is None:
+                self._writer = self._connect()
+            conn = self._writer
+            if conn.in_transaction:
+                # Xarici tranzaksiyanın içindəyik — commit onun işidir
+                yield conn
+                return
+            before = conn.total_changes
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                yield conn
+            except BaseException:
+                conn.rollback()
+                raise
+            else:
+                conn.commit()
+                if conn.total_changes != before:
+                    self.generation += 1
+
+    def read(self, readonly=None):
+        """Cari axının oxuyucu bağlantısı (ilk çağırışda açılır).
+
+        readonly=None — READ_ONLY_READERS; False — adi (yaza bilən) bağlantı.
+        """
+        if readonly is None:
+            readonly = READ_ONLY_READERS
+        slot = "ro" if readonly else "rw"
+        conn = getattr(self._local, slot, None)
+        if conn is None:
+            conn = self._connect(readonly)
+            setattr(self._local, slot, conn)
+            with self._readers_lock:
+                alive = {t.ident for t in threading.enumerate()}
+                for key in [k for k in self._readers if k[0] not in alive]:
+                    dead = self._readers.pop(key)
+                    self._data_versions.pop(dead, None)
+                    try:
+                        dead.close()
+                    except Exception:
+                        pass
+                self._readers[(threading.get_ident(), readonly)] = conn
+        return conn
+
+    def version(self):
+        """Keş açarı: (generation, xarici yazı sayğacı).
+
+        generation yalnız bu prosesin yazıcısını sayır; CLI sinxronu və ya ikinci
+        app nüsxəsinin yazıları cari axının oxuyucusunda PRAGMA data_version-u
+        dəyişir. data_version yalnız eyni bağlantı daxilində müqayisə olunur —
+        ona görə hər oxuyucunun son dəyəri saxlanır, dəyişəndə (və ya bağlantı
+        ilk dəfə görüləndə) ortaq sayğac artır.
+        """
+        conn = self.read()
+        dv = conn.execute("PRAGMA data_version").fetchone()[0]
+        with self._readers_lock:
+            if self._data_versions.get(conn) != dv:
+                self._data_versions[conn] = dv
+                self._external += 1
+            return (self.generation, self._external)
+
+    @contextmanager
+    def snapshot(self, readonly=None):
+        """Bir neçə SELECT-i eyni WAL snapshot-unda icra etmək üçün oxuyucu."""
+        conn = self.read(readonly)
+        if conn.in_transaction:
+            yield conn
+            return
+        conn.execute("BEGIN")
+        try:
+            yield conn
+        finally:
+            conn.execute("COMMIT")
+
+    def close(self):
+        with self._write_lock:
+            if self._writer is not None:
+                self._writer.close()
+                self._writer = None
+        with self._readers_lock:
+            for conn in self._readers.values():
+                try:
+                    conn.close()
+                except Exception:
+                    pass
+            self._readers.clear()
+            self._data_versions.clear()
+        self._local = threading.local()
+
+
+_manager = None
+_manager_lock = threading.Lock()
+
+
+def get_db():
+    """DB_PATH üçün ortaq ConnectionManager (DB_PATH dəyişsə yenisi açılır)."""
+    global _manager
+    with _manager_lock:
+        if _manager is None or _manager.path != Path(DB_PATH):
+            if _manager is not None:
+                _manager.close()
+            _manager = ConnectionManager(DB_PATH)
+        return _manager
+
+
+def close_db():
+    """Bütün bağlantıları bağlayır (proqramdan çıxarkən)."""
+    global _manager
+    with _manager_lock:
+        if _manager is not None:
+            _manager.close()
+            _manager = None
+
+
+# ---------- Sorğu profilləşdirməsi ----------
+# Default söndürülüb: @_profiled yalnız bir bayraq yoxlayır, trace callback
+# bağlantılara yalnız enable_profiling() zamanı qoşulur.
+PROFILE_ENABLED = False
+SLOW_QUERY_MS = 250.0
+SLOW_LOG_PATH = Path("besthome_slow.log")
+# Faizlər (p50/p95) üçün hər funksiyanın son N ölçüsü saxlanılır
+PROFILE_WINDOW = 1000
+# Bir çağırışda yadda saxlanan SQL sayı (executemany hər sətri ayrıca izləyir)
+PROFILE_MAX_STMTS = 50
+
+_profile = {}  # funksiya adı -> {"calls", "rows", "total", "times": deque}
+_profile_lock = threading.Lock()
+_profile_local = threading.local()
+_slow_logger = None
+
+_SHAPE_LITERALS = re.compile(r"'(?:[^']|'')*'|\b\d+(?:\.\d+)?\b")
+
+
+def _trace_sql(sql):
+    stmts = getattr(_profile_local, "stmts", None)
+    # trigger gövdələri "-- TRIGGER ..." kimi gəlir
+    if stmts is not None and len(stmts) < PROFILE_MAX_STMTS and not sql.startswith("--"):
+        stmts.append(sql)
+
+
+def sql_shape(sql):
+    """SQL-in forması: literal dəyərlər ? ilə əvəzlənir, boşluqlar sıxılır."""
+    return " ".join(_SHAPE_LITERALS.sub("?", sql).split())
+
+
+def _get_slow_logger():
+    global _slow_logger
+    if _slow_logger is None:
+        _slow_logger = logging.getLogger("besthome.slow_queries")
+        _slow_logger.propagate = False
+        _slow_logger.setLevel(logging.INFO)
+    if not _slow_logger.handlers:
+        handler = logging.handlers.RotatingFileHandler(
+            SLOW_LOG_PATH, maxBytes=1_000_000, backupCount=3, encoding="utf-8"
+        )
+        handler.setFormatter(logging.Formatter("%(asctime)s %(message)s"))
+        _slow_logger.addHandler(handler)
+    return _slow_logger
+
+
+def _log_slow(name, ms, rows, stmts):
+    lines = [f"🐢 {name}: {ms:.1f} ms, sətir: {rows if rows is not None else '-'}"]
+    conn = get_db().read()
+    shapes = {}
+    for sql in stmts:
+        shapes.setdefault(sql_shape(sql), sql)
+    for shape, sql in shapes.items():
+        lines.append(f"  SQL: {shape}")
+        if not sql.lstrip().upper().startswith(("SELECT", "WITH")):
+            continue
+        try:
+            plan = conn.execute(f"EXPLAIN QUERY PLAN {sql}").fetchall()
+            lines.extend(f"    PLAN: {row[-1]}" for row in plan)
+        except sqlite3.Error as e:
+            lines.append(f"    PLAN: ({e})")
+    _get_slow_logger().info("\n".join(lines))
+
+
+def _profiled(fn):
+    """besthome_core sorğu funksiyalarının vaxtını və sətir sayını ölçür (opt-in)."""
+
+    @functools.wraps(fn)
+    def wrapper(*args, **kwargs):
+        if not PROFILE_ENABLED:
+            return fn(*args, **kwargs)
+        outer = getattr(_profile_local, "stmts", None)
+        stmts = _profile_local.stmts = []
+        t0 = time.perf_counter()
+        try:
+            result = fn(*args, **kwargs)
+        finally:
+            elapsed = time.perf_counter() - t0
+            _profile_local.stmts = outer
+            if outer is not None:
+                outer.extend(stmts)
+        rows = len(result) if isinstance(result, (list, tuple, dict, set)) else None
+        with _profile_lock:
+            entry = _profile.setdefault(
+                fn.__name__,
+                {"calls": 0, "rows": 0, "total": 0.0, "times": deque(maxlen=PROFILE_WINDOW)},
+            )
+            entry["calls"] += 1
+            entry["rows"] += rows or 0
+            entry["total"] += elapsed
+            entry["times"].append(elapsed)
+        if elapsed * 1000 >= SLOW_QUERY_MS:
+            try:
+                _log_slow(fn.__name__, elapsed * 1000, rows, stmts)
+            except Exception as e:
+                print(f"[⚠️ Slow log] {e}")
+        return result
+
+    return wrapper
+
+
+def enable_profiling(slow_ms=None, log_path=None):
+    """Profilləşdirməni yandırır; slow_ms-dən uzun sorğular log faylına yazılır."""
+    global PROFILE_ENABLED, SLOW_QUERY_MS, SLOW_LOG_PATH
+    if slow_ms is not None:
+        SLOW_QUERY_MS = float(slow_ms)
+    if log_path is not None and Path(log_path) != SLOW_LOG_PATH:
+        SLOW_LOG_PATH = Path(log_path)
+        if _slow_logger is not None:
+            for h in list(_slow_logger.handlers):
+                _slow_logger.removeHandler(h)
+                h.close()
+    PROFILE_ENABLED = True
+    for conn in get_db().connections():
+        conn.set_trace_callback(_trace_sql)
+
+
+def disable_profiling():
+    global PROFILE_ENABLED
+    PROFILE_ENABLED = False
+    for conn in get_db().connections():
+        conn.set_trace_callback(None)
+
+
+def reset_profile():
+    with _profile_lock:
+        _profile.clear()
+
+
+def profile_stats():
+    """Funksiya üzrə yığım: calls, rows, total_ms, p50_ms, p95_ms, max_ms."""
+    out = {}
+    with _profile_lock:
+        items = [(name, dict(e, times=sorted(e["times"]))) for name, e in _profile.items()]
+    for name, e in items:
+        times = e["times"]
+        out[name] = {
+            "calls": e["calls"],
+            "rows": e["rows"],
+            "total_ms": e["total"] * 1000,
+            "p50_ms": times[len(times) // 2] * 1000,
+            "p95_ms": times[min(len(times) - 1, int(len(times) * 0.95))] * 1000,
+            "max_ms": times[-1] * 1000,
+        }
+    return out
+
+
+# ---------- DB Setup ----------
+def init_db():
+    """Bazanı yaradır və son sxem versiyasına qədər yeniləyir."""
+    migrate()
+
+
+def ensure_tables():
+    """Baza yoxdursa yaradır, varsa toxunmur (köhnə bazaları yeniləyir)."""
+    migrate()
+
+
+def _table_exists(conn, name):
+    """name — "cədvəl" və ya "sxem.cədvəl" (məs. "archive.listings")."""
+    schema, _, table = name.rpartition(".")
+    return conn.execute(
+        f"SELECT 1 FROM {schema or 'main'}.sqlite_master WHERE type = 'table' AND name = ?", (table,)
+    ).fetchone() is not None
+
+
+def _table_columns(conn, table):
+    """Sütun adları cədvəldəki ardıcıllıqla ("archive.listings" də olar)."""
+    schema, _, name = table.rpartition(".")
+    prefix = f"{schema}." if schema else ""
+    return [r[1] for r in conn.execute(f"PRAGMA {prefix}table_info({name})")]
+
+
+def _add_column(conn, table, col, col_type):
+    if col not in _table_columns(conn, table):
+        conn.execute(f"ALTER TABLE {table} ADD COLUMN {col} {col_type}")
+        print(f"✅ '{col}' sütunu əlavə edildi ({table})")
+
+
+# ---------- Tipli (rəqəmsal) sütunlar ----------
+# Mətn sahələrindən ("3 sot / 120 kvm", "5/12", "3 otaqlı") yazılış zamanı
+# çıxarılır ki, qiymət/sahə/mərtəbə diapazonları SQL-də yoxlana bilsin.
+TYPED_COLUMNS = (
+    ("area_sot", "REAL"),
+    ("area_kvm_num", "REAL"),
+    ("floor_current", "INTEGER"),
+    ("floor_total", "INTEGER"),
+    ("rooms_num", "INTEGER"),
+    ("price_num", "REAL"),
+    ("date_read_day", "TEXT"),
+)
+TYPED_NAMES = tuple(col for col, _ in TYPED_COLUMNS)
+
+_NUM_RE = re.compile(r"\d+(?:[.,]\d+)?")
+_INT_RE = re.compile(r"\d+")
+_DAY_ISO_RE = re.compile(r"(\d{4})-(\d{2})-(\d{2})")
+_DAY_AZ_RE = re.compile(r"(\d{1,2})\.(\d{1,2})\.(\d{4})")
+_SOT_RE = re.compile(r"([\d.,]+)\s*sot")
+_KVM_RE = re.compile(r"([\d.,]+)\s*(?:kvm|m2|m²)")
+# Artıq kanonik olan created_at (sinxron, generator) yenidən parse olunmur
+_TS_CANON_RE = re.compile(r"\d{4}-\d{2}-\d{2} \d{2}:\d{2}:\d{2}")
+
+
+def parse_number(v):
+    """'120', '120.5', '120,5', '1 200 AZN' → float; tapılmasa None."""
+    if v is None:
+        return None
+    if isinstance(v, (int, float)):
+        return None if v != v else float(v)  # NaN
+    if isinstance(v, str) and v.isdecimal():
+        return float(v)
+    m = _NUM_RE.search(str(v).replace(" ", "").replace("\xa0", ""))
+    return float(m.group().replace(",", ".")) if m else None
+
+
+def parse_int(v):
+    """'3 otaqlı', '5+' → 3, 5; tapılmasa None."""
+    if v is None:
+        return None
+    if isinstance(v, (int, float)):
+        return None if v != v else int(v)
+    if isinstance(v, str) and v.isdecimal():
+        return int(v)
+    m = _INT_RE.search(str(v))
+    return int(m.group()) if m else None
+
+
+def parse_area(v):
+    """'3 sot / 120 kvm' → (3.0, 120.0); tək rəqəm kvm sayılır."""
+    if v is None:
+        return (None, None)
+    if isinstance(v, (int, float)):
+        return (None, parse_number(v))
+    s = str(v).lower()
+    if s.isdecimal():
+        return (None, float(s))
+    sot = _SOT_RE.search(s)
+    kvm = _KVM_RE.search(s)
+    if sot or kvm:
+        return (
+            parse_number(sot.group(1)) if sot else None,
+            parse_number(kvm.group(1)) if kvm else None,
+        )
+    return (None, parse_number(s))
+
+
+def parse_floor(v):
+    """'5/12' → (5, 12); 'None/12' → (None, 12); '5' → (5, None)."""
+    if v is None:
+        return (None, None)
+    parts = str(v).split("/", 1)
+    cur = parse_int(parts[0])
+    total = parse_int(parts[1]) if len(parts) > 1 else None
+    return (cur, total)
+
+
+def parse_day(v):
+    """Tarixi 'YYYY-MM-DD' formasına salır ('2025-03-01 10:00', '01.03.2025', date)."""
+    if v is None:
+        return None
+    if isinstance(v, (datetime, date)):
+        return v.strftime("%Y-%m-%d")
+    s = str(v).strip()
+    m = _DAY_ISO_RE.match(s)
+    if m:
+        return m.group(0)
+    m = _DAY_AZ_RE.match(s)
+    if m:
+        return f"{m.group(3)}-{int(m.group(2)):02d}-{int(m.group(1)):02d}"
+    return None
+
+
+def parse_timestamp(v):
+    """created_at üçün kanonik, sıralana bilən forma: 'YYYY-MM-DD HH:MM:SS'."""
+    if v is None:
+        return None
+    if isinstance(v, datetime):
+        return v.strftime("%Y-%m-%d %H:%M:%S")
+    if isinstance(v, date):
+        return v.strftime("%Y-%m-%d 00:00:00")
+    if isinstance(v, str) and _TS_CANON_RE.fullmatch(v):
+        return v
+    s = str(v).strip().replace("T", " ")
+    m = _DAY_ISO_RE.match(s)
+    if not m:
+        day = parse_day(s)
+        return f"{day} 00:00:00" if day else None
+    clock = [int(x) for x in _INT_RE.findall(s[10:])[:3]]
+    clock += [0] * (3 - len(clock))
+    return f"{m.group(0)} {clock[0]:02d}:{clock[1]:02d}:{clock[2]:02d}"
+
+
+def day_range(date_from=None, date_to=None):
+    """Gün aralığını yarımaçıq [başlanğıc, son+1 gün) sərhədlərinə çevirir.
+
+    created_at kanonik formada saxlandığı üçün sadə müqayisə indeksdən istifadə edir.
+    Yanlış tarix nəzərə alınmır (None).
+    """
+    lo = parse_day(date_from)
+    hi = parse_day(date_to)
+    if hi:
+        hi = (datetime.strptime(hi, "%Y-%m-%d") + timedelta(days=1)).strftime("%Y-%m-%d")
+    return lo, hi
+
+
+def typed_fields(rec):
+    """Elanın mətn sahələrindən tipli sütunların dəyərlərini çıxarır."""
+    sot, kvm = parse_area(rec.get("area_kvm"))
+    cur, total = parse_floor(rec.get("floor"))
+    return {
+        "area_sot": sot,
+        "area_kvm_num": kvm,
+        "floor_current": cur,
+        "floor_total": total,
+        "rooms_num": parse_int(rec.get("rooms")),
+        "price_num": parse_number(rec.get("price")),
+        "date_read_day": parse_day(rec.get("date_read")),
+    }
+
+
+def _backfill_typed(conn, last_id=0, chunk=5000):
+    """Tipli sütunları boş olan sətirləri id üzrə hissə-hissə doldurur.
+
+    Qaytarır: (yenilənən sətir sayı, son id) — None son id işin bitdiyini bildirir.
+    """
+    missing = " AND ".join(f"{col} IS NULL" for col in TYPED_NAMES)
+    rows = conn.execute(
+        f"""
+        SELECT id, date_read, floor, area_kvm, rooms, price FROM listings
+        WHERE id > ? AND {missing}
+        ORDER BY id LIMIT ?
+        """,
+        (last_id, chunk),
+    ).fetchall()
+    if not rows:
+        return 0, None
+    updates = []
+    for id_, date_read, floor, area_kvm, rooms, price in rows:
+        t = typed_fields(
+            {"date_read": date_read, "floor": floor, "area_kvm": area_kvm, "rooms": rooms, "price": price}
+        )
+        updates.append(tuple(t[col] for col in TYPED_NAMES) + (id_,))
+    conn.executemany(
+        f"UPDATE {_listings_base(conn)} SET {', '.join(col + ' = ?' for col in TYPED_NAMES)} WHERE id = ?",
+        updates,
+    )
+    return len(updates), rows[-1][0]
+
+
+@_profiled
+def backfill_typed_columns(chunk=5000):
+    """Köhnə sətirlər üçün tipli sütunları doldurur (hər hissə ayrı tranzaksiyada)."""
+    t0 = time.perf_counter()
+    db = get_db()
+    total = 0
+    last_id = 0
+    while last_id is not None:
+        with db.write() as conn:
+            n, last_id = _backfill_typed(conn, last_id, chunk)
+        total += n
+    with db.write() as conn:
+        _sync_summary_typed(conn)
+    print(f"✅ Tipli sütunlar dolduruldu: {total} sətir ({time.perf_counter() - t0:.2f} san)")
+    return total
+
+
+# ---------- Lüğət kodlaşdırması (lookup_values) ----------
+# Az sayda fərqli dəyəri olan sütunlar listings_data-da lookup_values.id kimi
+# ({col}_id) saxlanılır. "listings" görünüşü (VIEW) köhnə sütun adlarını
+# mətn kimi qaytarır, ona görə oxuyan sorğular dəyişmir; yazılar isə
+# add_listings_bulk-da Python tərəfində kodlaşdırılır.
+ENCODED_COLUMNS = ("prop_type", "operation", "metro", "rooms", "building", "currency", "document")
+LISTINGS_TABLE = "listings_data"
+
+
+def _base_col(col):
+    """listings_data-dakı fiziki sütun adı."""
+    if col in ENCODED_COLUMNS:
+        return f"{col}_id"
+    if col in ("summary", "summary_preview"):
+        return "summary_id"
+    if col == "phone":
+        return "phone_id"
+    return col
+
+
+def _val_sql(ref, col):
+    """Trigger daxilində ref (new/old) sətrinin mətn dəyəri."""
+    if col in ENCODED_COLUMNS:
+        return f"(SELECT value FROM lookup_values WHERE id = {ref}.{col}_id)"
+    if col == "summary":
+        return _summary_sql(f"{ref}.summary_id")
+    if col == "summary_preview":
+        return f"(SELECT IFNULL(preview, body) FROM summary_texts WHERE id = {ref}.summary_id)"
+    if col == "phone":
+        return f"(SELECT phone FROM phones WHERE id = {ref}.phone_id)"
+    return f"{ref}.{col}"
+
+
+def _listings_base(conn):
+    """Yazılar üçün fiziki cədvəl (v10-dan əvvəlki bazalarda hələ listings)."""
+    return LISTINGS_TABLE if _table_exists(conn, LISTINGS_TABLE) else "listings"
+
+
+def _create_listings_view(conn):
+    cols = []
+    joins = []
+    names = _table_columns(conn, LISTINGS_TABLE)
+    for name in names:
+        col = name[:-3] if name.endswith("_id") and name[:-3] in ENCODED_COLUMNS else None
+        if col:
+            cols.append(f"lk_{col}.value AS {col}")
+            joins.append(f"LEFT JOIN lookup_values lk_{col} ON lk_{col}.id = d.{name}")
+        elif name == "summary_id":
+            cols += ["d.summary_id", "IFNULL(st.preview, st.body) AS summary_preview"]
+            joins.append("LEFT JOIN summary_texts st ON st.id = d.summary_id")
+        elif name == "summary" and "summary_id" in names:
+            continue  # köhnə SQLite-da silinə bilməyən boş sütun (v11)
+        elif name == "phone_id":
+            cols += ["ph.phone", "d.phone_id"]
+            joins.append("LEFT JOIN phones ph ON ph.id = d.phone_id")
+        elif name == "phone" and "phone_id" in names:
+            continue  # eyni səbəbdən (v13)
+        else:
+            cols.append(f"d.{name}")
+    conn.execute("DROP VIEW IF EXISTS listings")
+    conn.execute(f"""
+        CREATE VIEW listings AS
+        SELECT {', '.join(cols)}
+        FROM {LISTINGS_TABLE} d
+        {' '.join(joins)}
+    """)
+
+
+def _encode_params(conn, params, known, new):
+    """LISTING_COLUMNS tuple-ındakı mətn dəyərlərini lookup id-lərinə çevirir.
+
+    known — commit olunmuş id-lər (manager keşi), new — bu tranzaksiyada yarananlar.
+    """
+    out = list(params)
+    for i in _ENCODED_IDX:
+        v = out[i]
+        if v is None:
+            continue
+        key = (LISTING_COLUMNS[i], v)
+        id_ = known.get(key) or new.get(key)
+        if id_ is None:
+            conn.execute("INSERT OR IGNORE INTO lookup_values (col, value) VALUES (?, ?)", key)
+            id_ = conn.execute(
+                "SELECT id FROM lookup_values WHERE col = ? AND value = ?", key
+            ).fetchone()[0]
+            new[key] = id_
+        out[i] = id_
+    if out[_SUMMARY_IDX] is not None:
+        out[_SUMMARY_IDX] = _summary_ref(conn, out[_SUMMARY_IDX], new)
+    if out[_PHONE_IDX] is not None:
+        out[_PHONE_IDX] = _phone_ref(conn, out[_PHONE_IDX], new)
+    return tuple(out)
+
+
+# ---------- Telefonlar (phones) ----------
+# Hər normal telefon bir dəfə saxlanılır; listings_data, sold, favorites və
+# phone_summary phone_id (INTEGER) ilə istinad edir — birləşmələr, GROUP BY
+# və IN-sorğular tam ədədlər üzərində gedir. normalize_phone yalnız yazı
+# zamanı (_listing_params, sold/favorites) və axtarış açarlarında çağırılır.
+def normalize_phone(p):
+    if not p:
+        return None
+    p = str(p)
+    p = p.replace(" ", "").replace("-", "").replace("(", "").replace(")", "")
+    if p.startswith("+994"):
+        p = "0" + p[4:]
+    elif p.startswith("994") and len(p) == 12:
+        p = "0" + p[3:]
+    elif not p.startswith("0") and len(p) == 9:
+        p = "0" + p
+    return p.strip() or None
+
+
+def _phone_ref(conn, phone, new):
+    """Normal telefonun phones.id-si (yoxdursa əlavə olunur); new — tranzaksiya keşi."""
+    key = ("phone", phone)
+    id_ = new.get(key)
+    if id_ is None:
+        row = conn.execute("SELECT id FROM phones WHERE phone = ?", (phone,)).fetchone()
+        if row:
+            id_ = row[0]
+        else:
+            id_ = conn.execute("INSERT INTO phones (phone) VALUES (?)", (phone,)).lastrowid
+        new[key] = id_
+    return id_
+
+
+def _phone_ids(conn, phones):
+    """{phones.id: telefon} — normal telefonlar üçün; bazada olmayanlar atlanır."""
+    rows = conn.execute(
+        "SELECT id, phone FROM phones WHERE phone IN (SELECT value FROM json_each(?))",
+        (json.dumps(phones),),
+    )
+    return dict(rows.fetchall())
+
+
+# ---------- Elan mətnləri (summary_texts) ----------
+# summary ən böyük sahədir və eyni sahibkar eyni mətni dəfələrlə yerləşdirir.
+# Hər fərqli mətn bir dəfə saxlanılır (SHA-1 açarı), uzunları zlib ilə
+# sıxılır (body BLOB, qısalar TEXT qalır). listings_data yalnız summary_id
+# saxlayır; cədvəl üçün preview (mətnin özü qısadırsa NULL — body göstərilir),
+# tam mətn isə get_summary_text ilə.
+# Silinmiş elanların mətnləri qalır — arxiv də eyni id-lərə istinad edir.
+SUMMARY_COMPRESS = True
+# Bundan qısa mətnlər sıxılmır (zlib başlığı qazancı yeyir)
+SUMMARY_COMPRESS_MIN = 160
+SUMMARY_PREVIEW_CHARS = 120
+
+
+def summary_preview(text):
+    """Cədvəl üçün bir sətirlik qısa mətn."""
+    if text is None:
+        return None
+    text = " ".join(str(text).split())
+    if len(text) <= SUMMARY_PREVIEW_CHARS:
+        return text
+    return text[: SUMMARY_PREVIEW_CHARS - 3] + "..."
+
+
+def _pack_summary(text):
+    raw = text.encode("utf-8")
+    if SUMMARY_COMPRESS and len(raw) >= SUMMARY_COMPRESS_MIN:
+        packed = zlib.compress(raw, 6)
+        if len(packed) < len(raw):
+            return packed
+    return text
+
+
+def _unzip_text(body):
+    """summary_texts.body → mətn (BLOB sıxılmışdır); SQL-də unzip_text(body)."""
+    if isinstance(body, bytes):
+        return zlib.decompress(body).decode("utf-8")
+    return body
+
+
+def _summary_sql(id_expr):
+    return f"(SELECT unzip_text(body) FROM summary_texts WHERE id = {id_expr})"
+
+
+def _summary_ref(conn, text, new):
+    """Mətnin summary_texts.id-si (yoxdursa əlavə olunur); new — tranzaksiya keşi."""
+    text = str(text)
+    key = ("summary", hashlib.sha1(text.encode("utf-8")).digest())
+    id_ = new.get(key)
+    if id_ is None:
+        row = conn.execute("SELECT id FROM summary_texts WHERE hash = ?", key[1:]).fetchone()
+        if row:
+            id_ = row[0]
+        else:
+            body = _pack_summary(text)
+            preview = summary_preview(text)
+            id_ = conn.execute(
+                "INSERT INTO summary_texts (hash, body, preview) VALUES (?, ?, ?)",
+                (key[1], body, None if preview == body else preview),
+            ).lastrowid
+        new[key] = id_
+    return id_
+
+
+@_profiled
+def get_summary_texts(ids):
+    """{summary_id: tam mətn} — bir sorğu ilə açılır."""
+    ids = [int(i) for i in dict.fromkeys(ids) if i not in (None, "")]
+    if not ids:
+        return {}
+    rows = get_db().read().execute(
+        "SELECT id, body FROM summary_texts WHERE id IN (SELECT value FROM json_each(?))",
+        (json.dumps(ids),),
+    )
+    return {id_: _unzip_text(body) for id_, body in rows}
+
+
+def get_summary_text(summary_id):
+    """Detallar pəncərəsi üçün tam mətn (tapılmasa None)."""
+    if summary_id in (None, ""):
+        return None
+    return get_summary_texts([summary_id]).get(int(summary_id))
+
+
+# ---------- Telefon xülasəsi (phone_summary) ----------
+# Hər telefon üçün bir sətir (açar phone_id): elan sayı + ən son elanın sahələri.
+# Yeni elanlar add_listings_bulk-da hissə-hissə bir upsert ilə köçürülür
+# (_upsert_phone_summary); silmə və yeniləməni trigger-lər aktual saxlayır.
+SUMMARY_COLUMNS = (
+    "date_read",
+    "prop_type",
+    "operation",
+    "metro",
+    "rooms",
+    "building",
+    "floor",
+    "area_kvm",
+    "price",
+    "currency",
+    "contact_name",
+    "address",
+    "document",
+    "summary_id",
+    "summary_preview",
+    "source_link",
+) + TYPED_NAMES
+
+# Bu sütunlar dəyişəndə xülasə yenidən hesablanır (tipli sütunlar mətn
+# sahələrindən törəyir; backfill onları _sync_summary_typed ilə köçürür)
+_SUMMARY_WATCH = ("phone", "created_at") + tuple(c for c in SUMMARY_COLUMNS if c not in TYPED_NAMES)
+
+_SUMMARY_ALL = ("phone_id", "phone", "ad_count", "first_created_at", "created_at", "latest_id") + SUMMARY_COLUMNS
+
+# Bir telefonun xülasəsini listings-dən yenidən hesablayan SELECT ({phone_id} yerinə ifadə)
+_SUMMARY_ONE_SQL = f"""
+    SELECT l.phone_id, l.phone, c.cnt, c.first_created_at, l.created_at, l.id,
+           {', '.join('l.' + col for col in SUMMARY_COLUMNS)}
+    FROM listings l,
+         (SELECT COUNT(*) AS cnt, MIN(created_at) AS first_created_at
+          FROM {LISTINGS_TABLE} WHERE phone_id = {{phone_id}}) c
+    WHERE l.phone_id = {{phone_id}}
+    ORDER BY l.created_at DESC, l.id DESC
+    LIMIT 1
+"""
+
+# Bütün telefonlar üçün eyni nəticə (rebuild və yoxlama üçün)
+_SUMMARY_ALL_SQL = f"""
+    SELECT phone_id, phone, cnt AS ad_count, first_created_at, created_at, id AS latest_id,
+           {', '.join(SUMMARY_COLUMNS)}
+    FROM (
+        SELECT l.*,
+               COUNT(*) OVER w AS cnt,
+               MIN(created_at) OVER w AS first_created_at,
+               ROW_NUMBER() OVER (PARTITION BY phone_id ORDER BY created_at DESC, id DESC) AS rn
+        FROM listings l
+        WHERE phone_id IS NOT NULL
+        WINDOW w AS (PARTITION BY phone_id)
+    )
+    WHERE rn = 1
+"""
+
+
+def _summary_subset_sql(where, hits=False):
+    """_SUMMARY_ALL sütunları, yalnız where-ə uyğun elanlar üzrə (say, ilk tarix, ən son elan).
+
+    Sayğaclar fiziki cədvəldən hesablanır; görünüşdə yalnız hər telefonun ən
+    son sətri açılır. where listings_data sütunlarına baxır.
+    hits=True — yalnız json_each(?) obyektindəki ({phone_id: bal}) telefonlar,
+    bal əlavə score sütunundadır (telefon indeksi ilə, əvvəlcə json gəzilir).
+    """
+    src = f"{LISTINGS_TABLE} d"
+    score = ""
+    if hits:
+        src = f"json_each(?) h CROSS JOIN {LISTINGS_TABLE} d ON d.phone_id = CAST(h.key AS INTEGER)"
+        score = ", h.value AS score"
+    return f"""
+    SELECT l.phone_id, l.phone, g.cnt AS ad_count, g.first_created_at, l.created_at, l.id AS latest_id,
+           {', '.join('l.' + col for col in SUMMARY_COLUMNS)}{', g.score' if hits else ''}
+    FROM (
+        SELECT id, cnt, first_created_at{', score' if hits else ''} FROM (
+            SELECT d.id,
+                   COUNT(*) OVER w AS cnt,
+                   MIN(d.created_at) OVER w AS first_created_at,
+                   ROW_NUMBER() OVER (PARTITION BY d.phone_id ORDER BY d.created_at DESC, d.id DESC) AS rn{score}
+            FROM {src}
+            WHERE d.phone_id IS NOT NULL AND {where}
+            WINDOW w AS (PARTITION BY d.phone_id)
+        )
+        WHERE rn = 1
+    ) g
+    JOIN listings l ON l.id = g.id
+    """
+
+
+# Yeni əlavə olunmuş id aralığı üzrə eyni nəticə — mövcud sətirlə birləşdirilir:
+# say cəmlənir, ən son elan (created_at, id) müqayisəsi ilə seçilir
+_SUMMARY_NEWER = (
+    "(IFNULL(excluded.created_at, ''), excluded.latest_id)"
+    " > (IFNULL(phone_summary.created_at, ''), phone_summary.latest_id)"
+)
+_SUMMARY_UPSERT_SQL = f"""
+    INSERT INTO phone_summary ({', '.join(_SUMMARY_ALL)})
+    {_summary_subset_sql("id BETWEEN ? AND ?")}
+    WHERE 1
+    ON CONFLICT(phone_id) DO UPDATE SET
+        ad_count = ad_count + excluded.ad_count,
+        first_created_at = MIN(IFNULL(first_created_at, excluded.first_created_at),
+                               IFNULL(excluded.first_created_at, first_created_at)),
+        {', '.join(
+            f"{col} = CASE WHEN {_SUMMARY_NEWER} THEN excluded.{col} ELSE {col} END"
+            for col in ("created_at", "latest_id") + SUMMARY_COLUMNS
+        )}
+"""
+
+
+def _upsert_phone_summary(conn, first_id, last_id):
+    """[first_id, last_id] aralığında yeni yazılmış elanları phone_summary-yə köçürür.
+
+    Aralıqdakı bütün id-lər eyni yazı tranzaksiyasında əlavə olunmuş olmalıdır.
+    """
+    conn.execute(_SUMMARY_UPSERT_SQL, (first_id, last_id))
+
+
+def _summary_refresh_sql(id_expr):
+    return (
+        f"DELETE FROM phone_summary WHERE phone_id = {id_expr};\n"
+        f"INSERT INTO phone_summary ({', '.join(_SUMMARY_ALL)}) "
+        f"{_SUMMARY_ONE_SQL.format(phone_id=id_expr)};"
+    )
+
+
+def _summary_type(col):
+    if col == "price":
+        return "REAL"
+    if col == "summary_id":
+        return "INTEGER"
+    return dict(TYPED_COLUMNS).get(col, "TEXT")
+
+
+def _sync_summary_typed(conn):
+    """phone_summary-dəki tipli sütunları ən son elandan köçürür."""
+    conn.execute(f"""
+        UPDATE phone_summary SET ({', '.join(TYPED_NAMES)}) = (
+            SELECT {', '.join(TYPED_NAMES)} FROM listings l WHERE l.id = phone_summary.latest_id
+        )
+    """)
+
+
+def _create_phone_summary(conn):
+    """phone_summary cədvəlini və silmə/yeniləmə trigger-lərini cari təsvirə görə (yenidən) yaradır."""
+    for trg in ("trg_summary_ai", "trg_summary_ad", "trg_summary_au"):
+        conn.execute(f"DROP TRIGGER IF EXISTS {trg}")
+    conn.execute("DROP TABLE IF EXISTS phone_summary")
+    conn.execute(f"""
+        CREATE TABLE phone_summary (
+            phone_id INTEGER PRIMARY KEY,
+            phone TEXT,
+            ad_count INTEGER NOT NULL DEFAULT 0,
+            first_created_at TEXT,
+            created_at TEXT,
+            latest_id INTEGER,
+            {', '.join(f'{col} {_summary_type(col)}' for col in SUMMARY_COLUMNS)}
+        )
+    """)
+    # Ən yenilər + keyset səhifələmə: ORDER BY created_at DESC, phone_id DESC
+    conn.execute("CREATE INDEX idx_phone_summary_created_phone ON phone_summary(created_at, phone_id)")
+    for col in ("price_num", "area_kvm_num", "floor_current", "rooms_num"):
+        conn.execute(f"CREATE INDEX idx_phone_summary_{col} ON phone_summary({col})")
+
+    conn.execute(f"""
+        CREATE TRIGGER trg_summary_ad AFTER DELETE ON {LISTINGS_TABLE}
+        WHEN old.phone_id IS NOT NULL
+        BEGIN
+            {_summary_refresh_sql("old.phone_id")}
+        END
+    """)
+    conn.execute(f"""
+        CREATE TRIGGER trg_summary_au
+        AFTER UPDATE OF {', '.join(dict.fromkeys(map(_base_col, _SUMMARY_WATCH)))} ON {LISTINGS_TABLE}
+        BEGIN
+            {_summary_refresh_sql("old.phone_id")}
+            {_summary_refresh_sql("new.phone_id")}
+        END
+    """)
+
+
+def _rebuild_phone_summary(conn):
+    _create_phone_summary(conn)
+    conn.execute(f"INSERT INTO phone_summary ({', '.join(_SUMMARY_ALL)}) {_SUMMARY_ALL_SQL}")
+
+
+@_profiled
+def rebuild_phone_summary():
+    """phone_summary-ni listings-dən tam yenidən qurur (köhnə bazalar üçün)."""
+    t0 = time.perf_counter()
+    with get_db().write() as conn:
+        _rebuild_phone_summary(conn)
+        n = conn.execute("SELECT COUNT(*) FROM phone_summary").fetchone()[0]
+    print(f"✅ phone_summary yenidən quruldu: {n} telefon ({time.perf_counter() - t0:.2f} san)")
+    return n
+
+
+@_profiled
+def check_phone_summary():
+    """phone_summary ilə listings arasında uyğunsuz telefonların siyahısını qaytarır."""
+    conn = get_db().read()
+    cols = ", ".join(_SUMMARY_ALL)
+    rows = conn.execute(f"""
+        SELECT phone FROM (
+            SELECT * FROM ({_SUMMARY_ALL_SQL})
+            EXCEPT
+            SELECT {cols} FROM phone_summary
+        )
+        UNION
+        SELECT phone FROM (
+            SELECT {cols} FROM phone_summary
+            EXCEPT
+            SELECT * FROM ({_SUMMARY_ALL_SQL})
+        )
+        ORDER BY phone
+    """).fetchall()
+    return [r[0] for r in rows]
+
+
+# ---------- Tam mətn axtarışı (FTS5) ----------
+# listings üzərində contentless FTS5 indeksi. Yeni elanların sənədi
+# add_listings_bulk-da Python-da, sıxılmamış mətndən qurulur və eyni partiyada
+# yazılır (trigger-də zlib açılmır); silmə/yeniləmə trigger-lərlə gedir.
+FTS_COLUMNS = ("phone", "metro", "address", "contact_name", "summary")
+
+# unicode61 "ş→s", "ç→c", "ö→o" kimi diakritikləri özü atır, amma ə və ı
+# ayrıca hərflərdir. Agentlər çox vaxt "temirli" yazır — indeksə də, sorğuya da
+# eyni qatlama tətbiq olunur.
+_AZ_FOLD = (("Ə", "e"), ("ə", "e"), ("İ", "i"), ("ı", "i"))
+
+
+def _fold_sql(expr):
+    for src, dst in _AZ_FOLD:
+        expr = f"replace({expr}, '{src}', '{dst}')"
+    return expr
+
+
+def _fold_text(text):
+    for src, dst in _AZ_FOLD:
+        text = text.replace(src, dst)
+    return text
+
+
+def _fts_doc(values):
+    """FTS sütunlarının mətn dəyərləri → indeksə yazılan (qatlanmış) dəyərlər."""
+    return tuple(None if v is None else _fold_text(str(v)) for v in values)
+
+
+_FTS_INSERT_SQL = f"INSERT INTO listings_fts (rowid, {', '.join(FTS_COLUMNS)}) VALUES (?{', ?' * len(FTS_COLUMNS)})"
+
+
+def _create_listings_fts(conn):
+    """listings_fts cədvəlini və silmə/yeniləmə trigger-lərini yaradır (FTS5 yoxdursa False)."""
+    for trg in ("trg_fts_ai", "trg_fts_ad", "trg_fts_au"):
+        conn.execute(f"DROP TRIGGER IF EXISTS {trg}")
+    conn.execute("DROP TABLE IF EXISTS listings_fts")
+    try:
+        conn.execute(f"""
+            CREATE VIRTUAL TABLE listings_fts USING fts5(
+                {', '.join(FTS_COLUMNS)},
+                content='',
+                tokenize='unicode61 remove_diacritics 2'
+            )
+        """)
+    except sqlite3.OperationalError as e:
+        print(f"⚠️ FTS5 mövcud deyil, açar söz axtarışı LIKE ilə işləyəcək: {e}")
+        return False
+
+    cols = ", ".join(FTS_COLUMNS)
+    new_vals = ", ".join(_fold_sql(_val_sql("new", c)) for c in FTS_COLUMNS)
+    old_vals = ", ".join(_fold_sql(_val_sql("old", c)) for c in FTS_COLUMNS)
+    # Contentless cədvəldə silmək üçün indekslənmiş dəyərlərin özü verilməlidir
+    conn.execute(f"""
+        CREATE TRIGGER trg_fts_ad AFTER DELETE ON {LISTINGS_TABLE} BEGIN
+            INSERT INTO listings_fts (listings_fts, rowid, {cols})
+            VALUES ('delete', old.id, {old_vals});
+        END
+    """)
+    conn.execute(f"""
+        CREATE TRIGGER trg_fts_au
+        AFTER UPDATE OF {', '.join(dict.fromkeys(map(_base_col, FTS_COLUMNS)))} ON {LISTINGS_TABLE} BEGIN
+            INSERT INTO listings_fts (listings_fts, rowid, {cols})
+            VALUES ('delete', old.id, {old_vals});
+            INSERT INTO listings_fts (rowid, {cols}) VALUES (new.id, {new_vals});
+        END
+    """)
+    return True
+
+
+def _rebuild_listings_fts(conn):
+    if _create_listings_fts(conn):
+        vals = ", ".join(_fold_sql(_val_sql("l", c)) for c in FTS_COLUMNS)
+        conn.execute(
+            f"INSERT INTO listings_fts (rowid, {', '.join(FTS_COLUMNS)}) "
+            f"SELECT id, {vals} FROM {LISTINGS_TABLE} l"
+        )
+
+
+def _has_fts(conn):
+    return conn.execute(
+        "SELECT 1 FROM sqlite_master WHERE name = 'listings_fts'"
+    ).fetchone() is not None
+
+
+# Açar söz axtarışında bir dəfəyə bm25 ilə sıralanan uyğun elanların sayı (pəncərə;
+# yalnız filtrləri və tarix aralığını ödəyən elanlar sayılır).
+# Çox yayılmış sözlər ("təmirli") yüz minlərlə sətirə uyğun gəlir; hamısını
+# sıralamaq əvəzinə ən yeni N uyğunluqdan başlanır ki, gecikmə sabit qalsın —
+# növbəti səhifələr kursorla köhnə pəncərələrə keçir (heç nə kəsilmir).
+FTS_CANDIDATES = 2000
+_FTS_MAX_ROWID = 2**63 - 1
+
+
+def _keyword_like_sql(ref):
+    """FTS olmayanda (və arxiv elanlarında) ref elanının axtarış sütunları üzrə LIKE (5 parametr)."""
+    return (
+        f"(LOWER({ref}.phone) LIKE ? OR LOWER({ref}.metro) LIKE ? OR LOWER({ref}.address) LIKE ?"
+        f" OR LOWER({ref}.contact_name) LIKE ?"
+        f" OR LOWER(IFNULL({_summary_sql(ref + '.summary_id')}, {ref}.summary_preview)) LIKE ?)"
+    )
+
+
+def _fts_query(keyword):
+    """İstifadəçi mətnini təhlükəsiz FTS5 MATCH ifadəsinə çevirir.
+
+    Sözlər tam uyğunluqla, sonuncu (yazılmaqda olan) söz isə prefiks kimi axtarılır.
+    Rəqəmlər (telefon hissəsi) həmişə prefiks kimi axtarılır.
+    """
+    terms = re.findall(r"\w+", _fold_text(keyword or ""))
+    parts = []
+    for i, t in enumerate(terms):
+        star = "*" if (i == len(terms) - 1 or t.isdigit()) else ""
+        if t.isdigit() and not t.startswith("0"):
+            # "501234567" → həm də "0501234567" kimi axtar
+            parts.append(f'("{t}"* OR "0{t}"*)')
+        else:
+            parts.append(f'"{t}"{star}')
+    return " AND ".join(parts) or None
+
+
+# ---------- Panel statistikası (listing_stats) ----------
+# Parametrlər panelinin sayğacları: yeni elanlar add_listings_bulk-da
+# hissə-hissə bir qruplaşdırma ilə (_add_listing_stats), silmə və yeniləmə
+# trigger-lərlə əlavə olunur — kartlar listings-i skan etmədən yenilənir.
+STATS_NAMES = ("total", "sales", "rent", "dupes")
+
+# Dublikat qrupu: eyni telefon + qiymət + source_link (NULL-lar bərabər) —
+# ux_listings_dedup-un açarı. Unikal indeks belə sətrin yazılmasına imkan
+# vermir, ona görə say yazılışlarda dəyişmir, yalnız tam hesablamada ölçülür.
+_DUPE_KEY = ("phone", "price", "source_link")
+
+
+def _stats_delta_sql(ref, sign):
+    """ref (new/old) sətrinin sayğaclara təsirini əlavə edən SQL (sign: +1/-1)."""
+    op = "+" if sign > 0 else "-"
+    operation = _val_sql(ref, "operation")
+    prop_type = _val_sql(ref, "prop_type")
+    return f"""
+        UPDATE listing_stats SET value = value {op} CASE name
+            WHEN 'total' THEN 1
+            WHEN 'sales' THEN IFNULL({operation} LIKE '%Sat%', 0)
+            WHEN 'rent' THEN IFNULL({operation} LIKE '%Kiray%', 0)
+            ELSE 0
+        END;
+        INSERT INTO prop_type_stats (prop_type, n)
+        SELECT {prop_type}, {sign} WHERE TRIM({prop_type}) != ''
+        ON CONFLICT(prop_type) DO UPDATE SET n = n {op} 1;
+    """
+
+
+def _create_listing_stats(conn):
+    """listing_stats / prop_type_stats cədvəllərini və silmə/yeniləmə trigger-lərini yaradır."""
+    for trg in ("trg_stats_ai", "trg_stats_ad", "trg_stats_au"):
+        conn.execute(f"DROP TRIGGER IF EXISTS {trg}")
+    conn.execute("DROP TABLE IF EXISTS listing_stats")
+    conn.execute("DROP TABLE IF EXISTS prop_type_stats")
+    conn.execute("""
+        CREATE TABLE listing_stats (
+            name TEXT PRIMARY KEY,
+            value INTEGER NOT NULL DEFAULT 0
+        )
+    """)
+    conn.execute("""
+        CREATE TABLE prop_type_stats (
+            prop_type TEXT PRIMARY KEY,
+            n INTEGER NOT NULL DEFAULT 0
+        )
+    """)
+    conn.executemany("INSERT INTO listing_stats (name) VALUES (?)", [(n,) for n in STATS_NAMES])
+
+    watch = ", ".join(map(_base_col, ("operation", "prop_type")))
+    conn.execute(f"""
+        CREATE TRIGGER trg_stats_ad AFTER DELETE ON {LISTINGS_TABLE}
+        BEGIN
+            {_stats_delta_sql("old", -1)}
+            DELETE FROM prop_type_stats WHERE n <= 0;
+        END
+    """)
+    # Yeniləmə = köhnə sətri çıxmaq + yenisini əlavə etmək
+    conn.execute(f"""
+        CREATE TRIGGER trg_stats_au
+        AFTER UPDATE OF {watch} ON {LISTINGS_TABLE}
+        BEGIN
+            {_stats_delta_sql("old", -1)}
+            {_stats_delta_sql("new", +1)}
+            DELETE FROM prop_type_stats WHERE n <= 0;
+        END
+    """)
+
+
+# prop_type üzrə (növ, say, satış, kirayə): əvvəl kodlaşdırılmış id cütləri
+# üzrə qruplaşdırılır, mətnlər yalnız qruplar üçün açılır
+def _stats_groups_sql(where):
+    operation = _val_sql("g", "operation")
+    return f"""
+        SELECT {_val_sql("g", "prop_type")} AS prop_type, SUM(n),
+               SUM(n * IFNULL({operation} LIKE '%Sat%', 0)),
+               SUM(n * IFNULL({operation} LIKE '%Kiray%', 0))
+        FROM (
+            SELECT prop_type_id, operation_id, COUNT(*) AS n
+            FROM {LISTINGS_TABLE} WHERE {where}
+            GROUP BY prop_type_id, operation_id
+        ) g
+        GROUP BY 1
+    """
+
+
+def _add_listing_stats(conn, where, params=()):
+    """where ilə seçilən (yeni yazılmış) elanları sayğaclara bir keçiddə əlavə edir."""
+    rows = conn.execute(_stats_groups_sql(where), params).fetchall()
+    if not rows:
+        return
+    conn.executemany(
+        "UPDATE listing_stats SET value = value + ? WHERE name = ?",
+        [(sum(r[1] for r in rows), "total"), (sum(r[2] for r in rows), "sales"), (sum(r[3] for r in rows), "rent")],
+    )
+    # Boşluqla fərqlənən adlar eyni açarda toplanmır — trigger-lər kimi
+    conn.executemany(
+        """
+        INSERT INTO prop_type_stats (prop_type, n) VALUES (?, ?)
+        ON CONFLICT(prop_type) DO UPDATE SET n = n + excluded.n
+        """,
+        [(r[0], r[1]) for r in rows if r[0] is not None and r[0].strip() != ""],
+    )
+
+
+def _rebuild_listing_stats(conn):
+    _create_listing_stats(conn)
+    _add_listing_stats(conn, "1")
+    dupes = conn.execute(f"""
+        SELECT COUNT(*) FROM (
+            SELECT 1 FROM {LISTINGS_TABLE} WHERE phone_id IS NOT NULL
+            GROUP BY {', '.join(f"IFNULL({_base_col(col)}, '')" for col in _DUPE_KEY)} HAVING COUNT(*) > 1
+        )
+    """).fetchone()[0]
+    conn.execute("UPDATE listing_stats SET value = ? WHERE name = 'dupes'", (dupes,))
+
+
+@_profiled
+def rebuild_listing_stats():
+    """Panel sayğaclarını listings-dən tam yenidən hesablayır."""
+    t0 = time.perf_counter()
+    with get_db().write() as conn:
+        _rebuild_listing_stats(conn)
+    print(f"✅ Statistika yenidən hesablandı ({time.perf_counter() - t0:.2f} san)")
+
+
+@_profiled
+def get_listing_stats(top=5):
+    """Panel üçün sayğaclar: total, sales, rent, dupes + ən çox elanlı top növlər."""
+    with get_db().snapshot() as conn:
+        stats = dict(conn.execute("SELECT name, value FROM listing_stats").fetchall())
+        stats["top_prop_types"] = conn.execute(
+            "SELECT prop_type, n FROM prop_type_stats WHERE n > 0 ORDER BY n DESC, prop_type LIMIT ?",
+            (top,),
+        ).fetchall()
+    return stats
+
+
+# Yenidən qurula bilən törəmə strukturlar (miqrasiya sonunda bir dəfə)
+_DERIVED = {
+    "phone_summary": _rebuild_phone_summary,
+    "listings_fts": _rebuild_listings_fts,
+    "listing_stats": _rebuild_listing_stats,
+}
+
+
+# ---------- Sxem miqrasiyaları ----------
+def _move_dupes(conn, table, key, version):
+    """table-da key üzrə təkrarlanan sətirlərdən ilkini (MIN(id)) saxlayır, qalanlarını
+    _migrated_dupes-ə (sətir json kimi) köçürüb silir. Qaytarır: köçürülən sətir sayı.
+
+    Miqrasiyanın sildiyi elanlar itmir — lazım olsa data sütunundan bərpa olunur.
+    """
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS _migrated_dupes (
+            id INTEGER PRIMARY KEY,
+            version INTEGER NOT NULL,
+            source TEXT NOT NULL,
+            row_id INTEGER NOT NULL,
+            kept_id INTEGER NOT NULL,
+            data TEXT NOT NULL,
+            moved_at TEXT DEFAULT CURRENT_TIMESTAMP
+        )
+    """)
+    data = ", ".join(f"'{col}', {col}" for col in _table_columns(conn, table))
+    moved = conn.execute(f"""
+        INSERT INTO _migrated_dupes (version, source, row_id, kept_id, data)
+        SELECT ?, ?, id, kept_id, json_object({data}) FROM (
+            SELECT *, MIN(id) OVER (PARTITION BY {key}) AS kept_id FROM {table}
+        )
+        WHERE id != kept_id
+        ORDER BY id
+    """, (version, table)).rowcount
+    if moved:
+        conn.execute(
+            f"DELETE FROM {table} WHERE id IN (SELECT row_id FROM _migrated_dupes WHERE version = ? AND source = ?)",
+            (version, table),
+        )
+    return moved
+
+
+def _migrate_v1(conn):
+    """Əsas cədvəllər və sonradan əlavə olunan sütunlar."""
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS listings (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            date_read TEXT,
+            prop_type TEXT,
+            operation TEXT,
+            metro TEXT,
+            rooms TEXT,
+            building TEXT,
+            floor TEXT,
+            area_kvm TEXT,
+            price REAL,
+            currency TEXT,
+            phone TEXT,
+            contact_name TEXT,
+            address TEXT,
+            document TEXT,
+            summary TEXT,
+            source_link TEXT,
+            created_at TEXT DEFAULT CURRENT_TIMESTAMP,
+            sql_id INTEGER
+        )
+    """)
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS sold (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            phone TEXT UNIQUE
+        )
+    """)
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS favorites (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            phone TEXT UNIQUE,
+            color TEXT
+        )
+    """)
+    # Yalnız köhnə bazalar üçün (yeni bazada CREATE TABLE artıq yaradır — mesaj çıxmır)
+    _add_column(conn, "listings", "sql_id", "INTEGER")
+    _add_column(conn, "listings", "source_link", "TEXT")
+
+
+def _migrate_v2(conn):
+    """listings üçün indekslər (sold/favorites phone UNIQUE indeksi artıq var)."""
+    # Dublikat yoxlaması: phone + price + source_link
+    conn.execute(
+        "CREATE INDEX IF NOT EXISTS idx_listings_dedup ON listings(phone, price, source_link)"
+    )
+    # GROUP BY phone + MAX(created_at) və sold/favorites IN-sorğuları
+    conn.execute(
+        "CREATE INDEX IF NOT EXISTS idx_listings_phone_created ON listings(phone, created_at)"
+    )
+    # get_listings_by_phone (ORDER BY date_read) və phone_stats — cədvələ getmədən
+    conn.execute(
+        "CREATE INDEX IF NOT EXISTS idx_listings_phone_date_read ON listings(phone, date_read, price)"
+    )
+    # Ən yenilər üzrə sıralama və tarix filtri
+    conn.execute(
+        "CREATE INDEX IF NOT EXISTS idx_listings_created ON listings(created_at)"
+    )
+
+
+def _migrate_v3(conn):
+    """Dublikat açarını unikal indeksə çevirir (ON CONFLICT DO NOTHING üçün)."""
+    # Köhnə bazalarda yığılmış dublikatlardan yalnız ilkini saxla (qalanları _migrated_dupes-ə)
+    moved = _move_dupes(conn, "listings", "phone, IFNULL(price, ''), IFNULL(source_link, '')", 3)
+    if moved:
+        print(f"♻️ {moved} dublikat elan silindi (_migrated_dupes cədvəlinə köçürüldü)")
+    conn.execute("DROP INDEX IF EXISTS idx_listings_dedup")
+    # NULL-lar da bərabər sayılsın deyə IFNULL (əvvəlki "source_link IS ?" kimi)
+    conn.execute("""
+        CREATE UNIQUE INDEX IF NOT EXISTS ux_listings_dedup
+        ON listings(phone, IFNULL(price, ''), IFNULL(source_link, ''))
+    """)
+
+
+def _migrate_v4(conn):
+    """phone_summary cədvəli və trigger-ləri."""
+    return {"phone_summary"}
+
+
+def _migrate_v5(conn):
+    """Açar söz axtarışı üçün FTS5 indeksi."""
+    return {"listings_fts"}
+
+
+def _migrate_v6(conn):
+    """Tipli rəqəmsal sütunlar + köhnə sətirlər üçün backfill."""
+    for col, col_type in TYPED_COLUMNS:
+        _add_column(conn, "listings", col, col_type)
+    last_id = 0
+    while last_id is not None:
+        _, last_id = _backfill_typed(conn, last_id)
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_listings_price_num ON listings(price_num)")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_listings_date_read_day ON listings(date_read_day)")
+    return {"phone_summary"}
+
+
+def _migrate_v7(conn):
+    """created_at kanonik formaya salınır; tarix aralığı üçün (created_at, phone) indeksi."""
+    canonical = "[0-9][0-9][0-9][0-9]-[0-9][0-9]-[0-9][0-9] [0-9][0-9]:[0-9][0-9]:[0-9][0-9]"
+    cur = conn.execute(
+        f"""
+        UPDATE listings SET created_at = strftime('%Y-%m-%d %H:%M:%S', created_at)
+        WHERE created_at NOT GLOB '{canonical}'
+          AND strftime('%Y-%m-%d %H:%M:%S', created_at) IS NOT NULL
+        """
+    )
+    if cur.rowcount:
+        print(f"🕒 {cur.rowcount} sətirdə created_at kanonik formaya salındı")
+    conn.execute("DROP INDEX IF EXISTS idx_listings_created")
+    conn.execute(
+        "CREATE INDEX IF NOT EXISTS idx_listings_created_phone ON listings(created_at, phone)"
+    )
+
+
+def _migrate_v8(conn):
+    """Keyset səhifələmə üçün phone_summary(created_at, phone) indeksi."""
+    if _table_exists(conn, "phone_summary"):
+        conn.execute("DROP INDEX IF EXISTS idx_phone_summary_created")
+        conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_phone_summary_created_phone ON phone_summary(created_at, phone)"
+        )
+
+
+def _migrate_v9(conn):
+    """Panel statistikası üçün trigger-lə yenilənən sayğaclar."""
+    return {"listing_stats"}
+
+
+def _migrate_v10(conn):
+    """Az dəyərli mətn sütunları lookup_values-ə köçür; listings → listings_data + VIEW."""
+    info = conn.execute("PRAGMA table_info(listings)").fetchall()
+    index_sql = [
+        r[0] for r in conn.execute(
+            "SELECT sql FROM sqlite_master WHERE type = 'index' AND tbl_name = 'listings' AND sql IS NOT NULL"
+        )
+    ]
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS lookup_values (
+            id INTEGER PRIMARY KEY,
+            col TEXT NOT NULL,
+            value TEXT NOT NULL,
+            UNIQUE (col, value)
+        )
+    """)
+    for col in ENCODED_COLUMNS:
+        conn.execute(
+            f"INSERT OR IGNORE INTO lookup_values (col, value) "
+            f"SELECT DISTINCT '{col}', {col} FROM listings WHERE {col} IS NOT NULL ORDER BY 2"
+        )
+
+    defs = []
+    for _, name, col_type, _, default, pk in info:
+        if pk:
+            defs.append(f"{name} INTEGER PRIMARY KEY AUTOINCREMENT")
+        elif name in ENCODED_COLUMNS:
+            defs.append(f"{name}_id INTEGER REFERENCES lookup_values(id)")
+        else:
+            defs.append(f"{name} {col_type}" + (f" DEFAULT {default}" if default is not None else ""))
+    conn.execute(f"CREATE TABLE {LISTINGS_TABLE} ({', '.join(defs)})")
+
+    names = [r[1] for r in info]
+    src = ", ".join(
+        f"(SELECT id FROM lookup_values WHERE col = '{n}' AND value = l.{n})" if n in ENCODED_COLUMNS else f"l.{n}"
+        for n in names
+    )
+    dst = ", ".join(f"{n}_id" if n in ENCODED_COLUMNS else n for n in names)
+    conn.execute(f"INSERT INTO {LISTINGS_TABLE} ({dst}) SELECT {src} FROM listings l")
+    # AUTOINCREMENT sayğacı: silinmiş ən böyük id-lər təkrar istifadə olunmasın
+    conn.execute(f"""
+        UPDATE sqlite_sequence
+        SET seq = MAX(seq, IFNULL((SELECT seq FROM sqlite_sequence WHERE name = 'listings'), 0))
+        WHERE name = '{LISTINGS_TABLE}'
+    """)
+    conn.execute("DELETE FROM sqlite_sequence WHERE name = 'listings'")
+    # Köhnə cədvəl öz indeksləri və trigger-ləri ilə silinir; indekslər yeni cədvəldə qurulur
+    conn.execute("DROP TABLE listings")
+    for sql in index_sql:
+        conn.execute(re.sub(r"\bON\s+listings\s*\(", f"ON {LISTINGS_TABLE}(", sql, count=1))
+    _create_listings_view(conn)
+    return {"phone_summary", "listings_fts", "listing_stats"}
+
+
+def _migrate_v11(conn, chunk=5000):
+    """summary mətnləri summary_texts-ə (hash açarlı, sıxılmış); listings_data.summary_id."""
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS summary_texts (
+            id INTEGER PRIMARY KEY,
+            hash BLOB NOT NULL UNIQUE,
+            body,
+            preview TEXT
+        )
+    """)
+    # summary-yə istinad edən görünüş və trigger-lər sütun silinməzdən əvvəl
+    conn.execute("DROP VIEW IF EXISTS listings")
+    for trg in ("trg_summary_ai", "trg_summary_ad", "trg_summary_au", "trg_fts_ai", "trg_fts_ad", "trg_fts_au"):
+        conn.execute(f"DROP TRIGGER IF EXISTS {trg}")
+    _add_column(conn, LISTINGS_TABLE, "summary_id", "INTEGER REFERENCES summary_texts(id)")
+    last_id = 0
+    while True:
+        rows = conn.execute(
+            f"SELECT id, summary FROM {LISTINGS_TABLE} WHERE id > ? AND summary IS NOT NULL ORDER BY id LIMIT ?",
+            (last_id, chunk),
+        ).fetchall()
+        if not rows:
+            break
+        new = {}  # yalnız hissə daxilində — milyonlarla hash yaddaşda saxlanmasın
+        conn.executemany(
+            f"UPDATE {LISTINGS_TABLE} SET summary_id = ? WHERE id = ?",
+            [(_summary_ref(conn, text, new), id_) for id_, text in rows],
+        )
+        last_id = rows[-1][0]
+    try:
+        conn.execute(f"ALTER TABLE {LISTINGS_TABLE} DROP COLUMN summary")
+    except sqlite3.OperationalError:
+        # SQLite < 3.35: sütun boşaldılır, yer VACUUM ilə qayıdır
+        conn.execute(f"UPDATE {LISTINGS_TABLE} SET summary = NULL")
+    _create_listings_view(conn)
+    return {"phone_summary", "listings_fts"}
+
+
+def _migrate_v12(conn):
+    """Texniki xidmət addımlarının son nəticələri (Parametrlər tabı üçün)."""
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS maintenance_runs (
+            step TEXT PRIMARY KEY,
+            started_at TEXT,
+            duration_ms REAL,
+            status TEXT,
+            result TEXT,
+            reason TEXT
+        )
+    """)
+
+
+def _migrate_v13(conn):
+    """Telefonlar phones cədvəlinə (normal forma); listings_data, sold, favorites → phone_id."""
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS phones (
+            id INTEGER PRIMARY KEY,
+            phone TEXT NOT NULL UNIQUE
+        )
+    """)
+    # phone-a istinad edən görünüş, trigger-lər və indekslər sütun silinməzdən əvvəl
+    conn.execute("DROP VIEW IF EXISTS listings")
+    for (trg,) in conn.execute(
+        "SELECT name FROM sqlite_master WHERE type = 'trigger' AND tbl_name = ?", (LISTINGS_TABLE,)
+    ).fetchall():
+        conn.execute(f"DROP TRIGGER {trg}")
+    index_sql = conn.execute(
+        "SELECT name, sql FROM sqlite_master WHERE type = 'index' AND tbl_name = ? AND sql LIKE '%phone%'",
+        (LISTINGS_TABLE,),
+    ).fetchall()
+    for name, _ in index_sql:
+        conn.execute(f"DROP INDEX {name}")
+
+    conn.execute("""
+        INSERT OR IGNORE INTO phones (phone)
+        SELECT p FROM (
+            SELECT normalize_phone(phone) AS p FROM (SELECT DISTINCT phone FROM listings_data)
+            UNION SELECT normalize_phone(phone) FROM sold
+            UNION SELECT normalize_phone(phone) FROM favorites
+        )
+        WHERE p IS NOT NULL
+        ORDER BY p
+    """)
+    _add_column(conn, LISTINGS_TABLE, "phone_id", "INTEGER REFERENCES phones(id)")
+    conn.execute(f"""
+        UPDATE {LISTINGS_TABLE}
+        SET phone_id = (SELECT id FROM phones WHERE phone = normalize_phone({LISTINGS_TABLE}.phone))
+        WHERE phone IS NOT NULL
+    """)
+    # Yazılışı fərqli olan eyni nömrələr indi eyni açara düşür — yalnız ilkini saxla (v3 kimi);
+    # köçürülən sətirdə əvvəlki phone yazılışı da qalır
+    moved = _move_dupes(conn, LISTINGS_TABLE, "phone_id, IFNULL(price, ''), IFNULL(source_link, '')", 13)
+    if moved:
+        print(f"♻️ {moved} dublikat elan silindi (telefon normallaşdırması, _migrated_dupes cədvəlinə köçürüldü)")
+    try:
+        conn.execute(f"ALTER TABLE {LISTINGS_TABLE} DROP COLUMN phone")
+    except sqlite3.OperationalError:
+        # SQLite < 3.35: sütun boşaldılır, yer VACUUM ilə qayıdır
+        conn.execute(f"UPDATE {LISTINGS_TABLE} SET phone = NULL")
+    for _, sql in index_sql:
+        conn.execute(re.sub(r"\bphone\b", "phone_id", sql))
+
+    # sold / favorites: eyni nömrənin müxtəlif yazılışları bir sətirə (favorites-də sonuncu rəng)
+    conn.execute("""
+        CREATE TABLE sold_v13 (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            phone_id INTEGER UNIQUE REFERENCES phones(id)
+        )
+    """)
+    conn.execute("""
+        INSERT OR IGNORE INTO sold_v13 (id, phone_id)
+        SELECT s.id, p.id FROM sold s JOIN phones p ON p.phone = normalize_phone(s.phone)
+        ORDER BY s.id
+    """)
+    conn.execute("""
+        CREATE TABLE favorites_v13 (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            phone_id INTEGER UNIQUE REFERENCES phones(id),
+            color TEXT
+        )
+    """)
+    conn.execute("""
+        INSERT OR REPLACE INTO favorites_v13 (id, phone_id, color)
+        SELECT f.id, p.id, f.color FROM favorites f JOIN phones p ON p.phone = normalize_phone(f.phone)
+        ORDER BY f.id
+    """)
+    for table in ("sold", "favorites"):
+        conn.execute(f"DROP TABLE {table}")
+        conn.execute(f"ALTER TABLE {table}_v13 RENAME TO {table}")
+
+    _create_listings_view(conn)
+    return {"phone_summary", "listings_fts", "listing_stats"}
+
+
+def _migrate_v14(conn):
+    """Xarici mənbələrdən sinxronun yuxarı həddi (inkremental sinxron üçün)."""
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS sync_state (
+            source TEXT PRIMARY KEY,
+            last_inserted_at TEXT,
+            last_id INTEGER,
+            rows INTEGER NOT NULL DEFAULT 0,
+            updated_at TEXT
+        )
+    """)
+
+
+# (versiya, təsvir, funksiya) — yalnız sona əlavə edin, köhnələri dəyişməyin.
+# Funksiya yenidən qurulmalı törəmə strukturların adlarını (_DERIVED) qaytara bilər.
+MIGRATIONS = [
+    (1, "əsas cədvəllər", _migrate_v1),
+    (2, "listings indeksləri", _migrate_v2),
+    (3, "unikal dublikat açarı", _migrate_v3),
+    (4, "phone_summary", _migrate_v4),
+    (5, "listings_fts", _migrate_v5),
+    (6, "tipli sütunlar", _migrate_v6),
+    (7, "kanonik created_at", _migrate_v7),
+    (8, "səhifələmə indeksi", _migrate_v8),
+    (9, "listing_stats", _migrate_v9),
+    (10, "lüğət kodlaşdırması", _migrate_v10),
+    (11, "summary_texts", _migrate_v11),
+    (12, "texniki xidmət jurnalı", _migrate_v12),
+    (13, "phones cədvəli", _migrate_v13),
+    (14, "sync_state", _migrate_v14),
+]
+SCHEMA_VERSION = MIGRATIONS[-1][0]
+
+
+def migrate():
+    """PRAGMA user_version əsasında gözləyən miqrasiyaları bir tranzaksiyada icra edir."""
+    with get_db().write() as conn:
+        current = conn.execute("PRAGMA user_version").fetchone()[0]
+        pending = [m for m in MIGRATIONS if m[0] > current]
+        if not pending:
+            return current
+
+        started = time.perf_counter()
+        rebuild = set()
+        for version, title, fn in pending:
+            t0 = time.perf_counter()
+            rebuild |= fn(conn) or set()
+            conn.execute(f"PRAGMA user_version={int(version)}")
+            print(f"🛠️ Miqrasiya v{version} ({title}): {time.perf_counter() - t0:.2f} san")
+
+        for name, build in _DERIVED.items():
+            if name in rebuild:
+                t0 = time.perf_counter()
+                build(conn)
+                print(f"🛠️ {name} yenidən quruldu: {time.perf_counter() - t0:.2f} san")
+
+        print(
+            f"✅ Baza v{current} → v{SCHEMA_VERSION} yeniləndi "
+            f"({time.perf_counter() - started:.2f} san)"
+        )
+        return SCHEMA_VERSION
+
+
+# ---------- Əlavə və təmizlik ----------
+def clear_search_history():
+    with get_db().write() as conn:
+        conn.execute("DELETE FROM search_history")
+
+
+# add_listings_bulk-a tuple verildikdə sütunların ardıcıllığı
+LISTING_COLUMNS = (
+    "date_read",
+    "prop_type",
+    "operation",
+    "metro",
+    "rooms",
+    "building",
+    "floor",
+    "area_kvm",
+    "price",
+    "currency",
+    "phone",
+    "contact_name",
+    "address",
+    "document",
+    "summary",
+    "source_link",
+    "sql_id",
+    "created_at",
+) + TYPED_NAMES
+
+# Bir hissəyə düşən maksimum sətir sayı (yaddaş üçün); FTS sənədləri hissə-hissə yazılır
+BULK_CHUNK = 5000
+
+_ENCODED_IDX = tuple(i for i, c in enumerate(LISTING_COLUMNS) if c in ENCODED_COLUMNS)
+_SUMMARY_IDX = LISTING_COLUMNS.index("summary")
+_PHONE_IDX = LISTING_COLUMNS.index("phone")
+_CREATED_IDX = LISTING_COLUMNS.index("created_at")
+_TYPED_IDX = LISTING_COLUMNS.index(TYPED_NAMES[0])  # tipli sütunlar sonda
+_FTS_IDX = tuple(LISTING_COLUMNS.index(c) for c in FTS_COLUMNS)
+
+# Fiziki cədvələ yazı; kodlaşdırılmış sütunlara _encode_params-dan id-lər düşür
+_INSERT_LISTING_SQL = (
+    f"INSERT INTO {LISTINGS_TABLE} ({', '.join(map(_base_col, LISTING_COLUMNS))}) "
+    f"VALUES ({', '.join('COALESCE(?, CURRENT_TIMESTAMP)' if c == 'created_at' else '?' for c in LISTING_COLUMNS)}) "
+    "ON CONFLICT DO NOTHING"
+)
+
+
+def _listing_params(rec):
+    """dict və ya tuple qeydini LISTING_COLUMNS ardıcıllığında tuple-a çevirir.
+
+    Telefon normal formaya salınır; verilməmiş tipli sütunlar mətn sahələrindən
+    çıxarılır (hamısı verilibsə parse edilmir).
+    """
+    if not isinstance(rec, dict):
+        rec = dict(zip(LISTING_COLUMNS, rec))
+    row = [rec.get(c) for c in LISTING_COLUMNS]
+    if row[_PHONE_IDX] is not None:
+        row[_PHONE_IDX] = normalize_phone(row[_PHONE_IDX])
+    if row[_CREATED_IDX] is not None:
+        row[_CREATED_IDX] = parse_timestamp(row[_CREATED_IDX])
+    if None in row[_TYPED_IDX:]:
+        typed = typed_fields(rec)
+        for i, col in enumerate(TYPED_NAMES, _TYPED_IDX):
+            if row[i] is None:
+                row[i] = typed[col]
+    return tuple(row)
+
+
+@_profiled
+def add_listings_bulk(records):
+    """Çoxlu elanı bir tranzaksiyada yazır.
+
+    Dublikatlar (phone + price + source_link) unikal indeks və
+    ON CONFLICT DO NOTHING ilə atılır. Telefonsuz qeydlər nəzərə alınmır.
+    Əlavə olunan sətirlərin FTS sənədi kodlaşdırmadan əvvəlki mətnlərdən
+    qurulur və hissə sonunda bir executemany ilə yazılır; phone_summary və
+    panel sayğacları da hissənin id aralığı üzrə bir dəfə yenilənir.
+    Qaytarır: (əlavə edilən, dublikat) sayları.
+    """
+    added = 0
+    dupes = 0
+    db = get_db()
+    new_ids = {}
+    with db.write() as conn:
+        cur = conn.cursor()
+        fts = _has_fts(conn)
+        chunk = []
+
+        def flush():
+            nonlocal added, dupes
+            docs = []
+            first_id = last_id = None
+            # Sətir-sətir: hansı sətrin əlavə olunduğu (rowcount) və id-si lazımdır
+            for params, row in chunk:
+                cur.execute(_INSERT_LISTING_SQL, row)
+                if cur.rowcount <= 0:
+                    dupes += 1
+                    continue
+                added += 1
+                last_id = cur.lastrowid
+                if first_id is None:
+                    first_id = last_id
+                if fts:
+                    docs.append((last_id,) + _fts_doc(params[i] for i in _FTS_IDX))
+            if docs:
+                cur.executemany(_FTS_INSERT_SQL, docs)
+            if first_id is not None:
+                # Yazı kilidi altındayıq: AUTOINCREMENT aralığı yalnız bu hissənin sətirləridir
+                _upsert_phone_summary(conn, first_id, last_id)
+                _add_listing_stats(conn, "id BETWEEN ? AND ?", (first_id, last_id))
+            chunk.clear()
+
+        for rec in records:
+            params = _listing_params(rec)
+            if not params[_PHONE_IDX]:
+                continue
+            chunk.append((params, _encode_params(conn, params, db.lookup_ids, new_ids)))
+            if len(chunk) >= BULK_CHUNK:
+                flush()
+        if chunk:
+            flush()
+    # Yalnız commit-dən sonra: rollback olunmuş id-lər keşə düşməməlidir
+    # (mətn hash-ları keşə düşmür — sayları məhdudsuzdur)
+    db.lookup_ids.update((k, v) for k, v in new_ids.items() if k[0] in ENCODED_COLUMNS)
+    return added, dupes
+
+
+def add_listing_row(rec):
+    """Yeni elan əlavə et (təkrarlanmaya qarşı yoxlama ilə)"""
+    if not rec.get("phone"):
+        return False
+    added, _ = add_listings_bulk([rec])
+    return added > 0
+
+
+# ---------- Sinxron vəziyyəti (sync_state) ----------
+# Hər mənbə üçün artıq yazılmış ən böyük insert_date_time və birincil açar.
+# İnkremental sinxron yalnız bu həddən sonrakıları çəkir; hədd yalnız irəli gedir.
+def get_sync_state(source):
+    """{last_inserted_at, last_id, rows, updated_at}; hələ sinxron olmayıbsa hədd
+    yerli bazadakı son date_read günündən başlayır (updated_at None).
+    """
+    conn = get_db().read()
+    row = conn.execute(
+        "SELECT last_inserted_at, last_id, rows, updated_at FROM sync_state WHERE source = ?", (source,)
+    ).fetchone()
+    if row:
+        return dict(zip(("last_inserted_at", "last_id", "rows", "updated_at"), row))
+    day = conn.execute(f"SELECT MAX(date_read_day) FROM {LISTINGS_TABLE}").fetchone()[0]
+    return {
+        "last_inserted_at": f"{day} 00:00:00" if day else None,
+        "last_id": None,
+        "rows": 0,
+        "updated_at": None,
+    }
+
+
+def advance_sync_state(source, inserted_at, last_id=None, rows=0):
+    """Həddi irəli çəkir (geri getmir); rows — bu hissədə əlavə olunan elan sayı."""
+    inserted_at = parse_timestamp(inserted_at)
+    with get_db().write() as conn:
+        conn.execute(
+            """
+            INSERT INTO sync_state (source, last_inserted_at, last_id, rows, updated_at)
+            VALUES (?, ?, ?, ?, strftime('%Y-%m-%d %H:%M:%S', 'now', 'localtime'))
+            ON CONFLICT(source) DO UPDATE SET
+                last_inserted_at = MAX(IFNULL(last_inserted_at, excluded.last_inserted_at),
+                                       IFNULL(excluded.last_inserted_at, last_inserted_at)),
+                last_id = MAX(IFNULL(last_id, excluded.last_id), IFNULL(excluded.last_id, last_id)),
+                rows = rows + excluded.rows,
+                updated_at = excluded.updated_at
+            """,
+            (source, inserted_at, last_id, rows),
+        )
+
+
+def reset_sync_state(source):
+    """Həddi silir — növbəti inkremental sinxron yenidən yerli son gündən başlayır."""
+    with get_db().write() as conn:
+        conn.execute("DELETE FROM sync_state WHERE source = ?", (source,))
+
+
+# ---------- Arxiv (isti / soyuq elanlar) ----------
+# ARCHIVE_DAYS gündən köhnə elanlar ayrıca fayla (ATTACH ... AS archive)
+# köçürülür. Əsas cədvəl sorğuları yalnız isti listings-ə baxır;
+# listings_all (TEMP VIEW) telefon tarixçəsi üçün hər ikisini birləşdirir.
+ARCHIVE_DAYS = 180
+# None — DB_PATH yanında "<ad>_archive.db"
+ARCHIVE_PATH = None
+# Bundan çox sətir köçürüləndə trigger-lər əvəzinə törəmə strukturlar yenidən qurulur
+ARCHIVE_REBUILD_ROWS = 20_000
+
+
+def archive_path():
+    if ARCHIVE_PATH is not None:
+        return Path(ARCHIVE_PATH)
+    db = Path(DB_PATH)
+    return db.with_name(f"{db.stem}_archive{db.suffix or '.db'}")
+
+
+def _attached(conn, name="archive"):
+    return any(row[1] == name for row in conn.execute("PRAGMA database_list"))
+
+
+def _attach_archive(conn, create=False):
+    """Arxiv faylını bağlantıya qoşur və listings_all görünüşünü yaradır.
+
+    Fayl yoxdursa (və create=False) heç nə etmir.
+    Qaytarır: arxivdə elan cədvəli var və listings_all hazırdırmı.
+    """
+    if not _attached(conn):
+        path = archive_path()
+        if conn.in_transaction or not (create or path.exists()):
+            return False
+        readonly = conn.execute("PRAGMA query_only").fetchone()[0]
+        target = f"{path.resolve().as_uri()}?mode=ro" if readonly else str(path)
+        conn.execute("ATTACH DATABASE ? AS archive", (target,))
+        if not readonly:
+            conn.execute("PRAGMA archive.journal_mode=WAL")
+    if not _table_exists(conn, "archive.listings"):
+        return False  # sxem hələ yaradılmayıb (archive_old_listings yaradır)
+    if conn.execute("SELECT 1 FROM temp.sqlite_master WHERE name = 'listings_all'").fetchone() is None:
+        _create_listings_all(conn)
+    return True
+
+
+def _archive_cols(conn, table, cols):
+    """Arxiv cədvəli üçün SELECT siyahısı; köhnə faylda olmayan sütunlar NULL.
+
+    v11-dən əvvəl arxivlənmiş sətirlərdə tam mətn summary sütunundadır,
+    v13-dən əvvəlkilərdə isə phone_id yoxdur (növbəti arxivləmə çevirir).
+    """
+    have = set(_table_columns(conn, table))
+    out = []
+    for col in cols:
+        if col in have:
+            out.append(col)
+        elif col == "summary_preview" and "summary" in have:
+            out.append("summary AS summary_preview")
+        elif col == "phone_id" and "phone" in have:
+            out.append(f"(SELECT p.id FROM main.phones p WHERE p.phone = normalize_phone({table}.phone)) AS phone_id")
+        else:
+            out.append(f"NULL AS {col}")
+    return ", ".join(out)
+
+
+def _create_listings_all(conn):
+    names = _table_columns(conn, "listings")
+    cols = ", ".join(names)
+    # query_only TEMP obyektləri də bloklayır; əsas fayllar mode=ro ilə qorunur
+    readonly = conn.execute("PRAGMA query_only").fetchone()[0]
+    conn.execute("PRAGMA query_only=0")
+    try:
+        conn.execute("DROP VIEW IF EXISTS temp.listings_all")
+        conn.execute(f"""
+            CREATE TEMP VIEW listings_all AS
+            SELECT {cols} FROM main.listings
+            UNION ALL
+            SELECT {_archive_cols(conn, "archive.listings", names)} FROM archive.listings
+        """)
+    finally:
+        conn.execute(f"PRAGMA query_only={int(readonly)}")
+
+
+def _history_source(conn, cols=None, where=None):
+    """Telefon tarixçəsi üçün mənbə: arxiv varsa listings_all, yoxsa listings.
+
+    cols (kodlaşdırılmamış sütunlar) verilsə — lookup join-ları olmadan əsas cədvəl
+    (SQLite görünüşdəki istifadəsiz LEFT JOIN-ları atmır və örtücü indeksi itirir);
+    where hər hissəyə ayrıca qoyulur — GROUP BY-lı sorğuda UNION ALL-a ötürülmür.
+    """
+    archived = _attach_archive(conn)
+    if not cols:
+        return "listings_all" if archived else "listings"
+    where = f" WHERE {where}" if where else ""
+    sql = f"SELECT {', '.join(cols)} FROM main.{LISTINGS_TABLE}{where}"
+    if archived:
+        sql += f" UNION ALL SELECT {_archive_cols(conn, 'archive.listings', cols)} FROM archive.listings{where}"
+    return f"({sql})"
+
+
+def _ensure_archive_schema(conn):
+    """archive.listings əsas cədvəlin sütunları ilə; çatışmayan sütunlar əlavə olunur.
+
+    Qaytarır: köhnə arxivin telefonları phone_id-yə çevrildimi.
+    """
+    info = conn.execute("PRAGMA main.table_info(listings)").fetchall()
+    if not _table_exists(conn, "archive.listings"):
+        defs = ", ".join(
+            "id INTEGER PRIMARY KEY" if name == "id" else f"{name} {col_type}"
+            for _, name, col_type, *_ in info
+        )
+        conn.execute(f"CREATE TABLE archive.listings ({defs})")
+    have = {r[1] for r in conn.execute("PRAGMA archive.table_info(listings)")}
+    for _, name, col_type, *_ in info:
+        if name not in have:
+            conn.execute(f"ALTER TABLE archive.listings ADD COLUMN {name} {col_type}")
+    converted = "phone_id" not in have
+    if converted:
+        # v13-dən əvvəl arxivlənmiş telefonlar da phones-a keçir
+        conn.execute("""
+            INSERT OR IGNORE INTO main.phones (phone)
+            SELECT DISTINCT normalize_phone(phone) FROM archive.listings
+            WHERE normalize_phone(phone) IS NOT NULL
+        """)
+        conn.execute("""
+            UPDATE archive.listings SET
+                phone = normalize_phone(phone),
+                phone_id = (SELECT id FROM main.phones WHERE phone = normalize_phone(archive.listings.phone))
+            WHERE phone IS NOT NULL
+        """)
+        conn.execute("DROP INDEX IF EXISTS archive.idx_archive_phone_date_read")
+        conn.execute("DROP INDEX IF EXISTS archive.idx_archive_created_phone")
+    conn.execute(
+        "CREATE INDEX IF NOT EXISTS archive.idx_archive_phone_date_read ON listings(phone_id, date_read, price)"
+    )
+    conn.execute(
+        "CREATE INDEX IF NOT EXISTS archive.idx_archive_created_phone ON listings(created_at, phone_id)"
+    )
+    if "summary" in have:
+        # v11-dən əvvəl arxivlənmiş mətnlər də summary_texts-ə keçir
+        new = {}
+        rows = conn.execute(
+            "SELECT id, summary FROM archive.listings WHERE summary IS NOT NULL AND summary_id IS NULL"
+        ).fetchall()
+        conn.executemany(
+            "UPDATE archive.listings SET summary_id = ?, summary_preview = ?, summary = NULL WHERE id = ?",
+            [(_summary_ref(conn, text, new), summary_preview(text), id_) for id_, text in rows],
+        )
+    return converted
+
+
+def _rebuild_archive_summary(conn):
+    """archive.phone_summary: yalnız arxivdəki elanlar üzrə telefon xülasəsi."""
+    conn.execute("DROP TABLE IF EXISTS archive.phone_summary")
+    conn.execute("CREATE TABLE archive.phone_summary AS SELECT * FROM main.phone_summary WHERE 0")
+    conn.execute("CREATE UNIQUE INDEX archive.ux_archive_summary_phone ON phone_summary(phone_id)")
+    conn.execute(
+        "CREATE INDEX archive.idx_archive_summary_created_phone ON phone_summary(created_at, phone_id)"
+    )
+    conn.execute(
+        f"INSERT INTO archive.phone_summary ({', '.join(_SUMMARY_ALL)}) "
+        + _SUMMARY_ALL_SQL.replace("FROM listings l", "FROM archive.listings l")
+    )
+
+
+@_profiled
+def archive_old_listings(days=None):
+    """days gündən köhnə elanları arxiv faylına köçürür. Qaytarır: köçürülən sətir sayı.
+
+    Əvvəl nüsxə commit olunur, sonra isti cədvəldən silinir — WAL-da iki
+    fayl arasında atomik commit yoxdur, amma bu ardıcıllıqla sətir itmir;
+    yarıda kəsilsə təkrar çağırış işi tamamlayır.
+    """
+    t0 = time.perf_counter()
+    days = ARCHIVE_DAYS if days is None else days
+    cutoff = (datetime.now() - timedelta(days=days)).strftime("%Y-%m-%d 00:00:00")
+    db = get_db()
+    with db._write_lock:
+        with db.write() as conn:
+            pass  # yazıcı bağlantı açılsın (ATTACH tranzaksiyadan kənarda olmalıdır)
+        _attach_archive(db._writer, create=True)
+
+        with db.write() as conn:
+            converted = _ensure_archive_schema(conn)
+            cols = ", ".join(_table_columns(conn, "listings"))
+            conn.execute(
+                f"INSERT OR IGNORE INTO archive.listings ({cols}) "
+                f"SELECT {cols} FROM main.listings WHERE created_at < ?",
+                (cutoff,),
+            )
+        _create_listings_all(db._writer)
+
+        with db.write() as conn:
+            moved_sql = (
+                f"FROM main.{LISTINGS_TABLE} WHERE created_at < ? "
+                "AND id IN (SELECT id FROM archive.listings WHERE created_at < ?)"
+            )
+            n = conn.execute(f"SELECT COUNT(*) {moved_sql}", (cutoff, cutoff)).fetchone()[0]
+            if n > ARCHIVE_REBUILD_ROWS:
+                # Böyük köçürmə: sətir-sətir trigger-lər əvəzinə sonda bir dəfə qur
+                for (trg,) in conn.execute(
+                    "SELECT name FROM sqlite_master WHERE type = 'trigger' AND tbl_name = ?",
+                    (LISTINGS_TABLE,),
+                ).fetchall():
+                    conn.execute(f"DROP TRIGGER {trg}")
+                conn.execute(f"DELETE {moved_sql}", (cutoff, cutoff))
+                for build in _DERIVED.values():
+                    build(conn)
+            elif n:
+                conn.execute(f"DELETE {moved_sql}", (cutoff, cutoff))
+            if n or converted:
+                _rebuild_archive_summary(conn)
+    print(f"📦 Arxivə {n} elan köçürüldü (< {cutoff[:10]}, {time.perf_counter() - t0:.2f} san)")
+    return n
+
+
+# ---------- Texniki xidmət (ANALYZE, vacuum, checkpoint, quick_check) ----------
+# Hər addım kiçik dilimlərə bölünmüş generatordur: bir dilim yazı kilidini
+# qısa tutur, dilimlər arasında istifadəçi aktivdirsə iş dayanır və növbəti
+# boş anda davam edir. İş fon axınında gedir — Tk dövrü heç nə gözləmir.
+MAINT_STEPS = ("optimize", "vacuum", "checkpoint", "quick_check")
+# App bu qədər boş qalanda və son uğurlu xidmətdən bu qədər keçəndə
+MAINT_IDLE_SECONDS = 120
+MAINT_INTERVAL_HOURS = 12
+# ANALYZE hər indeksdə ən çox bu qədər sətir oxuyur (PRAGMA analysis_limit)
+MAINT_ANALYSIS_LIMIT = 1000
+# incremental_vacuum bir dilimdə azad etdiyi səhifə sayı
+MAINT_VACUUM_PAGES = 128
+
+_maint_lock = threading.Lock()
+_maint_thread = None
+_maint_requested = False  # sinxrondan sonra — dayandırılsa da növbəti boş anda
+_maint_current = None
+
+
+def _maint_tables(conn, indexed=False):
+    sql = "SELECT name FROM sqlite_master WHERE type = 'table' AND name NOT LIKE 'sqlite_%'"
+    if indexed:
+        # FTS kölgə cədvəllərinin indeksi yoxdur — onları ANALYZE etmək boş skandır
+        sql += " AND name IN (SELECT tbl_name FROM sqlite_master WHERE type = 'index')"
+    return [r[0] for r in conn.execute(sql + " ORDER BY name")]
+
+
+def _maint_optimize(db):
+    with db.write() as conn:
+        tables = _maint_tables(conn, indexed=True)
+    for name in tables:
+        with db.write() as conn:
+            conn.execute(f"PRAGMA analysis_limit={int(MAINT_ANALYSIS_LIMIT)}")
+            conn.execute(f'ANALYZE "{name}"')
+        yield
+    with db.write() as conn:
+        conn.execute("PRAGMA optimize")
+    return f"{len(tables)} cədvəl analiz edildi"
+
+
+def _maint_vacuum(db):
+    with db.write() as conn:
+        mode = conn.execute("PRAGMA auto_vacuum").fetchone()[0]
+        free = conn.execute("PRAGMA freelist_count").fetchone()[0]
+    if mode != 2:
+        # Rejimi dəyişmək tam VACUUM tələb edir — uzun əməliyyatdır, əl ilə
+        return f"{free} boş səhifə; auto_vacuum söndürülüb (bir dəfə: besthome_core.py vacuum)"
+    freed = 0
+    while free:
+        with db._write_lock:
+            with db.write() as conn:
+                pass  # yazıcı bağlantı açılsın
+            # execute() hər addımda bir səhifə azad edib dayanır; executescript
+            # pragmanı sona qədər icra edir (tranzaksiyadan kənarda, avtokommit)
+            conn.executescript(f"PRAGMA incremental_vacuum({int(MAINT_VACUUM_PAGES)})")
+            left = conn.execute("PRAGMA freelist_count").fetchone()[0]
+        freed += free - left
+        free = left
+        yield
+    return f"{freed} səhifə azad edildi"
+
+
+def _maint_checkpoint(db):
+    # Ayrıca bağlantı: PASSIVE yazıcını və oxuyucuları bloklamır
+    conn = db._connect()
+    try:
+        busy, log, done = conn.execute("PRAGMA wal_checkpoint(PASSIVE)").fetchone()
+        yield
+        truncated = False
+        if not busy and log == done:
+            # Hamısı köçürülübsə WAL faylını da kəs (böyük sinxrondan sonra yüz MB-larla qalır)
+            conn.execute("PRAGMA busy_timeout=100")
+            truncated = not conn.execute("PRAGMA wal_checkpoint(TRUNCATE)").fetchone()[0]
+    finally:
+        conn.close()
+    return f"WAL: {done}/{log} səhifə köçürüldü" + (", fayl kəsildi" if truncated else "")
+
+
+def _maint_quick_check(db):
+    conn = db._connect(readonly=True)
+    try:
+        if sqlite3.sqlite_version_info < (3, 33, 0):
+            # Köhnə SQLite cədvəl arqumentini tanımır — bir dilimdə
+            tables = [None]
+        else:
+            tables = _maint_tables(conn)
+        errors = []
+        for name in tables:
+            arg = f'("{name}")' if name else ""
+            errors += [r[0] for r in conn.execute(f"PRAGMA quick_check{arg}") if r[0] != "ok"]
+            yield
+    finally:
+        conn.close()
+    if errors:
+        raise sqlite3.DatabaseError("; ".join(errors[:5]))
+    return "ok"
+
+
+_MAINT_FUNCS = {
+    "optimize": _maint_optimize,
+    "vacuum": _maint_vacuum,
+    "checkpoint": _maint_checkpoint,
+    "quick_check": _maint_quick_check,
+}
+
+
+def _record_maintenance(step, started, duration, status, result, reason):
+    with get_db().write() as conn:
+        conn.execute(
+            """
+            INSERT INTO maintenance_runs (step, started_at, duration_ms, status, result, reason)
+            VALUES (?, ?, ?, ?, ?, ?)
+            ON CONFLICT(step) DO UPDATE SET
+                started_at = excluded.started_at, duration_ms = excluded.duration_ms,
+                status = excluded.status, result = excluded.result, reason = excluded.reason
+            """,
+            (step, started, duration * 1000, status, result, reason),
+        )
+
+
+def run_maintenance(reason="manual", should_pause=None, steps=MAINT_STEPS):
+    """Xidmət addımlarını çağıran axında dilim-dilim icra edir.
+
+    should_pause() True qaytaranda cari addım dayandırılır (nəticə yazılmır).
+    Qaytarır: bütün addımlar tamamlandımı.
+    """
+    global _maint_current, _maint_requested
+    db = get_db()
+    for step in steps:
+        _maint_current = step
+        started = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        gen = _MAINT_FUNCS[step](db)
+        elapsed = 0.0
+        try:
+            while True:
+                t0 = time.perf_counter()
+                try:
+                    next(gen)
+                finally:
+                    elapsed += time.perf_counter() - t0
+                if should_pause and should_pause():
+                    gen.close()
+                    _maint_current = None
+                    return False
+        except StopIteration as done:
+            status, result = "ok", done.value
+        except Exception as e:
+            status, result = "xəta", str(e)
+        _record_maintenance(step, started, elapsed, status, result, reason)
+        print(f"🧰 {step}: {result} ({elapsed * 1000:.0f} ms)")
+    _maint_current = None
+    _maint_requested = False
+    return True
+
+
+def maintenance_due(interval_hours=None):
+    """Xidmət vaxtıdırmı: sinxrondan sonra istənilib və ya son uğurlu icra köhnədir."""
+    if _maint_requested:
+        return True
+    hours = MAINT_INTERVAL_HOURS if interval_hours is None else interval_hours
+    since = (datetime.now() - timedelta(hours=hours)).strftime("%Y-%m-%d %H:%M:%S")
+    done = get_db().read().execute(
+        "SELECT COUNT(*) FROM maintenance_runs WHERE status = 'ok' AND started_at >= ?", (since,)
+    ).fetchone()[0]
+    return done < len(MAINT_STEPS)
+
+
+def start_maintenance(reason="idle", should_pause=None, force=False):
+    """Xidməti fon axınında başladır (artıq işləyirsə və ya vaxtı deyilsə None)."""
+    global _maint_thread, _maint_requested
+    with _maint_lock:
+        if force:
+            _maint_requested = True
+        if _maint_thread is not None and _maint_thread.is_alive():
+            return None
+        if not maintenance_due():
+            return None
+
+        def work():
+            try:
+                run_maintenance(reason, should_pause)
+            except Exception as e:
+                print(f"[⚠️ Texniki xidmət] {e}")
+
+        _maint_thread = threading.Thread(target=work, name="db-maintenance", daemon=True)
+        _maint_thread.start()
+        return _maint_thread
+
+
+def maintenance_status():
+    """Son icraların nəticələri: {addım: {started_at, duration_ms, status, result, reason}}.
+
+    "running" açarı hazırda icra olunan addımın adıdır (yoxdursa None).
+    """
+    rows = get_db().read().execute(
+        "SELECT step, started_at, duration_ms, status, result, reason FROM maintenance_runs"
+    ).fetchall()
+    out = {
+        step: {"started_at": s, "duration_ms": d, "status": st, "result": r, "reason": why}
+        for step, s, d, st, r, why in rows
+    }
+    out["running"] = _maint_current
+    return out
+
+
+def vacuum_database():
+    """Tam VACUUM + auto_vacuum=INCREMENTAL (bir dəfəlik; bütün yazıları gözlədir)."""
+    t0 = time.perf_counter()
+    db = get_db()
+    with db._write_lock:
+        with db.write():
+            pass  # yazıcı bağlantı açılsın (VACUUM tranzaksiyadan kənarda olmalıdır)
+        conn = db._writer
+        before = conn.execute("PRAGMA page_count").fetchone()[0]
+        conn.execute("PRAGMA auto_vacuum=INCREMENTAL")
+        conn.execute("VACUUM")
+        after = conn.execute("PRAGMA page_count").fetchone()[0]
+    print(f"✅ VACUUM: {before} → {after} səhifə ({time.perf_counter() - t0:.1f} san)")
+    return before - after
+
+
+# ---------- Fərqləndirilənlər / Satılanlar ----------
+# Telefon istənilən yazılışda verilə bilər — normal formaya salınıb phone_id
+# kimi saxlanılır. Boş/yanlış nömrədə heç nə yazılmır (False).
+def set_favorite_phone(phone, color="#e8f2ff"):
+    phone = normalize_phone(phone)
+    if not phone:
+        return False
+    with get_db().write() as conn:
+        conn.execute(
+            "INSERT OR REPLACE INTO favorites (phone_id, color) VALUES (?,?)",
+            (_phone_ref(conn, phone, {}), color),
+        )
+    return True
+
+
+@_profiled
+def get_favorites_phones_map():
+    c = get_db().read().cursor()
+    c.execute("SELECT p.phone, f.color FROM favorites f JOIN phones p ON p.id = f.phone_id")
+    return {row[0]: row[1] for row in c.fetchall()}
+
+
+def add_sold(phone):
+    phone = normalize_phone(phone)
+    if not phone:
+        return False
+    with get_db().write() as conn:
+        conn.execute("INSERT OR REPLACE INTO sold (phone_id) VALUES (?)", (_phone_ref(conn, phone, {}),))
+    return True
+
+
+def remove_sold(phone):
+    phone = normalize_phone(phone)
+    if not phone:
+        return False
+    with get_db().write() as conn:
+        conn.execute("DELETE FROM sold WHERE phone_id = (SELECT id FROM phones WHERE phone = ?)", (phone,))
+    return True
+
+
+@_profiled
+def get_sold_set():
+    c = get_db().read().cursor()
+    c.execute("SELECT p.phone FROM sold s JOIN phones p ON p.id = s.phone_id")
+    return {r[0] for r in c.fetchall()}
+
+
+# ---------- Əsas Query ----------
+@_profiled
+def query_phones_summary(
+    keyword=None,
+    limit=500,
+    date_from=None,
+    date_to=None,
+    exclude_sold=False,
+    only_sold=False,
+    only_favorites=False,
+    operations=None,
+    prop_types=None,
+    buildings=None,
+    metros=None,
+    rooms=None,
+    price_min=None,
+    price_max=None,
+    area_min=None,
+    area_max=None,
+    floor_min=None,
+    floor_max=None,
+    cursor=None,
+    include_archive=False,
+):
+    """Telefonlar üzrə xülasə (hər telefon bir sətir, ən yeni əvvəl).
+
+    cursor — əvvəlki səhifənin page_cursor() nəticəsi; verilərsə növbəti
+    səhifə (keyset: son created_at + phone_id-dən sonrakılar) qaytarılır.
+
+    include_archive — arxivdəki telefonlar da daxil edilir (yavaş rejim):
+    ad_count hər iki hissəni sayır; açar söz isti elanlarda FTS, arxiv
+    elanlarında LIKE ilə axtarılır, sıralama isə bm25 yox, tarix üzrədir.
+
+    Bütün filtrlər bir parametrli SQL sorğusunda tətbiq olunur:
+    operations/prop_types/buildings/metros/rooms — dəyərlər çoxluğu (boşdursa filtr yoxdur),
+    price_*/area_* (kvm)/floor_* — daxil olmaqla diapazon sərhədləri (None — sərhəd yoxdur).
+    Açar söz, bu filtrlər və tarix aralığı telefonun hər hansı elanına baxır
+    (hamısı eyni elanda ödənməlidir); sətirdə göstərilən dəyərlər isə ən son elanındır.
+    date_from/date_to verilərsə ad_count, first_created_at və sətir dəyərləri
+    yalnız aralıqdakı elanlar üzrədir (aralıqdakı ən son elan).
+    """
+    conn = get_db().read()
+    cur = conn.cursor()
+    cur.row_factory = sqlite3.Row
+
+    select = """
+        SELECT
+            s.phone_id,
+            s.phone,
+            s.date_read,
+            s.created_at,
+            s.prop_type,
+            s.building,
+            s.operation,
+            s.metro,
+            s.rooms,
+            s.floor,
+            s.area_kvm,
+            s.price,
+            s.currency,
+            s.ad_count,
+            s.contact_name,
+            s.address,
+            s.document,
+            s.summary_id,
+            s.summary_preview,
+            s.source_link,
+            s.area_sot,
+            s.area_kvm_num,
+            s.floor_current,
+            s.floor_total,
+            s.rooms_num,
+            s.price_num,
+            s.date_read_day
+    """
+    source = "phone_summary s"
+    source_params = []
+    base = " WHERE 1=1"
+    params = []
+
+    if (
+        include_archive
+        and _attach_archive(conn)
+        and _table_exists(conn, "archive.phone_summary")
+        # v13-dən əvvəlki xülasə növbəti archive_old_listings-də yenidən qurulur
+        and "phone_id" in _table_columns(conn, "archive.phone_summary")
+    ):
+        # İsti telefonların sətri qalır (arxiv sayı əlavə olunur), yalnız arxivdə olanlar sona
+        hot_cols = ", ".join(
+            "m.ad_count + IFNULL(a.ad_count, 0) AS ad_count" if col == "ad_count"
+            else "MIN(m.first_created_at, IFNULL(a.first_created_at, m.first_created_at)) AS first_created_at"
+            if col == "first_created_at" else f"m.{col}"
+            for col in _SUMMARY_ALL
+        )
+        cols = _archive_cols(conn, "archive.phone_summary", _SUMMARY_ALL)
+        source = f"""(
+            SELECT {hot_cols} FROM main.phone_summary m
+            LEFT JOIN archive.phone_summary a ON a.phone_id = m.phone_id
+            UNION ALL
+            SELECT {cols} FROM archive.phone_summary
+            WHERE phone_id NOT IN (SELECT phone_id FROM main.phone_summary)
+        ) s"""
+    else:
+        include_archive = False
+
+    # 📅 Tarix aralığı: ad_count, ilk tarix və göstərilən (ən son) elan yalnız
+    # aralıqdakı elanlar üzrə hesablanır. Yarımaçıq aralıq idx_listings_created_phone
+    # üzərində range-scan olur — xərc aralıqdakı sətirlərə mütənasibdir.
+    day_lo, day_hi = day_range(date_from, date_to)
+    date_cond = []
+    date_params = []
+    if day_lo:
+        date_cond.append("created_at >= ?")
+        date_params.append(day_lo)
+    if day_hi:
+        date_cond.append("created_at < ?")
+        date_params.append(day_hi)
+    date_where = " AND ".join(date_cond)
+    if date_cond:
+        if include_archive:
+            sql = _SUMMARY_ALL_SQL.replace("FROM listings l", "FROM listings_all l").replace(
+                "WHERE phone_id IS NOT NULL", f"WHERE phone_id IS NOT NULL AND {date_where}"
+            )
+        else:
+            sql = _summary_subset_sql(date_where)
+        source = f"({sql}) s"
+        source_params += date_params
+
+    # 🏷️ Elan şərtləri — açar söz, başlıq (overlay) filtrləri və tarix aralığı
+    # telefonun eyni bir elanında ödənməlidir (yalnız ən sonuncusunda yox).
+    # cond isti cədvələ (dəyərlər lookup id-ləri ilə), arch_cond arxiv cədvəlinə aiddir.
+    cond = []
+    cond_params = []
+    arch_cond = []
+    arch_params = []
+    for col, values in (
+        ("operation", operations),
+        ("prop_type", prop_types),
+        ("building", buildings),
+        ("metro", metros),
+        ("rooms", rooms),
+    ):
+        if values:
+            values = list(values)
+            marks = ",".join("?" * len(values))
+            cond.append(
+                f"l.{_base_col(col)} IN (SELECT id FROM lookup_values WHERE col = '{col}' AND value IN ({marks}))"
+            )
+            cond_params += values
+            arch_cond.append(f"l.{col} IN ({marks})")
+            arch_params += values
+
+    for col, lo, hi in (
+        ("price_num", price_min, price_max),
+        ("area_kvm_num", area_min, area_max),
+        ("floor_current", floor_min, floor_max),
+    ):
+        for op, value in ((">=", lo), ("<=", hi)):
+            if value is not None:
+                cond.append(f"l.{col} {op} ?")
+                cond_params.append(value)
+                arch_cond.append(f"l.{col} {op} ?")
+                arch_params.append(value)
+
+    per_listing = bool(keyword or cond)
+    cond += [f"l.{c}" for c in date_cond]
+    cond_params += date_params
+    arch_cond += [f"l.{c}" for c in date_cond]
+    arch_params += date_params
+
+    # 🔍 Açar söz: isti elanlarda FTS5 MATCH (rank = bm25), FTS yoxdursa və
+    # arxivdəki elanlarda LIKE — hər iki halda elan üzrə
+    match = _fts_query(keyword) if keyword else None
+    has_fts = bool(match and _has_fts(conn))
+    fts = has_fts and not include_archive
+    if keyword and not fts:
+        kw = f"%{keyword.lower()}%"
+        if has_fts:
+            cond.insert(0, "l.id IN (SELECT rowid FROM listings_fts WHERE listings_fts MATCH ?)")
+            cond_params.insert(0, match)
+        else:
+            cond.insert(0, f"l.id IN (SELECT v.id FROM listings v WHERE {_keyword_like_sql('v')})")
+            cond_params[:0] = [kw] * 5
+        arch_cond.insert(0, _keyword_like_sql("l"))
+        arch_params[:0] = [kw] * 5
+
+    if per_listing and include_archive:
+        # listings_all (UNION ALL) korrelyasiyalı alt sorğuda hər telefon üçün
+        # bütövlükdə skan olunur — uyğun telefonlar hər hissədən bir dəfə yığılır
+        base += (
+            f" AND s.phone_id IN (SELECT l.phone_id FROM main.{LISTINGS_TABLE} l WHERE {' AND '.join(cond)}"
+            f" UNION ALL SELECT l.phone_id FROM archive.listings l WHERE {' AND '.join(arch_cond)})"
+        )
+        params += cond_params + arch_params
+    elif per_listing and not fts:
+        # EXISTS telefonun elanlarını phone_id indeksi ilə yoxlayır
+        base += f" AND EXISTS (SELECT 1 FROM {LISTINGS_TABLE} l WHERE l.phone_id = s.phone_id AND {' AND '.join(cond)})"
+        params += cond_params
+
+    # ⚙️ Satılan / favorit filtrləri (telefon üzrə)
+    phone_cond = None
+    if only_sold:
+        phone_cond = "phone_id IN (SELECT phone_id FROM sold)"
+    elif only_favorites:
+        phone_cond = "phone_id IN (SELECT phone_id FROM favorites)"
+    elif exclude_sold:
+        phone_cond = "phone_id NOT IN (SELECT phone_id FROM sold)"
+    if phone_cond:
+        base += f" AND s.{phone_cond}"
+
+    # 📄 Keyset səhifələmə
+    key = _decode_cursor(cursor) if cursor else None
+    if not fts:
+        if key:
+            base += " AND (s.created_at, s.phone_id) < (?, ?)"
+            params += key[-2:]
+        cur.execute(
+            f"{select} FROM {source} {base} ORDER BY s.created_at DESC, s.phone_id DESC LIMIT ?",
+            source_params + params + [limit],
+        )
+        return cur.fetchall()
+
+    # FTS: şərtləri ödəyən uyğun elanlar rowid üzrə FTS_CANDIDATES-lik pəncərələrlə
+    # (ən yenidən) gəzilir; pəncərə daxilində telefonlar bm25 ilə sıralanır və telefon
+    # ən yeni uyğun elanının pəncərəsində bir dəfə çıxır. Kursor pəncərənin yuxarı
+    # sərhədini (fts_hi) daşıyır. Daha yeni pəncərələrin telefonları sorğuda bir
+    # dəfə yığılır, sonrakı pəncərələrdə çıxanlar isə Python-da əlavə olunur.
+    # Satılan/favorit filtri də pəncərəyə daxildir ki, seçici filtrdə boş pəncərələr
+    # yığılmasın. CROSS JOIN FTS-i xarici dövrədə saxlayır (rowid=? ilə FTS yoxlaması bahadır).
+    if phone_cond:
+        cond.append(f"l.{phone_cond}")
+    qual = (
+        f"FROM listings_fts f CROSS JOIN {LISTINGS_TABLE} l ON l.id = f.rowid"
+        f" WHERE listings_fts MATCH ? AND l.phone_id IS NOT NULL{''.join(' AND ' + c for c in cond)}"
+    )
+    qual_params = [match] + cond_params
+    if date_cond:
+        # Aralıqdakı elanların id sərhədləri (örtücü indekslə) — FTS yalnız bu
+        # rowid aralığında gəzilir, aralıqdan kənar uyğunluqlar oxunmur
+        id_lo, id_hi = conn.execute(
+            f"SELECT MIN(id), MAX(id) FROM {LISTINGS_TABLE} WHERE {date_where}", date_params
+        ).fetchone()
+        if id_lo is None:
+            return []
+        qual += " AND f.rowid BETWEEN ? AND ?"
+        qual_params += [id_lo, id_hi]
+    hi = _FTS_MAX_ROWID
+    keyset = ""
+    keyset_params = []
+    if key and len(key) == 4:
+        hi = key[0]
+        keyset = " WHERE score > ? OR (score = ? AND (created_at, phone_id) < (?, ?))"
+        keyset_params = [key[1], key[1], key[2], key[3]]
+    seen = set()
+    if hi < _FTS_MAX_ROWID:
+        seen = {r[0] for r in conn.execute(f"SELECT DISTINCT l.phone_id {qual} AND f.rowid > ?", qual_params + [hi])}
+    if date_cond:
+        # Aralıq xülasəsi yalnız pəncərənin telefonları üçün hesablanır
+        source = f"({_summary_subset_sql(date_where, hits=True)}) s"
+        score = "s.score"
+    else:
+        source = "json_each(?) h CROSS JOIN phone_summary s ON s.phone_id = CAST(h.key AS INTEGER)"
+        score = "h.value"
+    select += f", {score} AS score, ? AS fts_hi"
+    rows = []
+    while True:
+        lo = hi
+        n = 0
+        hits = {}
+        for phone_id, score, first, cnt in conn.execute(
+            "SELECT phone_id, MIN(score), MIN(id), COUNT(*) FROM ("
+            f"SELECT f.rowid AS id, l.phone_id AS phone_id, f.rank AS score {qual} AND f.rowid <= ?"
+            " ORDER BY f.rowid DESC LIMIT ?) GROUP BY phone_id",
+            qual_params + [hi, FTS_CANDIDATES],
+        ):
+            lo = min(lo, first)
+            n += cnt
+            if phone_id not in seen:
+                hits[phone_id] = score
+        if not n:
+            return rows
+        seen.update(hits)
+        if hits:
+            doc = json.dumps(hits)
+            cur.execute(
+                f"SELECT * FROM ({select} FROM {source} {base}){keyset}"
+                " ORDER BY score, created_at DESC, phone_id DESC LIMIT ?",
+                [hi, doc] + (date_params if date_cond else []) + params + keyset_params + [limit - len(rows)],
+            )
+            rows += cur.fetchall()
+            if len(rows) >= limit:
+                return rows
+        # Pəncərə tükəndi — tam idisə növbəti (köhnə) pəncərəyə keç
+        if n < FTS_CANDIDATES:
+            return rows
+        hi = lo - 1
+        keyset = ""
+        keyset_params = []
+
+
+def encode_cursor(row):
+    """Sətirdən ([fts_hi, score,] created_at, phone_id) ibarət şəffaf kursor düzəldir."""
+    key = [row["created_at"], row["phone_id"]]
+    if "score" in row.keys():
+        key[:0] = [row["fts_hi"], row["score"]]
+    return base64.urlsafe_b64encode(json.dumps(key).encode("utf-8")).decode("ascii")
+
+
+def _decode_cursor(cursor):
+    try:
+        key = json.loads(base64.urlsafe_b64decode(cursor.encode("ascii")))
+    except Exception:
+        return None
+    return key if isinstance(key, list) and len(key) in (2, 4) else None
+
+
+def page_cursor(rows, limit):
+    """Tam səhifə gəlibsə növbəti səhifənin kursoru, əks halda None."""
+    if rows and len(rows) >= limit:
+        return encode_cursor(rows[-1])
+    return None
+
+
+# ---------- Filtr dəyərləri keşi ----------
+# Overlay filtrlərinin sütunları — SQL-ə yalnız bu adlar düşə bilər
+DISTINCT_COLUMNS = ("operation", "prop_type", "building", "metro", "rooms")
+
+_distinct_cache = {}  # col -> (db.version(), values)
+_distinct_lock = threading.Lock()
+
+
+def _load_distinct(col):
+    # Kodlaşdırılmış sütunların dəyərləri lookup cədvəlindən — yalnız hələ
+    # istinad olunanlar: lookup_values təmizlənmir, silinən/arxivlənən elanların
+    # dəyərləri orada qalır. EXISTS ilk uyğun sətirdə dayanır (col DISTINCT_COLUMNS-dandır).
+    c = get_db().read().cursor()
+    c.execute(
+        f"""
+        SELECT value FROM lookup_values lv
+        WHERE col = ? AND TRIM(value) != ''
+          AND EXISTS (SELECT 1 FROM {LISTINGS_TABLE} d WHERE d.{col}_id = lv.id)
+        ORDER BY value ASC
+        """,
+        (col,),
+    )
+    return [r[0] for r in c.fetchall()]
+
+
+@_profiled
+def get_distinct_values(col):
+    """Sütunun fərqli dəyərləri (keşdən; baza dəyişibsə — başqa prosesdə də — yenidən oxunur)."""
+    if col not in DISTINCT_COLUMNS:
+        raise ValueError(f"Filtr sütunu deyil: {col}")
+    db = get_db()
+    gen = db.version()
+    with _distinct_lock:
+        hit = _distinct_cache.get(col)
+    if hit is not None and hit[0] == gen:
+        return list(hit[1])
+    values = _load_distinct(col)
+    with _distinct_lock:
+        _distinct_cache[col] = (gen, values)
+    return list(values)
+
+
+def warm_distinct_cache(background=True):
+    """Bütün filtr sütunlarının keşini doldurur (default: fon axınında)."""
+
+    def work():
+        try:
+            for col in DISTINCT_COLUMNS:
+                get_distinct_values(col)
+        except Exception as e:
+            print(f"[⚠️ Filtr keşi] {e}")
+
+    if not background:
+        work()
+        return None
+    t = threading.Thread(target=work, name="distinct-warmup", daemon=True)
+    t.start()
+    return t
+
+
+# ---------- Dəstək funksiyalar ----------
+
+
+# Telefon üzrə nəticələrin LRU keşi: (növ, telefon) -> (db.version(), dəyər)
+PHONE_CACHE_SIZE = 4096
+
+_phone_cache = OrderedDict()
+_phone_cache_lock = threading.Lock()
+
+
+def _phone_keys(phones):
+    return [k for k in dict.fromkeys(normalize_phone(p) for p in phones) if k]
+
+
+def _phone_cached(kind, phones, load, use_cache=True):
+    """Keşdə olmayan telefonları bir load(keys) çağırışı ilə oxuyur.
+
+    Qiymət db.version() ilə yadda saxlanır — listings dəyişəndə (başqa
+    prosesin yazısı da daxil) özü köhnəlir.
+    """
+    keys = _phone_keys(phones)
+    gen = get_db().version()
+    out = {}
+    missing = []
+    with _phone_cache_lock:
+        for k in keys:
+            hit = _phone_cache.get((kind, k)) if use_cache else None
+            if hit is not None and hit[0] == gen:
+                _phone_cache.move_to_end((kind, k))
+                out[k] = hit[1]
+            else:
+                missing.append(k)
+    if missing:
+        loaded = load(missing)
+        with _phone_cache_lock:
+            for k in missing:
+                out[k] = loaded[k]
+                if use_cache:
+                    _phone_cache[(kind, k)] = (gen, loaded[k])
+                    _phone_cache.move_to_end((kind, k))
+            while len(_phone_cache) > PHONE_CACHE_SIZE:
+                _phone_cache.popitem(last=False)
+    return out
+
+
+def _load_listings(keys):
+    conn = get_db().read()
+    ids = _phone_ids(conn, keys)
+    out = {k: [] for k in keys}
+    if ids:
+        c = conn.cursor()
+        c.row_factory = sqlite3.Row
+        c.execute(
+            f"""
+            SELECT * FROM {_history_source(conn)}
+            WHERE phone_id IN (SELECT value FROM json_each(?))
+            ORDER BY phone_id, date_read DESC
+            """,
+            (json.dumps(list(ids)),),
+        )
+        for row in c.fetchall():
+            out[ids[row["phone_id"]]].append(row)
+    return {k: tuple(v) for k, v in out.items()}
+
+
+def _stats_dict(min_d=None, max_d=None, cnt=0, avg_p=None, min_p=None, max_p=None):
+    trend = None
+    if min_p and max_p and min_p != 0:
+        trend = ((max_p - min_p) / min_p) * 100
+    return {
+        "first_date": min_d,
+        "last_date": max_d,
+        "count": cnt,
+        "avg_price": avg_p,
+        "min_price": min_p,
+        "max_price": max_p,
+        "trend_pct": trend,
+    }
+
+
+def _load_stats(keys):
+    conn = get_db().read()
+    ids = _phone_ids(conn, keys)
+    out = {k: _stats_dict() for k in keys}
+    if not ids:
+        return out
+    source = _history_source(
+        conn, ("phone_id", "date_read", "price"), "phone_id IN (SELECT value FROM json_each(:ids))"
+    )
+    c = conn.cursor()
     c.execute(
-        "SELECT id FROM listings WHERE phone=? AND price=? AND source_link IS ?",
-        (rec.get("phone"), rec.get("price"), rec.get("source_link")),
+        f"""
+        SELECT phone_id,
+            MIN(date_read), MAX(date_read),
+            COUNT(*), AVG(price), MIN(price), MAX(price)
+        FROM {source}
+        GROUP BY phone_id
+        """,
+        {"ids": json.dumps(list(ids))},
     )
-    exists = c.fetchone()
-    if exists:
-        conn.close()
-        return False
-
-    cols = list(rec.keys())
-    vals = [rec[k] for k in cols]
-    placeholders = ",".join(["?"] * len(cols))
-    sql = f"INSERT INTO listings ({','.join(cols)}) VALUES ({placeholders})"
-    try:
-        c.execute(sql, vals)
-        conn.commit()
-    except Exception as e:
-        print(f"[⚠️ Əlavə edilə bilmədi] {e}")
-    finally:
-        conn.close()
-    return True
-
-
-# ---------- Fərqləndirilənlər / Satılanlar ----------
-def set_favorite_phone(phone, color="#e8f2ff"):
-    conn = sqlite3.connect(DB_PATH)
-    conn.execute(
-        "INSERT OR REPLACE INTO favorites (phone, color) VALUES (?,?)", (phone, color)
-    )
-    conn.commit()
-    conn.close()
-
-
-def get_favorites_phones_map():
-    conn = sqlite3.connect(DB_PATH)
-    c = conn.cursor()
-    c.execute("SELECT phone, color FROM favorites")
-    data = {row[0]: row[1] for row in c.fetchall()}
-    conn.close()
-    return data
-
-
-def add_sold(phone):
-    conn = sqlite3.connect(DB_PATH)
-    conn.execute("INSERT OR REPLACE INTO sold (phone) VALUES (?)", (phone,))
-    conn.commit()
-    conn.close()
-
-
-def remove_sold(phone):
-    conn = sqlite3.connect(DB_PATH)
-    conn.execute("DELETE FROM sold WHERE phone=?", (phone,))
-    conn.commit()
-    conn.close()
-
-
-def get_sold_set():
-    conn = sqlite3.connect(DB_PATH)
-    c = conn.cursor()
-    c.execute("SELECT phone FROM sold")
-    rows = {r[0] for r in c.fetchall()}
-    conn.close()
-    return rows
-
-
-# ---------- Əsas Query ----------
-def query_phones_summary(
-    keyword=None,
-    limit=500,
-    date_from=None,
-    date_to=None,
-    exclude_sold=False,
-    only_sold=False,
-    only_favorites=False,
-):
-    conn = sqlite3.connect(DB_PATH)
-    conn.row_factory = sqlite3.Row
-    cur = conn.cursor()
-
-    base = """
-        SELECT
-            phone,
-            MAX(date_read) AS date_read,
-            MAX(created_at) AS created_at,
-            MAX(prop_type) AS prop_type,
-            MAX(building) AS building,
-            MAX(operation) AS operation,
-            MAX(metro) AS metro,
-            MAX(rooms) AS rooms,
-            MAX(floor) AS floor,
-            MAX(area_kvm) AS area_kvm,
-            MAX(price) AS price,
-            MAX(currency) AS currency,
-            COUNT(*) AS ad_count,
-            MAX(contact_name) AS contact_name,
-            MAX(address) AS address,
-            MAX(document) AS document,
-            MAX(summary) AS summary,
-            MAX(source_link) AS source_link
-        FROM listings
-        WHERE 1=1
-    """
-    params = []
-
-    # 🔍 Axtarış sözü varsa
-    if keyword:
-        kw = f"%{keyword.lower()}%"
-        base += " AND (LOWER(phone) LIKE ? OR LOWER(metro) LIKE ? OR LOWER(address) LIKE ?)"
-        params += [kw, kw, kw]
-
-    # 📅 Tarix filtrləri
-    if date_from:
-        base += " AND date(created_at) >= date(?)"
-        params.append(date_from)
-    if date_to:
-        base += " AND date(created_at) <= date(?)"
-        params.append(date_to)
-
-    # ⚙️ Satılan / favorit filtrləri
-    if only_sold:
-        base += " AND phone IN (SELECT phone FROM sold)"
-    elif only_favorites:
-        base += " AND phone IN (SELECT phone FROM favorites)"
-    elif exclude_sold:
-        base += " AND phone NOT IN (SELECT phone FROM sold)"
-
-    base += " GROUP BY phone ORDER BY MAX(created_at) DESC LIMIT ?"
-    params.append(limit)
-
-    cur.execute(base, params)
-    rows = cur.fetchall()
-    conn.close()
-    return rows
-
-
-# ---------- Dəstək funksiyalar ----------
-def get_distinct_values(col):
-    conn = sqlite3.connect(DB_PATH)
-    c = conn.cursor()
-    c.execute(
-        f"SELECT DISTINCT {col} FROM listings WHERE {col} IS NOT NULL AND TRIM({col}) != '' ORDER BY {col} ASC"
-    )
-    vals = [r[0] for r in c.fetchall()]
-    conn.close()
-    return vals
-
-
-def get_listings_by_phone(phone):
-    conn = sqlite3.connect(DB_PATH)
-    conn.row_factory = sqlite3.Row
-    c = conn.cursor()
-    c.execute("SELECT * FROM listings WHERE phone=? ORDER BY date_read DESC", (phone,))
-    rows = c.fetchall()
-    conn.close()
-    return rows
-
-
-def phone_stats(phone):
-    conn = sqlite3.connect(DB_PATH)
-    c = conn.cursor()
-    c.execute(
-        """
-        SELECT 
-            MIN(date_read), MAX(date_read),
-            COUNT(*), AVG(price), MIN(price), MAX(price)
-        FROM listings WHERE phone=?
-    """,
-        (phone,),
-    )
-    r = c.fetchone()
-    conn.close()
-    if not r:
-        return {}
-    min_d, max_d, cnt, avg_p, min_p, max_p = r
-    trend = None
-    if min_p and max_p and min_p != 0:
-        trend = ((max_p - min_p) / min_p) * 100
-    return {
-        "first_date": min_d,
-        "last_date": max_d,
-        "count": cnt,
-        "avg_price": avg_p,
-        "min_price": min_p,
-        "max_price": max_p,
-        "trend_pct": trend,
-    }
-
-
-def normalize_phone(p):
-    if not p:
-        return None
-    p = str(p)
-    p = p.replace(" ", "").replace("-", "").replace("(", "").replace(")", "")
-    if p.startswith("+994"):
-        p = "0" + p[4:]
-    elif not p.startswith("0") and len(p) == 9:
-        p = "0" + p
-    return p.strip()
+    for phone_id, *vals in c.fetchall():
+        out[ids[phone_id]] = _stats_dict(*vals)
+    return out
+
+
+@_profiled
+def listings_by_phones(phones, use_cache=True):
+    """Telefonların elanları bir sorğu ilə: {normal telefon: (Row, ...)} (date_read DESC).
+
+    Arxiv varsa tam tarixçə (isti + arxiv) qaytarılır; phone_stats_many də eyni.
+    """
+    return _phone_cached("listings", phones, _load_listings, use_cache)
+
+
+@_profiled
+def phone_stats_many(phones, use_cache=True):
+    """Telefonların statistikası bir sorğu ilə: {normal telefon: phone_stats dict}."""
+    return _phone_cached("stats", phones, _load_stats, use_cache)
+
+
+def get_listings_by_phone(phone):
+    return list(listings_by_phones([phone]).get(normalize_phone(phone), ()))
+
+
+def phone_stats(phone):
+    return phone_stats_many([phone]).get(normalize_phone(phone)) or _stats_dict()
+
+
+# ---------- Komanda sətri ----------
+def main(argv=None):
+    """python besthome_core.py [--db FAYL] <əmr> — baza xidməti əmrləri."""
+    import argparse
+
+    global DB_PATH
+
+    parser = argparse.ArgumentParser(description="BestHome baza xidməti əmrləri")
+    parser.add_argument("--db", help="besthome.db faylının yolu")
+    sub = parser.add_subparsers(dest="cmd", required=True)
+    sub.add_parser("migrate", help="sxemi son versiyaya yenilə")
+    sub.add_parser("rebuild-summary", help="phone_summary-ni yenidən qur")
+    sub.add_parser("check-summary", help="phone_summary uyğunluğunu yoxla")
+    sub.add_parser("rebuild-stats", help="panel statistikasını yenidən hesabla")
+    sub.add_parser("backfill", help="tipli sütunları köhnə sətirlər üçün doldur")
+    p_archive = sub.add_parser("archive", help="köhnə elanları arxiv faylına köçür")
+    p_archive.add_argument("--days", type=int, default=ARCHIVE_DAYS)
+    sub.add_parser("maintenance", help="ANALYZE, incremental vacuum, checkpoint, quick_check")
+    sub.add_parser("vacuum", help="tam VACUUM və auto_vacuum=INCREMENTAL (bir dəfəlik)")
+    args = parser.parse_args(argv)
+
+    if args.db:
+        DB_PATH = Path(args.db)
+    migrate()
+
+    if args.cmd == "rebuild-summary":
+        rebuild_phone_summary()
+    elif args.cmd == "rebuild-stats":
+        rebuild_listing_stats()
+    elif args.cmd == "backfill":
+        backfill_typed_columns()
+    elif args.cmd == "archive":
+        archive_old_listings(args.days)
+    elif args.cmd == "maintenance":
+        run_maintenance("cli")
+        status = maintenance_status()
+        return 1 if any(v["status"] != "ok" for k, v in status.items() if k != "running") else 0
+    elif args.cmd == "vacuum":
+        vacuum_database()
+    elif args.cmd == "check-summary":
+        bad = check_phone_summary()
+        if bad:
+            print(f"⚠️ {len(bad)} telefonun xülasəsi uyğun deyil: {', '.join(bad[:20])}")
+            return 1
+        print("✅ phone_summary listings ilə uyğundur")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
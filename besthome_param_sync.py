@@ -1,14 +1,13 @@
+import queue
 import threading
 import datetime
-import sqlite3
-import time
 from tkinter import filedialog
 
 import customtkinter as ctk
 from tkcalendar import DateEntry
 
 import estatebase_sync
-from besthome_core import init_db, ensure_tables
+from besthome_core import init_db, ensure_tables, get_listing_stats, start_maintenance
 
 
 PRIMARY = "#0078D4"
@@ -16,14 +15,14 @@ BG = "#F5F8FF"
 TEXT = "#333333"
 
 
-def sync_with_progress(date_from, date_to, days, progress_bar, label, state_controller=None):
+def sync_with_progress(date_from, date_to, days, events=None, state_controller=None, incremental=False):
     return estatebase_sync.sync_with_progress(
         date_from,
         date_to,
         days,
-        progress_bar,
-        label,
+        events,
         state_controller=state_controller,
+        incremental=incremental,
     )
 
 
@@ -171,6 +170,12 @@ class ParamSyncApp(ctk.CTk):
         self.day_entry.insert(0, "-1")
         self.day_entry.grid(row=0, column=5, padx=(0, 12), pady=12, sticky="w")
 
+        # İnkremental: tarixlər nəzərə alınmır, son sinxron nöqtəsindən davam edir
+        self.incremental_var = ctk.BooleanVar(value=True)
+        ctk.CTkCheckBox(
+            control_frame, text="⚡ Yalnız yenilər", variable=self.incremental_var, text_color=TEXT
+        ).grid(row=0, column=6, padx=(0, 12), pady=12, sticky="w")
+
         ctk.CTkLabel(control_frame, text="🗂️ Verilənlər bazası mənbəyi:", text_color=TEXT).grid(
             row=1, column=0, padx=(12, 6), pady=(0, 12), sticky="w"
         )
@@ -239,6 +244,9 @@ class ParamSyncApp(ctk.CTk):
         self.progress_label = ctk.CTkLabel(main_frame, text="Hazır.", text_color="#666")
         self.progress_label.pack(anchor="w", padx=14, pady=(0, 10))
 
+        self.watermark_label = ctk.CTkLabel(main_frame, text="", text_color="#666", font=("Segoe UI", 11))
+        self.watermark_label.pack(anchor="w", padx=14, pady=(0, 10))
+
         detail_frame = ctk.CTkFrame(main_frame, fg_color="#FFFFFF", corner_radius=10)
         detail_frame.pack(fill="both", expand=True)
         self.detail_label = ctk.CTkLabel(
@@ -251,6 +259,13 @@ class ParamSyncApp(ctk.CTk):
         self.detail_label.pack(anchor="w", padx=15, pady=15)
 
         self.update_statistics()
+        self.refresh_watermark()
+
+    def refresh_watermark(self):
+        try:
+            self.watermark_label.configure(text=estatebase_sync.watermark_text())
+        except Exception as err:
+            self.watermark_label.configure(text=f"⚠️ Sinxron nöqtəsi oxunmadı: {err}")
 
     def choose_db_source(self):
         file_path = filedialog.askopenfilename(
@@ -276,23 +291,12 @@ class ParamSyncApp(ctk.CTk):
 
     def update_statistics(self):
         try:
-            conn = sqlite3.connect("besthome.db")
-            c = conn.cursor()
-
-            c.execute("SELECT COUNT(*) FROM listings")
-            total = c.fetchone()[0] or 0
-            c.execute("SELECT COUNT(*) FROM listings WHERE operation LIKE '%Sat%'")
-            sales = c.fetchone()[0] or 0
-            c.execute("SELECT COUNT(*) FROM listings WHERE operation LIKE '%Kiray%'")
-            rent = c.fetchone()[0] or 0
-            c.execute(
-                """
-                SELECT prop_type, COUNT(*) FROM listings
-                WHERE prop_type IS NOT NULL AND TRIM(prop_type) != ''
-                GROUP BY prop_type ORDER BY COUNT(*) DESC LIMIT 5
-                """
-            )
-            categories = c.fetchall()
+            stats = get_listing_stats()
+            total = stats["total"]
+            sales = stats["sales"]
+            rent = stats["rent"]
+            dupes = stats["dupes"]
+            categories = stats["top_prop_types"]
 
             top_text = "🏆 Ən çox elan olan kateqoriyalar:\n"
             for i, (cat, cnt) in enumerate(categories, start=1):
@@ -306,75 +310,72 @@ class ParamSyncApp(ctk.CTk):
             self.stat_labels["Ümumi"].configure(text=f"{total:,}")
             self.stat_labels["Satış"].configure(text=f"{sales:,}")
             self.stat_labels["Kirayə"].configure(text=f"{rent:,}")
-
-            c.execute(
-                """
-                SELECT COUNT(*) FROM (
-                    SELECT phone FROM listings
-                    WHERE phone IS NOT NULL
-                    GROUP BY phone, price, source_link
-                    HAVING COUNT(*) > 1
-                )
-                """
-            )
-            dupes = c.fetchone()[0] or 0
             self.stat_labels["Dublikat"].configure(text=f"{dupes:,}")
-
-            conn.close()
         except Exception as err:
             self.detail_label.configure(text=f"⚠️ Statistika xətası: {err}", text_color="#E74C3C")
 
     def run_sync(self):
-        def worker():
-            try:
-                self.sync_controller.set_running()
-                self._update_state_label()
-                self.sync_button.configure(state="disabled")
-                self.sync_button.configure(text="🔄 Yüklənir...", width=self.sync_button_width)
-                self.pause_button.configure(state="normal")
-                self.resume_button.configure(state="disabled")
-                self.progress_label.configure(
-                    text="📡 Serverdən məlumat yüklənir...",
-                    text_color="#E67E22",
-                )
-                self.progress_bar.set(0.05)
+        # Vidjetlər yalnız əsas axında: işçi axın gedişatı self.sync_events-ə yazır
+        self.sync_controller.set_running()
+        self._update_state_label()
+        self.sync_button.configure(state="disabled")
+        self.sync_button.configure(text="🔄 Yüklənir...", width=self.sync_button_width)
+        self.pause_button.configure(state="normal")
+        self.resume_button.configure(state="disabled")
+        self.progress_label.configure(
+            text="📡 Serverdən məlumat yüklənir...",
+            text_color="#E67E22",
+        )
+        self.progress_bar.set(0.05)
 
-                from_raw = (self.from_cal.get() or "").strip()
-                to_raw = (self.to_cal.get() or "").strip()
-                date_from = None
-                date_to = None
-                if from_raw and to_raw:
-                    date_from = self.from_cal.get_date().strftime("%Y-%m-%d")
-                    date_to = self.to_cal.get_date().strftime("%Y-%m-%d")
+        from_raw = (self.from_cal.get() or "").strip()
+        to_raw = (self.to_cal.get() or "").strip()
+        date_from = None
+        date_to = None
+        if from_raw and to_raw:
+            date_from = self.from_cal.get_date().strftime("%Y-%m-%d")
+            date_to = self.to_cal.get_date().strftime("%Y-%m-%d")
 
-                days = self.day_entry.get().strip()
+        days = self.day_entry.get().strip()
+        incremental = self.incremental_var.get()
+        self.sync_events = queue.Queue()
 
-                added_total = sync_with_progress(
+        def worker():
+            try:
+                sync_with_progress(
                     date_from,
                     date_to,
                     days,
-                    self.progress_bar,
-                    self.progress_label,
+                    self.sync_events,
                     state_controller=self.sync_controller,
+                    incremental=incremental,
                 )
-                self.update_statistics()
-
-                self.progress_bar.set(1.0)
-                self.progress_label.configure(
-                    text=f"✅ Serverdən {added_total} yeni elan yükləndi.",
-                    text_color="#27AE60",
-                )
+                # Böyük yazıdan sonra ANALYZE / vacuum / checkpoint (fon axınında)
+                start_maintenance("sync", force=True)
             except Exception as err:
-                self.progress_label.configure(text=f"❌ Xəta: {err}", text_color="#E74C3C")
-            finally:
-                time.sleep(0.1)
-                self.sync_controller.set_stopped()
-                self._update_state_label()
-                self.sync_button.configure(state="normal", text=self.sync_button_default_text, width=self.sync_button_width)
-                self.pause_button.configure(state="disabled")
-                self.resume_button.configure(state="disabled")
-
-        threading.Thread(target=worker, daemon=True).start()
+                self.sync_events.put({"type": "error", "message": str(err)})
+
+        self.sync_thread = threading.Thread(target=worker, daemon=True)
+        self.sync_thread.start()
+        self.after(estatebase_sync.PROGRESS_REFRESH_MS, self._poll_sync_events)
+
+    def _poll_sync_events(self):
+        ev = estatebase_sync.drain_events(self.sync_events)
+        if ev:
+            text, color, pct = estatebase_sync.event_text(ev)
+            self.progress_label.configure(text=text, text_color=color)
+            if pct is not None:
+                self.progress_bar.set(pct)
+        if self.sync_thread.is_alive():
+            self.after(estatebase_sync.PROGRESS_REFRESH_MS, self._poll_sync_events)
+            return
+        self.update_statistics()
+        self.refresh_watermark()
+        self.sync_controller.set_stopped()
+        self._update_state_label()
+        self.sync_button.configure(state="normal", text=self.sync_button_default_text, width=self.sync_button_width)
+        self.pause_button.configure(state="disabled")
+        self.resume_button.configure(state="disabled")
 
     def pause_sync(self):
         if self.sync_controller.state == SyncStateController.RUNNING:
@@ -1,186 +1,574 @@
-# ============================================
-# estatebase_sync.py — EstateBase SQL → BestHomeBase inteqrasiya (progress + duplikat nəzarəti)
-# Əsəd Əsədov ©️ 2025
-# ============================================
-
-import pyodbc
-import pandas as pd
+# ============================================
+# estatebase_sync.py — EstateBase SQL → BestHomeBase inteqrasiya (progress + duplikat nəzarəti)
+# Əsəd Əsədov ©️ 2025
+# ============================================
+
+import queue
+import sqlite3
+import threading
 import time
-from besthome_core import add_listing_row
-from datetime import datetime
-
-# ---------- Təhlükəsiz dəyər funksiyası ----------
-def safe(v):
-    """Boş və NaN dəyərləri təmizləyir"""
-    if v is None:
-        return None
-    if pd.isna(v):
-        return None
-    s = str(v).strip()
-    return s if s else None
-
-
-# ---------- Əsas sinxronizasiya funksiyası ----------
-def sync_with_progress(date_from, date_to, days, progress_bar, label, state_controller=None):
-    """SQL-dən məlumatları çəkir, dublikatları yoxlayır və dinamik progress göstərir."""
-    print(f"🔄 Sinxron başlanır: {date_from} → {date_to} | gün: {days}")
-
-    # Bağlantı sətri
-    conn_str = (
-        "Driver={SQL Server};"
-        "Server=.\\SQLEXPRESS;"
-        "Database=besthome;"
-        "Trusted_Connection=yes;"
-    )
-
-    try:
-        conn = pyodbc.connect(conn_str)
-    except Exception as err:
-        print(f"❌ Bağlantı xətası: {err}")
-        label.configure(text=f"❌ Bağlantı xətası: {err}", text_color="#E74C3C")
-        return 0
-
-    # Dinamik WHERE (istifadəçinin daxil etdiyi tarix və ya gün aralığına görə)
-    where = ""
-    if date_from and date_to:
-        where = f"WHERE CAST(p.insert_date_time AS date) BETWEEN '{date_from}' AND '{date_to}'"
+from besthome_core import (
+    add_listings_bulk,
+    parse_day,
+    parse_int,
+    parse_number,
+    parse_timestamp,
+    get_sync_state,
+    advance_sync_state,
+)
+from datetime import datetime, timedelta
+from pathlib import Path
+
+# SQLite-a bir tranzaksiyada yazılan elan sayı
+WRITE_BATCH = 2000
+# SQL Server cursor-undan bir dəfəyə oxunan sətir sayı (yaddaş bununla məhdudlaşır)
+FETCH_BATCH = 1000
+# Mərhələlər arası növbənin tutumu (hissə / paket sayı)
+PIPELINE_DEPTH = 2
+
+# sync_state-dəki mənbə adı
+SYNC_SOURCE = "estatebase"
+# Gec commit olunan sətirlər üçün hədd bu qədər dəqiqə geri çəkilir
+# (təkrar gələnləri unikal indeks atır)
+SYNC_OVERLAP_MINUTES = 10
+
+# ---------- Təhlükəsiz dəyər funksiyası ----------
+def safe(v):
+    """Boş və NaN dəyərləri təmizləyir"""
+    if v is None:
+        return None
+    if isinstance(v, float) and v != v:  # NaN
+        return None
+    s = str(v).strip()
+    return s if s else None
+
+
+def safe_num(v):
+    """SQL Server rəqəm sahəsi → float (boş/NaN → None)"""
+    return parse_number(safe(v))
+
+
+def watermark_text():
+    """Parametrlər paneli üçün: son inkremental sinxron nöqtəsi."""
+    state = get_sync_state(SYNC_SOURCE)
+    if not state["last_inserted_at"]:
+        return "⚡ Sinxron nöqtəsi yoxdur — ilk inkremental sinxron hamısını çəkəcək"
+    if not state["updated_at"]:
+        return f"⚡ Sinxron nöqtəsi: {state['last_inserted_at'][:10]} (yerli bazanın son günü)"
+    return (
+        f"⚡ Sinxron nöqtəsi: {state['last_inserted_at']} (#{state['last_id']}) | "
+        f"yenilənib: {state['updated_at']}"
+    )
+
+
+# ---------- Progress hadisələri ----------
+# Sinxron Tk vidjetlərinə toxunmur: hadisələri (dict, "type" açarı ilə)
+# thread-safe növbəyə qoyur, UI onları əsas axında after() ilə oxuyur.
+#   started          — total, incremental
+#   batch_committed  — fetched, total, added, skipped, failed, rate, elapsed
+#   paused           — eyni saylar (yazan pauzada gözləyir)
+#   finished         — eyni saylar + stopped
+#   error            — message + saylar
+# UI-ların növbəni oxuma intervalı (aralıqdakı paket hadisələri birləşir)
+PROGRESS_REFRESH_MS = 250
+
+
+def _emit(events, kind, **data):
+    if events is not None:
+        data["type"] = kind
+        events.put(data)
+
+
+def drain_events(events):
+    """Növbədəki bütün hadisələri götürür, sonuncunu qaytarır (boşdursa None)."""
+    last = None
+    try:
+        while True:
+            last = events.get_nowait()
+    except queue.Empty:
+        pass
+    return last
+
+
+def event_text(ev):
+    """Hadisə → (mətn, rəng, progress 0..1 və ya None) — hər iki panel üçün."""
+    t = ev["type"]
+    total = ev.get("total") or 0
+    pct = min(ev.get("fetched", 0) / total, 1.0) if total else None
+    counts = f"yazıldı: {ev.get('added', 0)} | ♻️ {ev.get('skipped', 0)}"
+    if ev.get("failed"):
+        counts += f" | ⚠️ yazılmadı: {ev['failed']}"
+    if t == "started":
+        return f"📡 Serverdə {total} elan tapıldı, çəkilir...", "#E67E22", 0.0
+    if t == "batch_committed":
+        return (
+            f"📊 Çəkildi: {ev['fetched']}/{total} ({int(pct * 100)}%) | {counts} | {ev['rate']:.0f} sətir/san",
+            "#0078D4",
+            pct,
+        )
+    if t == "paused":
+        return f"⏸️ Pauza: {ev['fetched']}/{total} | {counts}", "#E67E22", pct
+    if t == "error":
+        return f"❌ Xəta: {ev['message']}", "#E74C3C", None
+    if ev.get("stopped"):
+        return f"⏹️ Sinxronizasiya dayandırıldı | {counts}", "#E74C3C", pct
+    if not total:
+        return "⚠️ Yeni elan tapılmadı", "#888", 1.0
+    return (
+        f"✅ Tamamlandı: {ev['added']} yeni elan əlavə edildi | ♻️ {ev['skipped']} dublikat tapıldı "
+        f"({ev['elapsed']:.0f} san, {ev['rate']:.0f} sətir/san)",
+        "#2ECC71" if ev["added"] > 0 else "#888",
+        1.0,
+    )
+
+
+# ---------- Mənbə adapterləri ----------
+# Sinxron mənbəni yalnız bu interfeys ilə görür:
+#   open() / close(), count(filtr), batches(filtr, size) → sətir siyahıları.
+# Sətirlər SOURCE_QUERY sütun sırası ilədir (r[0] — insert_date_time, r[19] — id).
+# Filtr: {"since": "YYYY-MM-DD HH:MM:SS", "until": ..., "after_id": int} — hamısı istəyə bağlı.
+SQLSERVER_CONN_STR = (
+    "Driver={SQL Server};"
+    "Server=.\\SQLEXPRESS;"
+    "Database=besthome;"
+    "Trusted_Connection=yes;"
+)
+
+SOURCE_QUERY = """
+    SELECT 
+        p.insert_date_time AS [Oxunma tarixi],
+        pt.property_type_name AS [Əmlak növü],
+        o.operation_type_name AS [Əməliyyat],
+        m.metro_name AS [Metro],
+        rc.room_count_name AS [Otaq sayı],
+        bt.building_type_name AS [Tikili növü],
+        p.floor AS [Mərtəbə],
+        p.floor_of AS [Binanın mərtəbəsi],
+        p.area AS [Sahə sot],
+        p.general_area AS [Sahə kvm],
+        p.price AS [Qiymət],
+        c.currency_name AS [Valyuta],
+        p.owner_phone_number_01 AS [Əlaqə 1],
+        p.owner_phone_number_02 AS [Əlaqə 2],
+        p.owner_full_name AS [Ad],
+        p.address AS [Ünvan],
+        d.document_name AS [Sənəd],
+        p.data AS [Ümumi məlumat],
+        p.source_note AS [Link],
+        p.id_property AS [ID]
+    FROM dbo.property p
+    LEFT JOIN dbo.property_type pt ON p.fk_id_property_type = pt.id_property_type
+    LEFT JOIN dbo.building_type bt ON p.fk_id_building_type = bt.id_building_type
+    LEFT JOIN dbo.operation_type o ON p.fk_id_operation_type = o.id_operation_type
+    LEFT JOIN dbo.currency c ON p.fk_id_currency = c.id_currency
+    LEFT JOIN dbo.document d ON p.fk_id_document = d.id_document
+    LEFT JOIN dbo.metro m ON p.fk_id_metro = m.id_metro
+    LEFT JOIN dbo.room_count rc ON p.fk_id_room = rc.id_room_count
+    {where}
+    ORDER BY p.insert_date_time, p.id_property;
+    """
+
+
+class SyncSource:
+    """Mənbə adapterinin ümumi hissəsi; altsinif _connect və _param verir."""
+
+    name = "?"
+
+    def __init__(self):
+        self.conn = None
+
+    def _connect(self):
+        raise NotImplementedError
+
+    def _param(self, ts):
+        """'YYYY-MM-DD HH:MM:SS' → dialektin tarix parametri."""
+        return ts
+
+    def open(self):
+        self.conn = self._connect()
+        return self
+
+    def close(self):
+        if self.conn is not None:
+            self.conn.close()
+            self.conn = None
+
+    def _where(self, flt):
+        """Filtr → (WHERE, parametrlər). Tarix şərtləri indeksə uyğundur (CAST yoxdur)."""
+        cond = []
+        params = []
+        if flt.get("since"):
+            cond.append("p.insert_date_time >= ?")
+            params.append(self._param(flt["since"]))
+        if flt.get("until"):
+            cond.append("p.insert_date_time < ?")
+            params.append(self._param(flt["until"]))
+        where = " AND ".join(cond)
+        if flt.get("after_id") is not None:
+            # Geri tarixlə daxil edilmiş yeni sətirlər
+            where = f"({where}) OR p.id_property > ?" if where else "p.id_property > ?"
+            params.append(flt["after_id"])
+        return (f"WHERE {where}" if where else ""), params
+
+    def _execute(self, sql, params, size=None):
+        cur = self.conn.cursor()
+        if size:
+            cur.arraysize = size
+        if params:
+            cur.execute(sql, params)
+        else:
+            cur.execute(sql)
+        return cur
+
+    def count(self, flt):
+        """Progress faizi üçün ümumi say (JOIN-lər LEFT olduğu üçün lazım deyil)."""
+        where, params = self._where(flt)
+        return self._execute(f"SELECT COUNT(*) FROM dbo.property p {where}", params).fetchone()[0]
+
+    def batches(self, flt, size=None):
+        """Sorğunu dərhal icra edir (xəta burada çıxır), hissələri generator ilə verir."""
+        size = size or FETCH_BATCH
+        where, params = self._where(flt)
+        cur = self._execute(SOURCE_QUERY.format(where=where), params, size)
+
+        def fetch():
+            while True:
+                rows = cur.fetchmany(size)
+                if not rows:
+                    return
+                yield rows
+
+        return fetch()
+
+
+class SqlServerSource(SyncSource):
+    """EstateBase SQL Server bazası (pyodbc, Windows {SQL Server} drayveri)."""
+
+    name = "SQL Server"
+
+    def __init__(self, conn_str=SQLSERVER_CONN_STR):
+        super().__init__()
+        self.conn_str = conn_str
+
+    def _connect(self):
+        import pyodbc  # yalnız Windows maşınında lazımdır
+
+        return pyodbc.connect(self.conn_str)
+
+    def _param(self, ts):
+        return datetime.strptime(ts, "%Y-%m-%d %H:%M:%S")
+
+
+class SqliteSource(SyncSource):
+    """dbo.property sxemli lokal SQLite faylı (besthome_bench.estatebase yaradır).
+
+    Fayl "dbo" adı ilə qoşulur — SOURCE_QUERY dəyişmədən işləyir.
+    SQL Server-siz sınaq və sinxron benchmark-ı üçün.
+    """
+
+    name = "SQLite"
+
+    def __init__(self, path):
+        super().__init__()
+        self.path = Path(path)
+
+    def _connect(self):
+        if not self.path.exists():
+            raise FileNotFoundError(f"{self.path} tapılmadı")
+        # Sətirlər oxuyan axında çəkilir
+        conn = sqlite3.connect(":memory:", uri=True, check_same_thread=False)
+        conn.execute("ATTACH DATABASE ? AS dbo", (f"{self.path.resolve().as_uri()}?mode=ro",))
+        return conn
+
+
+# ---------- Konveyer mərhələləri ----------
+_DONE = object()  # mərhələ bitdi
+
+
+def _row_to_record(r):
+    """SQL Server sətri → add_listings_bulk qeydi (telefonsuz sətir → None)."""
+    phone = safe(r[12]) or safe(r[13])
+    if not phone:
+        return None
+    return {
+        "date_read": str(r[0])[:10] if r[0] else None,
+        "prop_type": safe(r[1]),
+        "operation": safe(r[2]),
+        "metro": safe(r[3]),
+        "rooms": safe(r[4]),
+        "building": safe(r[5]),
+        "floor": f"{safe(r[6])}/{safe(r[7])}" if r[6] or r[7] else None,
+        "area_kvm": (
+            f"{safe(r[8])} sot / {safe(r[9])} kvm"
+            if r[8] or r[9]
+            else None
+        ),
+        "price": float(r[10]) if r[10] else None,
+        "currency": safe(r[11]),
+        "phone": phone,
+        "contact_name": safe(r[14]),
+        "address": safe(r[15]),
+        "document": safe(r[16]),
+        "summary": safe(r[17]),
+        "source_link": safe(r[18]),
+        # Tipli sütunlar — mətnə çevirmədən birbaşa mənbə sahələrindən
+        "area_sot": safe_num(r[8]),
+        "area_kvm_num": safe_num(r[9]),
+        "floor_current": parse_int(safe(r[6])),
+        "floor_total": parse_int(safe(r[7])),
+        "rooms_num": parse_int(safe(r[4])),
+        "price_num": safe_num(r[10]),
+        "date_read_day": parse_day(r[0]),
+    }
+
+
+def _put(q, item, stop):
+    """Növbə doludursa gözləyir; yazan dayanıbsa False."""
+    while not stop.is_set():
+        try:
+            q.put(item, timeout=0.2)
+            return True
+        except queue.Full:
+            continue
+    return False
+
+
+def _get(q, stop):
+    while not stop.is_set():
+        try:
+            return q.get(timeout=0.2)
+        except queue.Empty:
+            continue
+    return _DONE
+
+
+def _fetch_stage(batches, out_q, stop):
+    """1-ci mərhələ: mənbədən FETCH_BATCH-lik hissələr (xəta da növbəyə gedir)."""
+    try:
+        for rows in batches:
+            if not _put(out_q, rows, stop):
+                return
+    except Exception as err:
+        _put(out_q, err, stop)
+        return
+    _put(out_q, _DONE, stop)
+
+
+def _transform_stage(in_q, out_q, stop):
+    """2-ci mərhələ: sətirləri qeydə çevirir və WRITE_BATCH-lik paketlərə yığır.
+
+    Paket: (qeydlər, indiyədək çəkilən sətir, son insert_date_time, ən böyük id).
+    Hədd paketdəki və ondan əvvəlki bütün sətirləri (telefonsuzlar da) əhatə edir.
+    """
+    records = []
+    fetched = 0
+    mark_ts = None
+    mark_id = None
+    end = _DONE
+    try:
+        while True:
+            item = _get(in_q, stop)
+            if item is _DONE or isinstance(item, Exception):
+                end = item
+                break
+            for r in item:
+                fetched += 1
+                try:
+                    # Sıra artandır — son işlənən sətir həm də ən yenisidir
+                    ts = parse_timestamp(r[0])
+                    if ts:
+                        mark_ts = max(mark_ts or "", ts)
+                    if r[19] is not None:
+                        mark_id = max(mark_id or 0, int(r[19]))
+                    rec = _row_to_record(r)
+                except Exception as err:
+                    print(f"⚠️ Sətir atlandı: {err}")
+                    continue
+                if rec:
+                    records.append(rec)
+            if len(records) >= WRITE_BATCH:
+                if not _put(out_q, (records, fetched, mark_ts, mark_id), stop):
+                    return
+                records = []
+        # Qalıq (boş olsa da — telefonsuz sətirlərin həddi üçün)
+        if not _put(out_q, (records, fetched, mark_ts, mark_id), stop):
+            return
+    except Exception as err:
+        end = err
+    _put(out_q, end, stop)
+
+
+# ---------- Əsas sinxronizasiya funksiyası ----------
+def sync_with_progress(date_from, date_to, days, events=None, state_controller=None, incremental=False, source=None):
+    """Mənbədən (default: SqlServerSource) elanları çəkir, dublikatları yoxlayır,
+    gedişatı events növbəsinə yazır.
+
+    incremental=True — tarixlər nəzərə alınmır, yalnız sync_state həddindən
+    (SYNC_OVERLAP_MINUTES geri) sonrakı və ya daha böyük id-li sətirlər çəkilir.
+    Sətirlər insert_date_time artan sırası ilə gəlir və hər yazılmış paketdən
+    sonra hədd irəli çəkilir — dayandırılsa növbəti sinxron qalandan davam edir.
+    Oxuma və təmizləmə ayrı axınlarda gedir; yazı (və pauza/dayandırma yoxlaması)
+    çağıran axında, WRITE_BATCH-lik paket sərhədlərində.
+    """
+    print(f"🔄 Sinxron başlanır: {date_from} → {date_to} | gün: {days} | inkremental: {incremental}")
+    source = source or SqlServerSource()
+
+    try:
+        source.open()
+    except Exception as err:
+        print(f"❌ Bağlantı xətası ({source.name}): {err}")
+        _emit(events, "error", message=f"Bağlantı xətası: {err}")
+        return 0
+
+    # Filtr (inkremental hədd, tarix və ya gün aralığına görə);
+    # lo — aralığın başlanğıcı (None — hamısı)
+    state = get_sync_state(SYNC_SOURCE)
+    flt = {}
+    lo = None
+    if incremental:
+        lo = state["last_inserted_at"]
+        if lo:
+            since = datetime.strptime(lo, "%Y-%m-%d %H:%M:%S") - timedelta(minutes=SYNC_OVERLAP_MINUTES)
+            flt["since"] = since.strftime("%Y-%m-%d %H:%M:%S")
+        flt["after_id"] = state["last_id"]
+        print(f"⚡ Hədd: {lo} (−{SYNC_OVERLAP_MINUTES} dəq), id > {state['last_id']}")
+    elif date_from and date_to:
+        lo = f"{date_from} 00:00:00"
+        until = datetime.strptime(date_to, "%Y-%m-%d") + timedelta(days=1)
+        flt = {"since": lo, "until": until.strftime("%Y-%m-%d 00:00:00")}
     elif days and days.strip().startswith("-"):
         try:
             n = int(days)
-            where = f"WHERE CAST(p.insert_date_time AS date) >= DATEADD(DAY, {n}, CAST(GETDATE() AS date))"
+            lo = (datetime.now() + timedelta(days=n)).strftime("%Y-%m-%d 00:00:00")
+            flt = {"since": lo}
         except Exception as err:
             print("⚠️ Gün sayı səhvdir:", err)
-
-    # SQL sorğusu
-    query = f"""
-    SELECT 
-        p.insert_date_time AS [Oxunma tarixi],
-        pt.property_type_name AS [Əmlak növü],
-        o.operation_type_name AS [Əməliyyat],
-        m.metro_name AS [Metro],
-        rc.room_count_name AS [Otaq sayı],
-        bt.building_type_name AS [Tikili növü],
-        p.floor AS [Mərtəbə],
-        p.floor_of AS [Binanın mərtəbəsi],
-        p.area AS [Sahə sot],
-        p.general_area AS [Sahə kvm],
-        p.price AS [Qiymət],
-        c.currency_name AS [Valyuta],
-        p.owner_phone_number_01 AS [Əlaqə 1],
-        p.owner_phone_number_02 AS [Əlaqə 2],
-        p.owner_full_name AS [Ad],
-        p.address AS [Ünvan],
-        d.document_name AS [Sənəd],
-        p.data AS [Ümumi məlumat],
-        p.source_note AS [Link]
-    FROM dbo.property p
-    LEFT JOIN dbo.property_type pt ON p.fk_id_property_type = pt.id_property_type
-    LEFT JOIN dbo.building_type bt ON p.fk_id_building_type = bt.id_building_type
-    LEFT JOIN dbo.operation_type o ON p.fk_id_operation_type = o.id_operation_type
-    LEFT JOIN dbo.currency c ON p.fk_id_currency = c.id_currency
-    LEFT JOIN dbo.document d ON p.fk_id_document = d.id_document
-    LEFT JOIN dbo.metro m ON p.fk_id_metro = m.id_metro
-    LEFT JOIN dbo.room_count rc ON p.fk_id_room = rc.id_room_count
-    {where}
-    ORDER BY p.insert_date_time DESC;
-    """
-
-    try:
-        df = pd.read_sql(query, conn)
-    except Exception as err:
-        print(f"❌ SQL sorğu xətası: {err}")
-        label.configure(text=f"❌ SQL sorğu xətası: {err}", text_color="#E74C3C")
-        return 0
-
-    total = len(df)
-    print(f"✅ SQL-dən {total} elan tapıldı.")
-
-    if total == 0:
-        label.configure(text="⚠️ Yeni elan tapılmadı", text_color="#888")
-        conn.close()
-        return 0
-
-    # Məlumatları işləməyə hazırlaş
+
+    # Hədd yalnız aralıq onu əhatə edəndə irəli gedir (aralıqla hədd arasında boşluq qalmasın)
+    advance = state["updated_at"] is None or lo is None or lo <= (state["last_inserted_at"] or "")
+
+    # Bütün nəticə yaddaşa yüklənmir: mənbə FETCH_BATCH-lik hissələrlə oxunur
+    try:
+        total = source.count(flt)
+        print(f"✅ {source.name}-dən {total} elan tapıldı.")
+        if total == 0:
+            _emit(events, "finished", total=0, fetched=0, added=0, skipped=0, stopped=False, rate=0.0, elapsed=0.0)
+            source.close()
+            return 0
+        batches = source.batches(flt, FETCH_BATCH)
+    except Exception as err:
+        print(f"❌ SQL sorğu xətası: {err}")
+        _emit(events, "error", message=f"SQL sorğu xətası: {err}")
+        source.close()
+        return 0
+
+    # Konveyer: oxuyan → təmizləyən → (bu axın) SQLite yazan.
+    # Növbələr məhduddur — yavaş mərhələ əvvəlkiləri saxlayır, yaddaş artmır.
+    stop = threading.Event()
+    rows_q = queue.Queue(PIPELINE_DEPTH)
+    batch_q = queue.Queue(PIPELINE_DEPTH)
+    stages = [
+        threading.Thread(target=_fetch_stage, args=(batches, rows_q, stop), name="sync-fetch", daemon=True),
+        threading.Thread(target=_transform_stage, args=(rows_q, batch_q, stop), name="sync-transform", daemon=True),
+    ]
+    for t in stages:
+        t.start()
+    _emit(events, "started", total=total, incremental=incremental)
+
+    # (dublikatları SQLite-dakı unikal indeks atır — ayrıca yaddaş dəsti saxlanmır)
     added = 0
     skipped = 0
-    last_seen = set()  # dublikatları saxlamaq üçün (site, phone, price)
-
-    # Hər sətri oxu və SQLite bazasına yaz
-    for i, r in enumerate(df.itertuples(index=False), start=1):
-        try:
+    failed = 0
+    fetched = 0
+    stopped = False
+    error = None
+    t0 = time.perf_counter()
+
+    def counts():
+        elapsed = time.perf_counter() - t0
+        return {
+            "total": total,
+            "fetched": fetched,
+            "added": added,
+            "skipped": skipped,
+            "failed": failed,
+            "elapsed": elapsed,
+            "rate": fetched / elapsed if elapsed else 0.0,
+        }
+
+    try:
+        while True:
+            item = batch_q.get()
+            if item is _DONE:
+                break
+            if isinstance(item, Exception):
+                print(f"❌ SQL oxuma xətası: {item}")
+                error = f"SQL oxuma xətası: {item}"
+                break
+
+            # Pauza / dayandırma paket sərhədində: bu paket yazılmır, hədd də irəli getmir
             if state_controller:
-                stopped = state_controller.wait_if_paused()
-                if stopped or state_controller.should_stop():
-                    label.configure(text="⏹️ Sinxronizasiya dayandırıldı", text_color="#E74C3C")
+                if state_controller.state == state_controller.PAUSED:
+                    _emit(events, "paused", **counts())
+                if state_controller.wait_if_paused() or state_controller.should_stop():
+                    stopped = True
                     break
 
-            # Tarix formatı (yalnız YYYY-MM-DD)
-            date_only = str(r[0])[:10] if r[0] else None
-
-            # Əlaqə nömrəsi
-            phone = safe(r[12]) or safe(r[13])
-            if not phone:
-                continue
-
-            # Əsas dublikat açarı
-            source_link = safe(r[18])
-
-            key = (
-                source_link,
-                phone,
-                str(safe(r[10])),  # qiymət
-            )
-            if key in last_seen:
-                skipped += 1
-                continue
-            last_seen.add(key)
-
-            # Qeyd
-            rec = {
-                "date_read": date_only,
-                "prop_type": safe(r[1]),
-                "operation": safe(r[2]),
-                "metro": safe(r[3]),
-                "rooms": safe(r[4]),
-                "building": safe(r[5]),
-                "floor": f"{safe(r[6])}/{safe(r[7])}" if r[6] or r[7] else None,
-                "area_kvm": (
-                    f"{safe(r[8])} sot / {safe(r[9])} kvm"
-                    if r[8] or r[9]
-                    else None
-                ),
-                "price": float(r[10]) if r[10] else None,
-                "currency": safe(r[11]),
-                "phone": phone,
-                "contact_name": safe(r[14]),
-                "address": safe(r[15]),
-                "document": safe(r[16]),
-                "summary": safe(r[17]),
-                "source_link": source_link,
-            }
-
-            if add_listing_row(rec):
-                added += 1
-
-            # Real-time progress
-            pct = i / total
-            progress_bar.set(pct)
-            label.configure(
-                text=f"📊 Çəkilir: {i}/{total} ({int(pct * 100)}%)",
-                text_color="#0078D4",
-            )
-            if i % 25 == 0:
-                time.sleep(0.03)
-
-        except Exception as err:
-            print(f"⚠️ Sətir atlandı: {err}")
-            continue
-
-    conn.close()
-    print(f"🏁 Tamamlandı: {added} elan əlavə edildi, {skipped} dublikat atlandı.")
-    label.configure(
-        text=f"✅ Tamamlandı: {added} yeni elan əlavə edildi | ♻️ {skipped} dublikat tapıldı",
-        text_color="#2ECC71" if added > 0 else "#888",
-    )
-    progress_bar.set(1.0)
-    return added
+            records, fetched, mark_ts, mark_id = item
+            a = 0
+            if records:
+                try:
+                    a, d = add_listings_bulk(records)
+                    added += a
+                    skipped += d
+                except Exception as err:
+                    advance = False  # yazılmamış sətirlərin üstündən hədd keçməsin
+                    failed += len(records)
+                    print(f"⚠️ Paket yazıla bilmədi ({len(records)} elan): {err}")
+            if advance and mark_ts:
+                advance_sync_state(SYNC_SOURCE, mark_ts, mark_id, a)
+            _emit(events, "batch_committed", **counts())
+    finally:
+        stop.set()
+        for t in stages:
+            t.join()
+        source.close()
+
+    print(f"🏁 Tamamlandı: {fetched} sətir çəkildi, {added} elan əlavə edildi, {skipped} dublikat atlandı.")
+    if error:
+        _emit(events, "error", message=error, **counts())
+    else:
+        _emit(events, "finished", stopped=stopped, **counts())
+    return added
+
+
+# ---------- Komanda sətri (gecə sinxronu) ----------
+def main(argv=None):
+    """python estatebase_sync.py [--db FAYL] [--sqlite MƏNBƏ] [--days -N | --from G --to G] [--reset]."""
+    import argparse
+    import besthome_core
+
+    parser = argparse.ArgumentParser(description="EstateBase → BestHome sinxronu (default: inkremental)")
+    parser.add_argument("--db", help="besthome.db faylının yolu")
+    parser.add_argument("--sqlite", help="SQL Server əvəzinə dbo.property sxemli SQLite faylı")
+    parser.add_argument("--days", help="hədd əvəzinə son N gün, məs. -7")
+    parser.add_argument("--from", dest="date_from", help="başlanğıc gün (YYYY-MM-DD)")
+    parser.add_argument("--to", dest="date_to", help="son gün (YYYY-MM-DD)")
+    parser.add_argument("--reset", action="store_true", help="həddi sıfırla (yerli son gündən başla)")
+    args = parser.parse_args(argv)
+
+    if args.db:
+        besthome_core.DB_PATH = Path(args.db)
+    besthome_core.migrate()
+    if args.reset:
+        besthome_core.reset_sync_state(SYNC_SOURCE)
+    incremental = not (args.days or (args.date_from and args.date_to))
+    source = SqliteSource(args.sqlite) if args.sqlite else None
+    sync_with_progress(args.date_from, args.date_to, args.days, incremental=incremental, source=source)
+    besthome_core.run_maintenance("sync")
+    print(watermark_text())
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,39 @@
+# ============================================
+# tests/conftest.py — ortaq fixture-lər (müvəqqəti test bazası)
+# ============================================
+
+import sys
+from pathlib import Path
+
+import pytest
+
+# Modullar layihə kökündədir (paket deyil)
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import besthome_core as core  # noqa: E402
+
+
+def pytest_addoption(parser):
+    parser.addoption("--runslow", action="store_true", help="slow işarəli (tam ölçülü) testləri də qaçır")
+
+
+def pytest_configure(config):
+    config.addinivalue_line("markers", "slow: uzun testlər (yalnız --runslow ilə)")
+
+
+def pytest_collection_modifyitems(config, items):
+    if config.getoption("--runslow"):
+        return
+    skip = pytest.mark.skip(reason="slow — --runslow ilə qaçır")
+    for item in items:
+        if "slow" in item.keywords:
+            item.add_marker(skip)
+
+
+@pytest.fixture
+def db(tmp_path, monkeypatch):
+    """Boş, son sxemə yenilənmiş besthome.db (tmp_path-da); sonda bağlantılar bağlanır."""
+    monkeypatch.setattr(core, "DB_PATH", tmp_path / "besthome.db")
+    core.migrate()
+    yield core.get_db()
+    core.close_db()
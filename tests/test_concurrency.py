@@ -0,0 +1,78 @@
+# ============================================
+# tests/test_concurrency.py — sinxron yazısı fonunda axtarış (WAL snapshot oxucuları)
+# ============================================
+
+import random
+import threading
+
+import pytest
+
+import besthome_core as core
+
+# Sorğudakı tam ölçü 100k sətirdir (~40 san); adi qaçışda 20k — 20 partiya
+# yazı ərzində yüzlərlə axtarış üst-üstə düşür, test bir neçə saniyəyə bitir
+ROWS = 20_000
+ROWS_FULL = 100_000
+BATCH = 1000
+
+
+def _batch(rnd, off, n):
+    return [
+        {
+            "phone": f"099{rnd.randrange(10**5):07d}",
+            "price": rnd.randrange(200, 500_000),
+            "operation": rnd.choice(("Satılır", "Kirayə verilir")),
+            "prop_type": rnd.choice(("Yeni tikili", "Köhnə tikili", "Həyət evi")),
+            "rooms": str(rnd.randint(1, 5)),
+            "created_at": f"2026-05-{1 + (off + i) % 28:02d} 10:00:00",
+            "source_link": f"test:{off + i}",
+            "summary": f"test {rnd.choice(('metro', 'təmirli', 'kupça'))}",
+        }
+        for i in range(n)
+    ]
+
+
+@pytest.mark.parametrize("rows", [ROWS, pytest.param(ROWS_FULL, marks=pytest.mark.slow)])
+def test_search_during_bulk_writes(db, rows):
+    """Fon axını partiyalarla yazır, əsas axın fasiləsiz axtarır.
+
+    Hər oxunuş tam partiyalar görməlidir (yarımçıq tranzaksiya yox) və
+    phone_summary hər snapshot-da listings ilə uyğun qalmalıdır.
+    100k variantı slow-dur: pytest --runslow ilə qaçır.
+    """
+    done = threading.Event()
+    errors = []
+
+    def writer():
+        rnd = random.Random(1)
+        try:
+            for off in range(0, rows, BATCH):
+                core.add_listings_bulk(_batch(rnd, off, min(BATCH, rows - off)))
+        except Exception as e:
+            errors.append(e)
+        finally:
+            done.set()
+
+    th = threading.Thread(target=writer, name="test-writer", daemon=True)
+    th.start()
+    keywords = (None, "metro", "təmirli", "099")
+    searches = 0
+    torn = []
+    mismatched = []
+    while not done.is_set():
+        core.query_phones_summary(keyword=keywords[searches % len(keywords)], limit=200)
+        searches += 1
+        total = core.get_listing_stats()["total"]
+        if total % BATCH:
+            torn.append(total)
+        bad = core.check_phone_summary()
+        if bad:
+            mismatched.append(bad)
+    th.join()
+
+    assert not errors, errors
+    assert searches > 0
+    assert torn == []
+    assert mismatched == []
+    assert core.get_listing_stats()["total"] == rows
+    assert core.check_phone_summary() == []
@@ -0,0 +1,50 @@
+# ============================================
+# tests/test_migrate.py — köhnə bazanın yenilənməsi: silinən dublikatlar itmir
+# ============================================
+
+import json
+import sqlite3
+
+import besthome_core as core
+
+
+def test_migrate_keeps_removed_dupes(tmp_path, monkeypatch):
+    """v3 (eyni açar) və v13 (normallaşdırmadan sonra eyni telefon) dublikatları _migrated_dupes-ə düşür."""
+    path = tmp_path / "besthome.db"
+    conn = sqlite3.connect(path)
+    conn.execute("""
+        CREATE TABLE listings (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            date_read TEXT, prop_type TEXT, operation TEXT, metro TEXT, rooms TEXT,
+            building TEXT, floor TEXT, area_kvm TEXT, price REAL, currency TEXT,
+            phone TEXT, contact_name TEXT, address TEXT, document TEXT, summary TEXT,
+            source_link TEXT, created_at TEXT DEFAULT CURRENT_TIMESTAMP
+        )
+    """)
+    rows = [
+        ("0501234567", 100, "a", "ilk"),
+        ("0501234567", 100, "a", "eyni açar"),          # v3
+        ("050 123 45 67", 100, "a", "başqa yazılış"),   # v13
+        ("0501234567", 200, "a", "başqa qiymət"),
+        ("0557654321", None, None, "NULL-lar bərabər"),
+        ("0557654321", None, None, "NULL-lar bərabər 2"),  # v3
+    ]
+    conn.executemany(
+        "INSERT INTO listings (phone, price, source_link, summary, prop_type, created_at)"
+        " VALUES (?, ?, ?, ?, 'Yeni tikili', '2025-01-01 10:00:00')",
+        rows,
+    )
+    conn.commit()
+    conn.close()
+
+    monkeypatch.setattr(core, "DB_PATH", path)
+    core.migrate()
+    try:
+        db = core.get_db().read()
+        assert db.execute("SELECT COUNT(*) FROM listings").fetchone()[0] == 3
+        moved = db.execute("SELECT version, row_id, kept_id, data FROM _migrated_dupes ORDER BY id").fetchall()
+        assert [(v, r, k) for v, r, k, _ in moved] == [(3, 2, 1), (3, 6, 5), (13, 3, 1)]
+        assert json.loads(moved[2][3])["phone"] == "050 123 45 67"
+        assert json.loads(moved[0][3])["summary"] == "eyni açar"
+    finally:
+        core.close_db()
@@ -0,0 +1,103 @@
+# ============================================
+# tests/test_query.py — query_phones_summary: açar söz + tarix + filtrlər eyni elanda
+# ============================================
+
+import random
+
+import pytest
+
+import besthome_core as core
+
+ROWS = 3000
+WORDS = ("metro", "təmirli", "kupça", "Sahil", "ipoteka")
+
+
+def _records(rnd, off, n, day0):
+    return [
+        {
+            "phone": f"050{rnd.randrange(400):07d}",
+            "price": rnd.randrange(20_000, 400_000),
+            "operation": rnd.choice(("Satılır", "Kirayə verilir")),
+            "prop_type": rnd.choice(("Yeni tikili", "Köhnə tikili")),
+            "rooms": str(rnd.randint(1, 4)),
+            "created_at": f"2025-{1 + (day0 + i) // 28 % 12:02d}-{1 + (day0 + i) % 28:02d} 10:00:00",
+            "source_link": f"test:{off + i}",
+            "summary": " ".join(rnd.sample(WORDS, 2)),
+        }
+        for i in range(n)
+    ]
+
+
+def _brute(conn, keyword=None, date_from=None, date_to=None, prop_types=None, price_min=None,
+           include_archive=False):
+    """Gözlənilən telefonlar: bir elan hamısını ödəməlidir."""
+    lo, hi = core.day_range(date_from, date_to)
+    where = ["phone_id IS NOT NULL"]
+    params = []
+    if lo:
+        where.append("created_at >= ?")
+        params.append(lo)
+    if hi:
+        where.append("created_at < ?")
+        params.append(hi)
+    if prop_types:
+        where.append(f"prop_type IN ({','.join('?' * len(prop_types))})")
+        params += prop_types
+    if price_min is not None:
+        where.append("price_num >= ?")
+        params.append(price_min)
+    if keyword:
+        where.append("LOWER(summary_preview) LIKE ?")  # qısa mətnlər — preview tamdır
+        params.append(f"%{keyword.lower()}%")
+    src = "listings_all" if include_archive else "listings"
+    sql = f"SELECT DISTINCT phone_id FROM {src} WHERE {' AND '.join(where)}"
+    return {r[0] for r in conn.execute(sql, params)}
+
+
+def _page_all(**kw):
+    out, cursor = [], None
+    while True:
+        rows = core.query_phones_summary(limit=37, cursor=cursor, **kw)
+        out += rows
+        cursor = core.page_cursor(rows, 37)
+        if not cursor:
+            return out
+
+
+CASES = [
+    dict(keyword="Sahil", date_from="2025-02-01", date_to="2025-02-10"),
+    dict(keyword="təmirli"),
+    dict(keyword="təmirli", prop_types=["Yeni tikili"], price_min=150_000),
+    dict(keyword="kupça", date_from="2025-03-01", date_to="2025-06-30", prop_types=["Köhnə tikili"]),
+    dict(prop_types=["Yeni tikili"], date_from="2025-02-01", date_to="2025-02-10"),
+]
+
+
+@pytest.mark.parametrize("kw", CASES)
+def test_summary_matches_per_listing(db, monkeypatch, kw):
+    """Səhifələnmiş nəticə brute-force DISTINCT phone_id ilə üst-üstə düşür (dublikatsız)."""
+    monkeypatch.setattr(core, "FTS_CANDIDATES", 50)  # bir neçə FTS pəncərəsi işləsin
+    core.add_listings_bulk(_records(random.Random(5), 0, ROWS, 0))
+    rows = _page_all(**kw)
+    ids = [r["phone_id"] for r in rows]
+    assert len(ids) == len(set(ids))
+    conn = db.read()
+    assert set(ids) == _brute(conn, **kw)
+    if kw.get("date_from"):
+        lo, hi = core.day_range(kw["date_from"], kw["date_to"])
+        cnt = dict(conn.execute(
+            "SELECT phone_id, COUNT(*) FROM listings WHERE created_at >= ? AND created_at < ?"
+            " GROUP BY phone_id", (lo, hi)))
+        assert all(r["ad_count"] == cnt[r["phone_id"]] for r in rows)
+
+
+def test_archive_keyword_is_superset(db):
+    """include_archive açar sözlə isti rejimdən az telefon qaytarmır."""
+    core.add_listings_bulk(_records(random.Random(7), 0, ROWS, 0))
+    hot = {r["phone_id"] for r in _page_all(keyword="metro")}
+    assert core.archive_old_listings(days=(core.datetime.now() - core.datetime(2025, 6, 1)).days) > 0
+    arch = {r["phone_id"] for r in _page_all(keyword="metro", include_archive=True)}
+    assert hot <= arch
+    conn = db.read()
+    assert core._attach_archive(conn)
+    assert arch == _brute(conn, keyword="metro", include_archive=True)
@@ -0,0 +1,34 @@
+# ============================================
+# tests/test_stats.py — panel sayğacları (listing_stats) tam hesablama ilə uyğun
+# ============================================
+
+import besthome_core as core
+
+
+def _rec(i, **kw):
+    rec = {
+        "phone": f"0551{i % 37:06d}",
+        "price": 1000 + i % 11,
+        "operation": ("Satılır", "Kirayə verilir", None)[i % 3],
+        "prop_type": ("Yeni tikili", "Köhnə tikili", " ", None)[i % 4],
+        "created_at": f"2026-01-{1 + i % 28:02d} 10:00:00",
+        "source_link": f"stats:{i}",
+    }
+    rec.update(kw)
+    return rec
+
+
+def test_stats_match_rebuild(db):
+    """Hissə-hissə əlavə, silmə və yeniləmədən sonra sayğaclar yenidən hesablanmışla eynidir."""
+    core.add_listings_bulk([_rec(i) for i in range(500)])
+    core.add_listings_bulk([_rec(i) for i in range(450, 900)])  # 50 dublikat
+    with db.write() as conn:
+        conn.execute(f"DELETE FROM {core.LISTINGS_TABLE} WHERE id % 7 = 0")
+        conn.execute(
+            f"UPDATE {core.LISTINGS_TABLE} SET operation_id = "
+            "(SELECT id FROM lookup_values WHERE col = 'operation' AND value = 'Satılır') WHERE id % 5 = 0"
+        )
+    stats = core.get_listing_stats(top=10)
+    assert stats["total"] == 900 - 900 // 7
+    core.rebuild_listing_stats()
+    assert core.get_listing_stats(top=10) == stats